@@ -78,9 +78,17 @@ echo "=== Étape 4/5: Compilation gr-ieee802-11 ==="
 echo "  (Cela peut prendre 5-10 minutes...)"
 echo ""
 
+# Build Release optimisé pour le CPU hôte: le décodeur Viterbi de decode_mac
+# (viterbi_decoder) n'utilise ses chemins SSE2/NEON que si le compilateur les
+# active; sans -march=native ni Release, il retombe sur la version scalaire.
+# Après une mise à jour de GNU Radio/Volk, relancer ce script (ou supprimer
+# build/) pour recompiler contre la nouvelle version.
 mkdir -p build
 cd build
-cmake ..
+cmake .. \
+    -DCMAKE_BUILD_TYPE=Release \
+    -DCMAKE_CXX_FLAGS="-march=native" \
+    -DCMAKE_C_FLAGS="-march=native"
 make -j$(nproc)
 sudo make install
 sudo ldconfig
@@ -117,6 +125,16 @@ else
     exit 1
 fi
 
+# Backend FFT de gr-fft (fft_vcc 64 points de la démodulation OFDM):
+# FFTW3f avec ses noyaux SIMD; les plans mesurés sont conservés dans
+# ~/.gr_fftw_wisdom et réutilisés aux lancements suivants
+GR_FFT_LIB=$(ldconfig -p | grep -o '/[^ ]*libgnuradio-fft\.so[^ ]*' | head -n1)
+if [ -n "$GR_FFT_LIB" ] && ldd "$GR_FFT_LIB" | grep -q libfftw3f; then
+    echo "✓ gr-fft utilise FFTW3f"
+else
+    echo "⚠️  Backend FFTW3f de gr-fft non vérifié (libgnuradio-fft introuvable ou sans libfftw3f)"
+fi
+
 echo ""
 echo "========================================================================"
 echo "✅ INSTALLATION RÉUSSIE"
@@ -127,6 +145,10 @@ echo "  1. Tester: python3 gnuradio_wifi_remote_id.py"
 echo "  2. Faire voler votre drone avec Remote ID activé"
 echo "  3. Lancer: python3 main_gnuradio_wifi.py"
 echo ""
+echo "Ordonnancement temps réel (option --realtime):"
+echo "  Autoriser la priorité RT pour votre utilisateur, ex. dans /etc/security/limits.conf:"
+echo "    $USER  -  rtprio  99"
+echo ""
 echo "Documentation:"
 echo "  - OPTION2B_GNU_RADIO.md"
 echo "  - https://github.com/bastibl/gr-ieee802-11"
@@ -10,10 +10,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import logging
 import time
+import numpy as np
 from src.uhd_acquisition import UHDAcquisition
 from src.preprocessing import SignalPreprocessor
 from src.spectrogram import SpectralAnalyzer
-from src.wifi_detector import WiFiDetector
+from src.wifi_detector import WiFiDetector, CHAN_FREQ_MHZ
 from src.wifi_capture import WiFiMonitorCapture
 from src.remote_id_decoder import WiFiRemoteIDDecoder
 
@@ -46,6 +47,11 @@ class HybridRemoteIDDetector:
         self.analyzer = SpectralAnalyzer(sample_rate=25e6)
         self.wifi_detector = WiFiDetector()
 
+        # Filtre passe-bande conçu une seule fois, état conservé entre acquisitions
+        self._bandpass_sos = self.preprocessor.design_bandpass(4e6, 20e6)
+        self._bandpass_zi = (self.preprocessor.init_filter_state(self._bandpass_sos)
+                             if self._bandpass_sos is not None else None)
+
         # WiFi capture
         self.wifi_capture = WiFiMonitorCapture(interface="wlan1")
 
@@ -54,6 +60,14 @@ class HybridRemoteIDDetector:
 
         self.detection_count = 0
 
+        # Préchauffage JIT (Numba): la première compilation prend plusieurs
+        # secondes, on la paie ici plutôt que dans la boucle de détection
+        warmup = self.preprocessor.process(
+            (np.random.randn(4096) + 1j * np.random.randn(4096)).astype(np.complex64),
+            sos=self._bandpass_sos
+        )
+        self.analyzer.extract_temporal_features(warmup)
+
     def run(self, duration: int = 60):
         """
         Lance la détection pendant une durée donnée
@@ -61,7 +75,7 @@ class HybridRemoteIDDetector:
         Args:
             duration: Durée en secondes
         """
-        logger.info(f"\nDémarrage de la détection pour {duration}s...")
+        logger.info("\nDémarrage de la détection pour %ds...", duration)
 
         # 1. Initialiser SDR
         if not self.sdr.initialize():
@@ -76,18 +90,24 @@ class HybridRemoteIDDetector:
         else:
             wifi_available = True
 
-        # 3. Boucle de détection
-        start_time = time.time()
+        # 3. Acquisition continue (ring buffer alimenté par un thread producteur)
+        self.sdr.start_continuous_acquisition(num_samples_per_buffer=100000, channel=0)
+
+        # 4. Boucle de détection
+        # Échéance sur horloge monotone (insensible aux sauts NTP)
+        deadline = time.monotonic_ns() + int(duration * 1e9)
         snr_threshold = 10.0
+        min_rssi_dbm = -80
 
         try:
-            while (time.time() - start_time) < duration:
-                # ÉTAPE 1: Acquisition SDR
+            while time.monotonic_ns() < deadline:
+                # ÉTAPE 1: Acquisition SDR (tranche du ring buffer, sans copie)
+                # get_samples() attend la prochaine tranche publiée par le
+                # producteur (Condition): pas de pause fixe dans la boucle
                 logger.debug("\n--- Acquisition SDR ---")
-                samples = self.sdr.acquire_samples(num_samples=100000, channel=0)
+                samples = self.sdr.get_samples(timeout=0.5)
 
                 if samples is None:
-                    time.sleep(0.1)
                     continue
 
                 # ÉTAPE 2: Prétraitement
@@ -96,23 +116,24 @@ class HybridRemoteIDDetector:
                     samples,
                     enable_dc_removal=True,
                     enable_iq_correction=True,
-                    bandpass_range=(4e6, 20e6),
-                    normalize_method='rms'
+                    normalize_method='rms',
+                    sos=self._bandpass_sos,
+                    zi=self._bandpass_zi
                 )
 
-                # ÉTAPE 3: Calcul SNR
-                snr = self.preprocessor.compute_snr(processed)
+                # ÉTAPE 3: Calcul SNR (puissance instantanée conservée pour l'analyse)
+                power, snr = self.preprocessor.compute_power_and_snr(processed)
 
                 if snr < snr_threshold:
-                    logger.debug(f"SNR trop faible: {snr:.1f} dB")
-                    time.sleep(0.1)
+                    logger.debug("SNR trop faible: %.1f dB", snr)
                     continue
 
-                logger.info(f"\n🎯 Signal détecté! SNR: {snr:.1f} dB")
+                logger.info("\n🎯 Signal détecté! SNR: %.1f dB", snr)
 
                 # ÉTAPE 4: Analyse spectrale
                 logger.debug("Analyse spectrale...")
-                features = self.analyzer.analyze_signal(processed, compute_spectrogram=False)
+                features = self.analyzer.analyze_signal(processed, compute_spectrogram=False,
+                                                        power=power)
                 features['snr'] = snr
                 features['sample_rate'] = 25e6
 
@@ -124,11 +145,11 @@ class HybridRemoteIDDetector:
                 )
 
                 if not is_wifi:
-                    logger.info(f"Signal non-WiFi (confiance WiFi: {wifi_confidence:.1%})")
-                    time.sleep(0.1)
+                    logger.info("Signal non-WiFi (confiance WiFi: %.1f%%)", wifi_confidence * 100)
                     continue
 
-                logger.info(f"✅ Signal WiFi détecté! Canal: {wifi_channel}, Confiance: {wifi_confidence:.1%}")
+                logger.info("✅ Signal WiFi détecté! Canal: %s, Confiance: %.1f%%",
+                            wifi_channel, wifi_confidence * 100)
 
                 # ÉTAPE 6: Capture WiFi si disponible
                 if wifi_available:
@@ -136,44 +157,34 @@ class HybridRemoteIDDetector:
 
                     # Changer de canal si nécessaire
                     if wifi_channel:
-                        logger.info(f"Passage au canal {wifi_channel}")
-                        # TODO: Changer le canal de l'adaptateur WiFi
+                        logger.info("Passage au canal %d (%d MHz)",
+                                    wifi_channel, CHAN_FREQ_MHZ[wifi_channel])
+                        self.wifi_capture.set_channel(wifi_channel)
 
-                    # Capturer des trames
-                    frames = self.wifi_capture.capture_with_scapy(count=20)
+                    # Capturer des trames (lot stocké par colonnes)
+                    batch = self.wifi_capture.capture_batch_with_scapy(count=20)
 
-                    if not frames:
+                    if not len(batch):
                         logger.warning("Aucune trame capturée")
                         continue
 
-                    logger.info(f"✅ {len(frames)} trames Beacon capturées")
+                    logger.info("✅ %d trames Beacon capturées", len(batch))
 
                     # ÉTAPE 7: Parser pour Remote ID
                     logger.info("🔍 Recherche de Remote ID...")
                     remote_id_found = False
 
-                    for i, frame in enumerate(frames, 1):
-                        try:
-                            # Parser la trame
-                            beacon_info = self.remote_id_decoder.parse_beacon_frame(
-                                frame.frame_data
-                            )
-
-                            if beacon_info:
-                                # Extraire Remote ID
-                                remote_id = self.remote_id_decoder.extract_remote_id(
-                                    beacon_info
-                                )
-
-                                if remote_id and remote_id.uas_id:
-                                    self._display_remote_id(remote_id, frame)
-                                    remote_id_found = True
-                                    self.detection_count += 1
-                                    break
-
-                        except Exception as e:
-                            logger.debug(f"Erreur parsing frame {i}: {e}")
-                            continue
+                    # Seuil RSSI appliqué à tout le lot en une opération
+                    strong = np.flatnonzero(batch.signal_strength > min_rssi_dbm)
+
+                    remote_ids = self._extract_remote_ids(batch, strong)
+
+                    for index, remote_id in zip(strong, remote_ids):
+                        if remote_id and remote_id.uas_id:
+                            self._display_remote_id(remote_id, batch, index)
+                            remote_id_found = True
+                            self.detection_count += 1
+                            break
 
                     if not remote_id_found:
                         logger.warning("Aucun Remote ID trouvé dans les trames")
@@ -181,9 +192,6 @@ class HybridRemoteIDDetector:
                 else:
                     logger.warning("Mode WiFi non disponible - utiliser capture SDR (limitée)")
 
-                # Pause avant prochaine détection
-                time.sleep(0.5)
-
         except KeyboardInterrupt:
             logger.info("\nInterruption par l'utilisateur")
 
@@ -194,50 +202,75 @@ class HybridRemoteIDDetector:
             if wifi_available:
                 self.wifi_capture.disable_monitor_mode()
 
-            logger.info(f"\n📊 Statistiques:")
-            logger.info(f"   Remote IDs détectés: {self.detection_count}")
+            logger.info("\n📊 Statistiques:")
+            logger.info("   Remote IDs détectés: %d", self.detection_count)
+
+    def _extract_remote_ids(self, batch, indices):
+        """
+        Extrait les Remote ID des trames sélectionnées d'un lot
+
+        Args:
+            batch: FrameBatch source
+            indices: Indices des trames à parser
+
+        Returns:
+            Liste (alignée sur indices) de RemoteIDData ou None
+        """
+        # Parsing en lot: un seul buffer + offsets pour toutes les trames.
+        # Seules les trames contenant l'OUI OpenDroneID sont parsées.
+        buf, offsets = batch.concat(indices)
+        beacons = self.remote_id_decoder.parse_beacons_batch(buf, offsets, odid_only=True)
+
+        return [self.remote_id_decoder.extract_remote_id(beacon_info)
+                if beacon_info is not None else None
+                for beacon_info in beacons]
 
-    def _display_remote_id(self, remote_id, frame):
+    def _display_remote_id(self, remote_id, batch, index):
         """
         Affiche les informations Remote ID
 
         Args:
             remote_id: Objet RemoteIDData
-            frame: WiFiFrame source
+            batch: FrameBatch source
+            index: Indice de la trame dans le lot
         """
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
         logger.info("\n" + "="*70)
         logger.info("🎯 REMOTE ID DÉTECTÉ")
         logger.info("="*70)
 
-        logger.info(f"\n📡 Informations Radio:")
-        logger.info(f"   Source MAC: {frame.src_mac}")
-        logger.info(f"   Signal: {frame.signal_strength} dBm")
-        logger.info(f"   Fréquence: {frame.frequency/1e6:.0f} MHz")
+        logger.info("\n📡 Informations Radio:")
+        logger.info("   Source MAC: %s", batch.mac_str(index))
+        logger.info("   Signal: %d dBm", batch.signal_strength[index])
+        logger.info("   Fréquence: %d MHz", batch.frequency[index])
 
-        logger.info(f"\n🆔 Identifiant:")
-        logger.info(f"   UAS ID: {remote_id.uas_id}")
-        logger.info(f"   Type: {remote_id.uas_id_type}")
+        logger.info("\n🆔 Identifiant:")
+        logger.info("   UAS ID: %s", remote_id.uas_id)
+        logger.info("   Type: %s", remote_id.uas_id_type)
 
         if remote_id.latitude and remote_id.longitude:
-            logger.info(f"\n📍 Position Drone:")
-            logger.info(f"   Latitude: {remote_id.latitude:.6f}°")
-            logger.info(f"   Longitude: {remote_id.longitude:.6f}°")
-            logger.info(f"   Altitude MSL: {remote_id.altitude_msl:.1f} m")
-            logger.info(f"   Hauteur AGL: {remote_id.height:.1f} m")
+            logger.info("\n📍 Position Drone:")
+            logger.info("   Latitude: %.6f°", remote_id.latitude)
+            logger.info("   Longitude: %.6f°", remote_id.longitude)
+            logger.info("   Altitude MSL: %.1f m", remote_id.altitude_msl)
+            logger.info("   Hauteur AGL: %.1f m", remote_id.height)
 
         if remote_id.speed is not None:
-            logger.info(f"\n🚁 Vélocité:")
-            logger.info(f"   Vitesse: {remote_id.speed:.1f} m/s ({remote_id.speed*3.6:.1f} km/h)")
-            logger.info(f"   Direction: {remote_id.direction}°")
-            logger.info(f"   Vitesse verticale: {remote_id.vertical_speed:.1f} m/s")
+            logger.info("\n🚁 Vélocité:")
+            logger.info("   Vitesse: %.1f m/s (%.1f km/h)", remote_id.speed, remote_id.speed * 3.6)
+            logger.info("   Direction: %s°", remote_id.direction)
+            logger.info("   Vitesse verticale: %.1f m/s", remote_id.vertical_speed)
 
         if remote_id.operator_latitude and remote_id.operator_longitude:
-            logger.info(f"\n👤 Opérateur:")
-            logger.info(f"   Position: ({remote_id.operator_latitude:.6f}°, {remote_id.operator_longitude:.6f}°)")
+            logger.info("\n👤 Opérateur:")
+            logger.info("   Position: (%.6f°, %.6f°)",
+                        remote_id.operator_latitude, remote_id.operator_longitude)
             if remote_id.operator_id:
-                logger.info(f"   ID: {remote_id.operator_id}")
+                logger.info("   ID: %s", remote_id.operator_id)
 
-        logger.info(f"\n📊 Statut: {remote_id.status}")
+        logger.info("\n📊 Statut: %s", remote_id.status)
         logger.info("="*70 + "\n")
 
 
@@ -11,6 +11,10 @@ Installation requise:
 import logging
 import time
 import argparse
+import queue
+import threading
+
+import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -85,74 +89,132 @@ class WiFiRemoteIDReceiver:
         # Décodeur Remote ID
         self.decoder = WiFiRemoteIDDecoder()
 
-        # MQTT Publisher
+        # MQTT Publisher: connexion unique ouverte ici et réutilisée pour chaque
+        # détection; QoS 0 pour que la publication ne fasse que mettre en file
         self.mqtt_publisher = MQTTPublisher(
             broker_host='localhost',
             broker_port=1883,
-            client_id='gnuradio_remote_id'
+            client_id='gnuradio_remote_id',
+            qos={'detection': 0, 'position': 0, 'alert': 2, 'health': 0}
         )
+        self.mqtt_publisher.connect()
 
         self.detection_count = 0
 
+        # Champs constants des messages de détection (copiés à chaque détection)
+        self._detection_template = {
+            'method': 'gnuradio_gr_ieee802_11',
+            'frequency_hz': self.freq,
+            'gain_db': self.gain
+        }
+
+        # Décodage + publication MQTT hors du thread GNU Radio
+        self._packet_queue = queue.SimpleQueue()
+        self._consumer_thread = threading.Thread(target=self._consume, daemon=True)
+        self._consumer_thread.start()
+
         logger.info(f"\nConfiguration:")
         logger.info(f"  Fréquence: {freq/1e9:.3f} GHz")
         logger.info(f"  Gain: {gain} dB")
         logger.info(f"  Sample rate: {sample_rate/1e6:.1f} MS/s")
 
+    # Nombre maximal de paquets décodés en un seul lot
+    BATCH_SIZE = 32
+
     def packet_callback(self, packet_bytes):
         """
         Callback appelé pour chaque paquet WiFi décodé
 
+        Se contente d'empiler le paquet: le parsing et la publication MQTT
+        sont faits par le thread consommateur pour ne pas bloquer le flowgraph.
+
         Args:
             packet_bytes: Paquet WiFi (bytes)
         """
-        logger.debug(f"Paquet WiFi reçu: {len(packet_bytes)} octets")
+        # Filtre immédiat: trop court pour un beacon, ou Frame Control != Beacon (0x80)
+        if len(packet_bytes) < 36 or packet_bytes[0] != 0x80:
+            return
 
-        # Parser trame Beacon
-        beacon_info = self.decoder.parse_beacon_frame(packet_bytes)
+        self._packet_queue.put_nowait(bytes(packet_bytes))
 
-        if beacon_info is None:
-            logger.debug("Pas une trame Beacon")
-            return
+    def _consume(self):
+        """Thread consommateur: parse les paquets par lots de BATCH_SIZE"""
+        while True:
+            packets = [self._packet_queue.get()]
+            try:
+                while len(packets) < self.BATCH_SIZE:
+                    packets.append(self._packet_queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            try:
+                self._process_packets(packets)
+            except Exception as e:
+                logger.error(f"Erreur traitement paquets: {e}")
+
+    def _process_packets(self, packets):
+        """
+        Parse un lot de paquets et traite les Remote ID trouvés
+
+        Args:
+            packets: Liste de paquets WiFi (bytes)
+        """
+        logger.debug(f"{len(packets)} paquets WiFi reçus")
 
-        logger.info("✓ Trame Beacon détectée")
-
-        # Extraire Remote ID
-        remote_id = self.decoder.extract_remote_id(beacon_info)
-
-        if remote_id and remote_id.uas_id:
-            self.detection_count += 1
-
-            logger.info("\n" + "="*70)
-            logger.info("🎉 REMOTE ID DÉTECTÉ via GNU Radio")
-            logger.info("="*70)
-            logger.info(f"\n🆔 UAS ID: {remote_id.uas_id}")
-            logger.info(f"   Type: {remote_id.uas_id_type}")
-
-            if remote_id.latitude and remote_id.longitude:
-                logger.info(f"\n📍 Position:")
-                logger.info(f"   Lat/Lon: ({remote_id.latitude:.6f}°, {remote_id.longitude:.6f}°)")
-                logger.info(f"   Altitude MSL: {remote_id.altitude_msl:.1f} m")
-                logger.info(f"   Hauteur AGL: {remote_id.height:.1f} m")
-
-            if remote_id.speed is not None:
-                logger.info(f"\n🚁 Mouvement:")
-                logger.info(f"   Vitesse: {remote_id.speed:.1f} m/s ({remote_id.speed*3.6:.1f} km/h)")
-                logger.info(f"   Direction: {remote_id.direction}°")
-
-            logger.info(f"\n📊 Détections totales: {self.detection_count}")
-            logger.info("="*70 + "\n")
-
-            # Publier MQTT
-            if self.mqtt_publisher.connected:
-                detection_data = {
-                    'remote_id': remote_id.to_dict(),
-                    'timestamp': time.time(),
-                    'method': 'gnuradio_gr_ieee802_11',
-                    'frequency_hz': self.freq,
-                    'gain_db': self.gain
-                }
-                self.mqtt_publisher.publish_detection(detection_data)
+        buf = b''.join(packets)
+        offsets = np.zeros(len(packets) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in packets], out=offsets[1:])
+
+        # Seules les trames portant l'OUI OpenDroneID peuvent contenir un Remote ID
+        beacons = self.decoder.parse_beacons_batch(buf, offsets, odid_only=True)
+
+        for beacon_info in beacons:
+            if beacon_info is None:
+                continue
+
+            logger.info("✓ Trame Beacon détectée")
+
+            # Extraire Remote ID
+            remote_id = self.decoder.extract_remote_id(beacon_info)
+
+            if remote_id and remote_id.uas_id:
+                self._handle_remote_id(remote_id)
+
+    def _handle_remote_id(self, remote_id):
+        """
+        Affiche et publie un Remote ID décodé
+
+        Args:
+            remote_id: Objet RemoteIDData
+        """
+        self.detection_count += 1
+
+        logger.info("\n" + "="*70)
+        logger.info("🎉 REMOTE ID DÉTECTÉ via GNU Radio")
+        logger.info("="*70)
+        logger.info(f"\n🆔 UAS ID: {remote_id.uas_id}")
+        logger.info(f"   Type: {remote_id.uas_id_type}")
+
+        if remote_id.latitude and remote_id.longitude:
+            logger.info(f"\n📍 Position:")
+            logger.info(f"   Lat/Lon: ({remote_id.latitude:.6f}°, {remote_id.longitude:.6f}°)")
+            logger.info(f"   Altitude MSL: {remote_id.altitude_msl:.1f} m")
+            logger.info(f"   Hauteur AGL: {remote_id.height:.1f} m")
+
+        if remote_id.speed is not None:
+            logger.info(f"\n🚁 Mouvement:")
+            logger.info(f"   Vitesse: {remote_id.speed:.1f} m/s ({remote_id.speed*3.6:.1f} km/h)")
+            logger.info(f"   Direction: {remote_id.direction}°")
+
+        logger.info(f"\n📊 Détections totales: {self.detection_count}")
+        logger.info("="*70 + "\n")
+
+        # Publier MQTT
+        if self.mqtt_publisher.connected:
+            detection_data = self._detection_template.copy()
+            detection_data['remote_id'] = remote_id.to_dict()
+            detection_data['timestamp'] = time.time()
+            self.mqtt_publisher.publish_detection(detection_data)
 
     def start(self):
         """Démarre la réception"""
@@ -5,33 +5,86 @@ Orchestration de tous les modules pour la détection en temps réel
 """
 
 import logging
+import logging.config
+import logging.handlers
 import argparse
+import atexit
 import yaml
 import time
 import signal
 import sys
+import queue
+import threading
+import collections
+import concurrent.futures
+import copy
+import functools
+import math
+import os
+import numpy as np
+from scipy.fft import next_fast_len
 from pathlib import Path
 
 from src.uhd_acquisition import UHDAcquisition
 from src.preprocessing import SignalPreprocessor
 from src.spectrogram import SpectralAnalyzer
+from src.wifi_detector import CHAN_FREQ_MHZ
 from src.remote_id_decoder import WiFiRemoteIDDecoder
 from src.data_fusion import DataFusion
 from src.mqtt_publisher import MQTTPublisher
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('drone_detection.log')
-    ]
-)
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Format commun des journaux (configurés dans DroneDetectionSystem._configure_logging)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=8)
+def _load_yaml_cached(config_path: str, mtime_ns: int) -> dict:
+    """
+    Parse un fichier YAML (mis en cache tant que le fichier n'est pas modifié)
+
+    Si msgpack est disponible, une copie du dictionnaire est aussi conservée
+    sur disque (<fichier>.yaml.mpk): les lancements suivants évitent le parsing.
+
+    Args:
+        config_path: Chemin du fichier de configuration
+        mtime_ns: Date de modification du fichier (clé d'invalidation)
+
+    Returns:
+        Dictionnaire de configuration
+    """
+    cache_path = Path(config_path).with_suffix('.yaml.mpk')
+
+    if msgpack is not None:
+        try:
+            if cache_path.stat().st_mtime_ns >= mtime_ns:
+                return msgpack.unpackb(cache_path.read_bytes(), raw=False, strict_map_key=False)
+        except (OSError, ValueError, msgpack.UnpackException):
+            pass
+
+    with open(config_path, 'r') as f:
+        config = yaml.load(f, Loader=YamlLoader)
+
+    if msgpack is not None:
+        try:
+            cache_path.write_bytes(msgpack.packb(config))
+        except (OSError, TypeError) as e:
+            logger.debug("Cache de configuration non écrit: %s", e)
+
+    return config
+
+
 class DroneDetectionSystem:
     """
     Système complet de détection et identification de drones
@@ -44,13 +97,16 @@ class DroneDetectionSystem:
         Args:
             config_path: Chemin vers le fichier de configuration
         """
+        # Chargement de la configuration puis du logging (qui en dépend): les
+        # messages de démarrage ne sont émis qu'une fois console + fichier en place
+        self._log_listener = None
+        self.config, config_found = self._read_config(config_path)
+        self._configure_logging()
+
         logger.info("="*70)
         logger.info("Initialisation du Système de Détection de Drones")
         logger.info("="*70)
-
-        # Chargement de la configuration
-        self.config = self.load_config(config_path)
-        self._configure_logging()
+        self._log_config_source(config_path, config_found)
 
         # Initialisation des modules
         self.acquisition = None
@@ -63,6 +119,35 @@ class DroneDetectionSystem:
         # État du système
         self.running = False
         self.detection_count = 0
+        self._dropped_frames = 0
+
+        # Pipeline acquisition -> DSP -> publication (files bornées)
+        self._raw_q = queue.Queue(maxsize=2)
+        self._det_q = queue.Queue(maxsize=4)
+        self._workers = []
+
+        # Buffers d'échantillons préalloués, remplis à tour de rôle par l'acquisition:
+        # blocs en file + bloc en cours de DSP + bloc en réception
+        self._sample_bufs = []
+        self._buf_idx = 0
+
+        # Lots de blocs traités ensemble par l'étage DSP (alloués dans start())
+        self._dsp_batch = None
+        self._dsp_processed = None
+
+        # Décalages (Hz, par rapport à rx_freq) des canaux WiFi 1-13, calculés dans start()
+        self._wifi_channel_offsets = None
+
+        # Dernières publications par UAS ID (LRU): uas_id -> (t, lat, lon, niveau de menace)
+        self._recent_publishes = collections.OrderedDict()
+
+        # Détections en attente de publication MQTT groupée
+        self._pub_buf = collections.deque()
+        self._pub_lock = threading.Lock()
+
+        # Entrées/sorties lentes (heartbeat MQTT, affichage) sur un thread dédié;
+        # un seul worker: l'ordre des résumés est conservé
+        self._io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='io')
 
         self._initialize_modules()
 
@@ -76,15 +161,41 @@ class DroneDetectionSystem:
         Returns:
             Dictionnaire de configuration
         """
+        config, found = self._read_config(config_path)
+        self._log_config_source(config_path, found)
+        return config
+
+    def _read_config(self, config_path: str) -> tuple:
+        """
+        Lit la configuration YAML sans journaliser
+
+        Args:
+            config_path: Chemin du fichier de configuration
+
+        Returns:
+            Tuple (configuration, True si le fichier a été trouvé)
+        """
         try:
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-            logger.info(f"Configuration chargée: {config_path}")
-            return config
+            mtime_ns = os.stat(config_path).st_mtime_ns
+            # Copie: l'appelant peut modifier sa configuration sans altérer le cache
+            return copy.deepcopy(_load_yaml_cached(config_path, mtime_ns)), True
         except FileNotFoundError:
+            return self._default_config(), False
+
+    @staticmethod
+    def _log_config_source(config_path: str, found: bool):
+        """
+        Journalise l'origine de la configuration
+
+        Args:
+            config_path: Chemin du fichier de configuration
+            found: True si le fichier a été trouvé
+        """
+        if found:
+            logger.info(f"Configuration chargée: {config_path}")
+        else:
             logger.warning(f"Fichier de configuration non trouvé: {config_path}")
             logger.info("Utilisation de la configuration par défaut")
-            return self._default_config()
 
     def _default_config(self) -> dict:
         """
@@ -149,17 +260,47 @@ class DroneDetectionSystem:
         }
 
     def _configure_logging(self):
-        lvl = str(self.config.get('system', {}).get('log_level', 'INFO')).upper()
-        level = getattr(logging, lvl, logging.INFO)
-        log_file = self.config.get('system', {}).get('log_file', 'drone_detection.log')
-        root = logging.getLogger()
-        for h in list(root.handlers):
-            root.removeHandler(h)
-        handlers = [logging.StreamHandler(), logging.FileHandler(log_file)]
-        logging.basicConfig(level=level,
-                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                            handlers=handlers)
-        logging.getLogger().setLevel(level)
+        """
+        Configure le logging en une seule passe (dictConfig) depuis config['system']
+
+        La racine ne reçoit qu'un QueueHandler: les écritures console/fichier
+        (fichier tournant, 10 Mo x 5) sont faites par le thread du QueueListener.
+        """
+        system_config = self.config.get('system', {})
+        level = str(system_config.get('log_level', 'INFO')).upper()
+        if not isinstance(logging.getLevelName(level), int):
+            level = 'INFO'
+        log_file = system_config.get('log_file', 'drone_detection.log')
+
+        log_queue = queue.SimpleQueue()
+        logging.config.dictConfig({
+            'version': 1,
+            'disable_existing_loggers': False,
+            'handlers': {
+                'queue': {
+                    '()': logging.handlers.QueueHandler,
+                    'queue': log_queue
+                }
+            },
+            'root': {
+                'level': level,
+                'handlers': ['queue']
+            }
+        })
+
+        # Créés après dictConfig, qui ferme les handlers existants
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [
+            logging.StreamHandler(),
+            logging.handlers.RotatingFileHandler(log_file, maxBytes=10_000_000, backupCount=5)
+        ]
+        for h in handlers:
+            h.setFormatter(formatter)
+
+        self._log_listener = logging.handlers.QueueListener(log_queue, *handlers,
+                                                            respect_handler_level=True)
+        self._log_listener.start()
+        atexit.register(self._stop_log_listener)
 
     def _initialize_modules(self):
         """
@@ -170,6 +311,18 @@ class DroneDetectionSystem:
         # Module 1: Acquisition RF
         logger.info("1. Initialisation de l'acquisition RF...")
         acq_config = self.config['acquisition']
+
+        # Taille de bloc ajustée pour les FFT (longueur à petits facteurs premiers,
+        # ou puissance de 2 inférieure si prefer_radix2)
+        num_samples = int(acq_config['num_samples'])
+        if acq_config.get('prefer_radix2', False):
+            fast_len = 2 ** int(math.log2(num_samples))
+        else:
+            fast_len = next_fast_len(num_samples, real=False)
+        if fast_len != num_samples:
+            logger.info("num_samples ajusté pour les FFT: %d -> %d", num_samples, fast_len)
+        acq_config['num_samples'] = fast_len
+
         self.acquisition = UHDAcquisition(
             device_args=acq_config['device_args'],
             sample_rate=acq_config['sample_rate'],
@@ -180,14 +333,27 @@ class DroneDetectionSystem:
 
         # Module 2: Prétraitement
         logger.info("2. Initialisation du prétraitement...")
+        # Bornes du passe-bande bornées à Nyquist, puis filtre conçu une seule fois
+        preproc_config = self.config['preprocessing']
+        nyq = acq_config['sample_rate'] / 2.0
+        bp_low = max(0.0, float(preproc_config['bandpass_low']))
+        bp_high = min(float(preproc_config['bandpass_high']), nyq * 0.9)
+        if bp_low >= bp_high:
+            bp_low = 0.1 * nyq
+            bp_high = 0.9 * nyq
+        self._bandpass_range = (bp_low, bp_high)
+
         self.preprocessor = SignalPreprocessor(
-            sample_rate=acq_config['sample_rate']
+            sample_rate=acq_config['sample_rate'],
+            bandpass_range=self._bandpass_range
         )
 
         # Module 3: Analyse spectrale
         logger.info("3. Initialisation de l'analyse spectrale...")
         self.analyzer = SpectralAnalyzer(
-            sample_rate=acq_config['sample_rate']
+            sample_rate=acq_config['sample_rate'],
+            expected_block_size=acq_config['num_samples'],
+            threads=os.cpu_count()
         )
 
         # Module 4B: Décodeur Remote ID
@@ -212,7 +378,8 @@ class DroneDetectionSystem:
             use_tls=mqtt_config.get('use_tls', False),
             topics=mqtt_config.get('topics'),
             qos=mqtt_config.get('qos'),
-            retain=mqtt_config.get('retain', False)
+            retain=mqtt_config.get('retain', False),
+            quantize=mqtt_config.get('quantize_detection', False)
         )
 
         logger.info("\n✓ Tous les modules initialisés avec succès")
@@ -225,11 +392,11 @@ class DroneDetectionSystem:
         logger.info("DÉMARRAGE DU SYSTÈME DE DÉTECTION")
         logger.info("="*70 + "\n")
 
-        # Connexion MQTT
+        # Connexion MQTT en arrière-plan: l'initialisation USRP et l'acquisition
+        # démarrent pendant l'échange avec le broker
         logger.info("Connexion au broker MQTT...")
-        if not self.mqtt_publisher.connect():
-            logger.error("Impossible de se connecter au broker MQTT")
-            logger.warning("Le système continuera sans publication MQTT")
+        if not self.mqtt_publisher.connect(wait=False):
+            logger.info("Connexion MQTT en cours (publication dès que le broker répond)")
 
         # Initialisation USRP
         logger.info("Initialisation du périphérique USRP...")
@@ -238,168 +405,485 @@ class DroneDetectionSystem:
             logger.error("Vérifiez que le LibreSDR B210mini est connecté")
             return
 
+        # Le pipeline n'est parallèle que si la réception UHD relâche le GIL
+        if not self.acquisition.check_gil_release(num_samples=self.config['acquisition']['num_samples']):
+            logger.warning("La réception UHD garde le GIL: acquisition et DSP seront sérialisés")
+
         # Configuration de l'arrêt propre
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
 
-        # Démarrage de la boucle de détection
+        # Démarrage du pipeline de détection
+        num_samples = self.config['acquisition']['num_samples']
+        self._sample_bufs = [np.empty(num_samples, dtype=np.complex64)
+                             for _ in range(self._raw_q.maxsize + 2)]
+        self._buf_idx = 0
+
+        self._dsp_batch = np.empty((self.DSP_BATCH_SIZE, num_samples), dtype=np.complex64)
+        self._dsp_processed = np.empty_like(self._dsp_batch)
+
+        self._wifi_channel_offsets = (CHAN_FREQ_MHZ[1:14].astype(np.float64) * 1e6
+                                      - self.config['acquisition']['rx_freq_2g4'])
+
         self.running = True
         logger.info("\n🚀 Système de détection actif - Appuyez sur Ctrl+C pour arrêter\n")
 
-        self._detection_loop()
-
-    def _detection_loop(self):
+        self._workers = [
+            threading.Thread(target=self._acq_worker, name="acquisition", daemon=True),
+            threading.Thread(target=self._dsp_worker, name="dsp", daemon=True),
+            threading.Thread(target=self._pub_worker, name="publication", daemon=True),
+            threading.Thread(target=self._mqtt_flush_loop, name="mqtt_flush", daemon=True),
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        # Le thread principal reste disponible pour les signaux (Ctrl+C)
+        for worker in self._workers:
+            while worker.is_alive():
+                worker.join(timeout=0.5)
+
+    def _acq_worker(self):
         """
-        Boucle principale de détection
+        Étage 1: acquisition RF en continu vers la file _raw_q
+
+        Si l'étage DSP prend du retard, le bloc le plus ancien est abandonné
+        pour ne pas ralentir l'acquisition. Les blocs dont l'énergie brute reste
+        sous le plancher de bruit (+ marge) ne sont pas transmis au DSP.
         """
-        last_heartbeat = time.time()
-        heartbeat_interval = self.config['system']['heartbeat_interval']
-        detection_threshold = self.config['system']['detection_threshold_snr']
+        num_samples = self.config['acquisition']['num_samples']
+        gate_margin_db = float(self.config['system'].get('energy_gate_margin_db', 3.0))
 
-        acq_config = self.config['acquisition']
-        preproc_config = self.config['preprocessing']
+        # Durée d'un bloc: on ne dort que le temps restant pour tenir cette cadence
+        block_duration = num_samples / self.config['acquisition']['sample_rate']
 
         while self.running:
-            try:
-                # Heartbeat
-                if time.time() - last_heartbeat > heartbeat_interval:
-                    self.mqtt_publisher.publish_heartbeat()
-                    logger.info(f"📊 Statistiques: {self.detection_count} détections")
-                    last_heartbeat = time.time()
+            t0 = time.monotonic()
 
+            try:
                 # Acquisition de données
                 logger.debug("Acquisition d'échantillons RF...")
                 samples = self.acquisition.acquire_samples(
-                    num_samples=acq_config['num_samples'],
-                    channel=0  # Canal 2.4 GHz
+                    num_samples=num_samples,
+                    channel=0,  # Canal 2.4 GHz
+                    out=self._sample_bufs[self._buf_idx]
                 )
+                self._buf_idx = (self._buf_idx + 1) % len(self._sample_bufs)
+
+                # Le pipeline DSP travaille en simple précision
+                if samples is not None and samples.dtype != np.complex64:
+                    samples = samples.astype(np.complex64, copy=False)
 
                 if samples is None:
-                    logger.warning("Échec de l'acquisition, nouvelle tentative...")
-                    time.sleep(0.1)
-                    continue
+                    if self.running:
+                        logger.warning("Échec de l'acquisition, nouvelle tentative...")
+                elif self.preprocessor.passes_energy_gate(samples, gate_margin_db):
+                    try:
+                        self._raw_q.put_nowait(samples)
+                    except queue.Full:
+                        # Le plus récent gagne: latence bornée plutôt qu'un retard cumulé
+                        try:
+                            self._raw_q.get_nowait()
+                            self._dropped_frames += 1
+                            logger.debug("DSP en retard, bloc d'échantillons abandonné")
+                        except queue.Empty:
+                            pass
+                        self._raw_q.put_nowait(samples)
 
-                # Prétraitement
-                logger.debug("Prétraitement du signal...")
-                nyq = acq_config['sample_rate'] / 2.0
-                bp_low = max(0.0, float(preproc_config['bandpass_low']))
-                bp_high = min(float(preproc_config['bandpass_high']), nyq * 0.9)
-                if bp_low >= bp_high:
-                    bp_low = 0.1 * nyq
-                    bp_high = 0.9 * nyq
-                processed = self.preprocessor.process(
-                    samples,
-                    enable_dc_removal=preproc_config['enable_dc_removal'],
-                    enable_iq_correction=preproc_config['enable_iq_correction'],
-                    bandpass_range=(bp_low, bp_high),
-                    normalize_method=preproc_config['normalize_method']
-                )
+            except Exception as e:
+                logger.error("Erreur dans l'acquisition: %s", e, exc_info=True)
+                time.sleep(1)
 
-                # Calcul du SNR
-                snr = self.preprocessor.compute_snr(processed)
+            remaining = block_duration - (time.monotonic() - t0)
+            if remaining > 0 and self.running:
+                time.sleep(remaining)
 
-                # Vérification du seuil de détection
-                if snr < detection_threshold:
-                    logger.debug(f"SNR trop faible: {snr:.1f} dB < {detection_threshold} dB")
-                    time.sleep(0.1)
-                    continue
+    # Nombre maximal de blocs traités ensemble par l'étage DSP
+    DSP_BATCH_SIZE = 8
 
-                logger.info(f"🎯 Signal détecté! SNR: {snr:.1f} dB")
+    def _dsp_worker(self):
+        """
+        Étage 2: prétraitement, SNR, analyse, Remote ID et fusion
 
-                # Analyse spectrale
-                logger.debug("Analyse spectrale...")
-                features = self.analyzer.analyze_signal(processed, compute_spectrogram=False)
-                features['snr'] = snr
-                features['sample_rate'] = acq_config['sample_rate']
+        Les blocs disponibles dans _raw_q (jusqu'à DSP_BATCH_SIZE) sont traités
+        en un seul lot.
+        """
+        detection_threshold = self.config['system']['detection_threshold_snr']
 
-                # Décodage Remote ID
-                logger.debug("Tentative de décodage Remote ID...")
-                remote_id_data = None
+        # Paramètres constants, résolus une seule fois hors de la boucle
+        acq_config = self.config['acquisition']
+        preproc_config = self.config['preprocessing']
+        sample_rate = acq_config['sample_rate']
+        rx_freq = acq_config['rx_freq_2g4']
+        enable_dc = preproc_config['enable_dc_removal']
+        enable_iq = preproc_config['enable_iq_correction']
+        normalize_method = preproc_config['normalize_method']
+
+        preprocess_kwargs = {
+            'enable_dc_removal': enable_dc,
+            'enable_iq_correction': enable_iq,
+            'normalize_method': normalize_method
+        }
+
+        num_samples = acq_config['num_samples']
+        batch = self._dsp_batch
+        batch_size = batch.shape[0]
+
+        while self.running:
+            try:
+                samples = self._raw_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            # Lot: le bloc reçu + ceux déjà en attente (sans bloquer), copiés
+            # dans le tableau (B, N) préalloué pour libérer les slots d'acquisition
+            count = 0
+            while samples is not None:
+                if len(samples) == num_samples:
+                    batch[count] = samples
+                    count += 1
+                else:
+                    logger.debug("Bloc incomplet ignoré: %d/%d échantillons",
+                                 len(samples), num_samples)
+                if count == batch_size:
+                    break
+                try:
+                    samples = self._raw_q.get_nowait()
+                except queue.Empty:
+                    break
+
+            try:
+                if count:
+                    self._process_batch(batch[:count], detection_threshold,
+                                        preprocess_kwargs, sample_rate, rx_freq)
+
+            except Exception as e:
+                logger.error("Erreur dans la boucle de détection: %s", e, exc_info=True)
+                time.sleep(1)
+
+            # Sentinelle d'arrêt reçue pendant la constitution du lot
+            if samples is None:
+                break
+
+    def _process_batch(self, batch, detection_threshold, preprocess_kwargs,
+                       sample_rate, rx_freq):
+        """
+        Prétraitement, SNR vectorisé, puis analyse/décodage/fusion des blocs retenus
+
+        Args:
+            batch: Tableau (B, N) complex64 des blocs bruts
+            detection_threshold: Seuil de SNR (dB)
+            preprocess_kwargs: Paramètres de SignalPreprocessor.process
+            sample_rate: Taux d'échantillonnage (Hz)
+            rx_freq: Fréquence centrale RX (Hz)
+        """
+        # Prétraitement
+        logger.debug("Prétraitement de %d blocs...", len(batch))
+        processed_batch = self.preprocessor.process_batch(
+            batch, out=self._dsp_processed[:len(batch)], **preprocess_kwargs
+        )
+
+        # Calcul du SNR sur tout le lot, puis seuil de détection
+        snrs = self.preprocessor.compute_snr_batch(processed_batch)
+        detected = np.flatnonzero(snrs >= detection_threshold)
+
+        if len(detected) < len(snrs):
+            logger.debug("%d blocs sous le seuil de %s dB",
+                         len(snrs) - len(detected), detection_threshold)
+        if not len(detected):
+            return
+
+        # Analyse spectrale des seuls blocs au-dessus du seuil
+        logger.debug("Analyse spectrale...")
+        features_list = self.analyzer.analyze_batch(processed_batch[detected])
+
+        for index, features in zip(detected, features_list):
+            processed = processed_batch[index]
+            snr = float(snrs[index])
+
+            logger.info("🎯 Signal détecté! SNR: %.1f dB", snr)
+
+            features['snr'] = snr
+            features['sample_rate'] = sample_rate
+
+            # Décodage Remote ID
+            logger.debug("Tentative de décodage Remote ID...")
+            remote_id_data = None
+            remote_id = None
+            if self._is_wifi_candidate(features):
                 remote_id = self.remote_id_decoder.detect_and_decode_remote_id(processed)
-                if remote_id:
-                    remote_id_data = remote_id.to_dict()
-                    logger.info(f"📡 Remote ID décodé: {remote_id.uas_id}")
-
-                # Création d'une classification simple basée sur Remote ID
-                classification = {
-                    'brand': 'Unknown',
-                    'model': 'Unknown',
-                    'protocol': 'Unknown',
-                    'confidence': 0.0,
-                    'method': 'remote_id_only',
-                    'is_valid': remote_id is not None
-                }
+            else:
+                logger.debug("Signature spectrale non WiFi, décodage Remote ID ignoré")
+            if remote_id:
+                remote_id_data = remote_id.to_dict()
+                logger.info("📡 Remote ID décodé: %s", remote_id.uas_id)
+
+            # Création d'une classification simple basée sur Remote ID
+            classification = {
+                'brand': 'Unknown',
+                'model': 'Unknown',
+                'protocol': 'Unknown',
+                'confidence': 0.0,
+                'method': 'remote_id_only',
+                'is_valid': remote_id is not None
+            }
 
-                # Fusion des données
-                logger.debug("Fusion des données...")
-                fused_data = self.fusion.fuse_detection_data(
-                    features,
-                    classification,
-                    remote_id_data,
-                    center_freq=acq_config['rx_freq_2g4']
-                )
+            # Fusion des données
+            logger.debug("Fusion des données...")
+            fused_data = self.fusion.fuse_detection_data(
+                features,
+                classification,
+                remote_id_data,
+                center_freq=rx_freq
+            )
+
+            # Transmission à l'étage de publication
+            while self.running:
+                try:
+                    self._det_q.put(fused_data, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
 
-                # Publication MQTT
-                if self.mqtt_publisher.connected:
-                    logger.debug("Publication MQTT...")
-                    self.mqtt_publisher.publish_detection(fused_data)
+    # Bande passante (MHz) acceptée pour un signal WiFi 20 MHz (beacon Remote ID)
+    WIFI_BANDWIDTH_MHZ = (15.0, 25.0)
 
-                # Affichage du résumé
-                self._display_detection_summary(fused_data)
+    def _is_wifi_candidate(self, features: dict) -> bool:
+        """
+        Indique si les features spectrales sont compatibles avec un beacon WiFi
 
-                self.detection_count += 1
+        Args:
+            features: Résultat de SpectralAnalyzer.analyze_signal
+
+        Returns:
+            True si le signal occupe ~20 MHz et que son pic tombe dans un canal WiFi 2.4 GHz
+        """
+        spectral = features['spectral_features']
+
+        bw_low, bw_high = self.WIFI_BANDWIDTH_MHZ
+        if not bw_low <= spectral['bandwidth'] / 1e6 <= bw_high:
+            return False
+
+        # Le pic doit se trouver dans la bande ±10 MHz d'un canal WiFi
+        peak_offset = spectral['center_frequency']
+        return bool(np.min(np.abs(self._wifi_channel_offsets - peak_offset)) <= 10e6)
+
+    def _pub_worker(self):
+        """
+        Étage 3: publication MQTT, affichage et heartbeat
+        """
+        last_heartbeat = time.monotonic()
+        heartbeat_interval = self.config['system']['heartbeat_interval']
 
-                # Petite pause pour éviter la saturation
-                time.sleep(0.1)
+        while self.running:
+            try:
+                # Heartbeat
+                if time.monotonic() - last_heartbeat > heartbeat_interval:
+                    self._io_pool.submit(self._publish_heartbeat, self.detection_count,
+                                         self._dropped_frames, self.preprocessor.gated_blocks)
+                    last_heartbeat = time.monotonic()
+
+                try:
+                    fused_data = self._det_q.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                if fused_data is None:
+                    break
+
+                # Publication MQTT (groupée par _mqtt_flush_loop), sauf répétition
+                # récente du même Remote ID
+                if self.mqtt_publisher.connected and not self._is_duplicate_publish(fused_data):
+                    with self._pub_lock:
+                        self._pub_buf.append(fused_data)
+
+                # Affichage du résumé (thread d'E/S)
+                self._io_pool.submit(self._display_detection_summary, fused_data,
+                                     self.detection_count + 1)
+
+                self.detection_count += 1
 
             except Exception as e:
-                logger.error(f"Erreur dans la boucle de détection: {e}", exc_info=True)
+                logger.error("Erreur dans la publication: %s", e, exc_info=True)
                 time.sleep(1)
 
-    def _display_detection_summary(self, detection_data: dict):
+    # Déduplication des publications Remote ID
+    DEDUP_WINDOW_S = 1.0
+    DEDUP_POSITION_EPS_DEG = 1e-5
+    DEDUP_MAX_ENTRIES = 1024
+
+    def _is_duplicate_publish(self, detection_data: dict) -> bool:
+        """
+        Indique si une détection répète un Remote ID publié il y a moins de DEDUP_WINDOW_S
+
+        Un drone émet ~1 beacon/s: tant que la position et le niveau de menace
+        n'ont pas changé, inutile de republier chaque décodage. Les détections
+        sans UAS ID sont toujours publiées.
+
+        Args:
+            detection_data: Données de détection fusionnées
+
+        Returns:
+            True si la publication peut être omise
+        """
+        rid = detection_data.get('remote_id') or {}
+        uas_id = rid.get('uas_id')
+        if not uas_id:
+            return False
+
+        pos = rid.get('position') or {}
+        lat = pos.get('latitude')
+        lon = pos.get('longitude')
+        level = detection_data.get('threat_assessment', {}).get('level')
+        now = time.monotonic()
+
+        recent = self._recent_publishes
+        prev = recent.get(uas_id)
+        if prev is not None:
+            prev_t, prev_lat, prev_lon, prev_level = prev
+            same_position = (lat == prev_lat and lon == prev_lon) or (
+                lat is not None and lon is not None
+                and prev_lat is not None and prev_lon is not None
+                and abs(lat - prev_lat) < self.DEDUP_POSITION_EPS_DEG
+                and abs(lon - prev_lon) < self.DEDUP_POSITION_EPS_DEG)
+            if now - prev_t < self.DEDUP_WINDOW_S and same_position and level == prev_level:
+                # L'horodatage reste celui de la dernière publication: un drone
+                # immobile est republié une fois par fenêtre
+                recent.move_to_end(uas_id)
+                return True
+
+        recent[uas_id] = (now, lat, lon, level)
+        recent.move_to_end(uas_id)
+        if len(recent) > self.DEDUP_MAX_ENTRIES:
+            recent.popitem(last=False)
+
+        return False
+
+    def _publish_heartbeat(self, detection_count: int, dropped_frames: int, gated_blocks: int):
+        """
+        Publie le heartbeat MQTT et journalise les statistiques (thread d'E/S)
+
+        Args:
+            detection_count: Nombre de détections au moment du heartbeat
+            dropped_frames: Nombre de blocs abandonnés au moment du heartbeat
+            gated_blocks: Nombre de blocs écartés par le détecteur d'énergie
+        """
+        self.mqtt_publisher.publish_heartbeat({
+            'detection_count': detection_count,
+            'dropped_frames': dropped_frames,
+            'gated_blocks': gated_blocks
+        })
+        logger.info("📊 Statistiques: %d détections, %d blocs abandonnés, %d blocs sous le bruit",
+                    detection_count, dropped_frames, gated_blocks)
+
+    def _mqtt_flush_loop(self):
+        """
+        Publie périodiquement les détections accumulées, par lots de 32 au plus
+        """
+        flush_interval = max(0.05, self.config['system']['heartbeat_interval'] / 1000.0)
+
+        while self.running:
+            time.sleep(flush_interval)
+            self._flush_detections()
+
+        # Dernières détections avant l'arrêt
+        self._flush_detections()
+
+    def _flush_detections(self, max_items: int = 32):
+        """
+        Vide le tampon de publication en messages MQTT groupés
+
+        Args:
+            max_items: Nombre maximal de détections par message
+        """
+        while True:
+            with self._pub_lock:
+                batch = [self._pub_buf.popleft()
+                         for _ in range(min(max_items, len(self._pub_buf)))]
+
+            if not batch:
+                return
+
+            if self.mqtt_publisher.connected:
+                logger.debug("Publication MQTT...")
+                self.mqtt_publisher.publish_detection_batch(batch)
+
+    @staticmethod
+    def _send_sentinel(q: queue.Queue):
+        """
+        Vide une file et y dépose la sentinelle d'arrêt (None)
+
+        Args:
+            q: File du pipeline
+        """
+        try:
+            while True:
+                q.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            q.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def _display_detection_summary(self, detection_data: dict, detection_number: int):
         """
         Affiche un résumé de la détection
 
         Args:
             detection_data: Données de détection fusionnées
+            detection_number: Numéro de la détection (figé à la soumission,
+                              detection_count évolue pendant l'affichage différé)
         """
-        logger.info("\n" + "="*70)
-        logger.info("DÉTECTION #{}".format(self.detection_count + 1))
-        logger.info("="*70)
+        if not logger.isEnabledFor(logging.INFO):
+            return
 
-        # Information de détection
+        # Sous-dictionnaires résolus une seule fois
         cls = detection_data['classification']
-        if cls.get('brand') != 'Unknown' or cls.get('model') != 'Unknown':
-            logger.info(f"Type: {cls['brand']} {cls.get('model', 'Unknown')}")
-            logger.info(f"Protocole: {cls['protocol']}")
-            logger.info(f"Confiance: {cls['confidence']:.1%}")
+        det = detection_data['detection']
+        meta = detection_data['metadata']
+        rid = detection_data.get('remote_id') or {}
+        threat = detection_data['threat_assessment']
+        brand = cls.get('brand', 'Unknown')
+        model = cls.get('model', 'Unknown')
+
+        separator = "=" * 70
+        lines = ["", separator, "DÉTECTION #%d" % detection_number, separator]
+
+        # Information de détection
+        if brand != 'Unknown' or model != 'Unknown':
+            lines += ["Type: %s %s" % (brand, model),
+                      "Protocole: %s" % cls['protocol'],
+                      "Confiance: %.1f%%" % (cls['confidence'] * 100)]
         else:
-            logger.info(f"Type: Détection basée sur Remote ID uniquement")
+            lines.append("Type: Détection basée sur Remote ID uniquement")
 
         # Détection RF
-        det = detection_data['detection']
-        logger.info(f"Fréquence: {det['frequency_mhz']:.1f} MHz")
-        logger.info(f"Bande passante: {det['bandwidth_mhz']:.1f} MHz")
-        logger.info(f"SNR: {det['snr']:.1f} dB")
-        logger.info(f"RSSI: {det['rssi_dbm']:.1f} dBm")
+        lines += ["Fréquence: %.1f MHz" % det['frequency_mhz'],
+                  "Bande passante: %.1f MHz" % det['bandwidth_mhz'],
+                  "SNR: %.1f dB" % det['snr'],
+                  "RSSI: %.1f dBm" % det['rssi_dbm']]
 
         # Remote ID
-        if detection_data['metadata']['has_position']:
-            pos = detection_data['remote_id']['position']
-            logger.info(f"\n📍 Position: ({pos['latitude']:.6f}°, {pos['longitude']:.6f}°)")
-            logger.info(f"   Altitude: {pos['altitude_agl']:.1f} m AGL")
+        if meta['has_position']:
+            pos = rid['position']
+            lines += ["",
+                      "📍 Position: (%.6f°, %.6f°)" % (pos['latitude'], pos['longitude']),
+                      "   Altitude: %.1f m AGL" % pos['altitude_agl']]
 
-            if detection_data['metadata']['has_operator_info']:
-                op = detection_data['remote_id']['operator']
-                logger.info(f"👤 Opérateur: {op.get('id', 'N/A')}")
-                logger.info(f"   Distance: {op.get('distance_to_uas_m', 0):.0f} m")
+            if meta['has_operator_info']:
+                op = rid['operator']
+                lines += ["👤 Opérateur: %s" % op.get('id', 'N/A'),
+                          "   Distance: %.0f m" % op.get('distance_to_uas_m', 0)]
 
         # Menace
-        threat = detection_data['threat_assessment']
-        logger.info(f"\n⚠️  Niveau de menace: {threat['level']}")
-        logger.info(f"   Raisons: {', '.join(threat['reasons'])}")
+        lines += ["",
+                  "⚠️  Niveau de menace: %s" % threat['level'],
+                  "   Raisons: %s" % ', '.join(threat['reasons']),
+                  separator,
+                  ""]
 
-        logger.info("="*70 + "\n")
+        # Un seul enregistrement: un seul passage par les handlers
+        logger.info("\n".join(lines))
 
     def _signal_handler(self, signum, frame):
         """
@@ -418,6 +902,16 @@ class DroneDetectionSystem:
 
         self.running = False
 
+        # Arrêt du pipeline
+        self._send_sentinel(self._raw_q)
+        self._send_sentinel(self._det_q)
+        for worker in self._workers:
+            if worker is not threading.current_thread():
+                worker.join(timeout=5.0)
+
+        # Derniers résumés et heartbeat en attente
+        self._io_pool.shutdown(wait=True)
+
         # Arrêt de l'acquisition
         if self.acquisition:
             logger.info("Fermeture de l'acquisition RF...")
@@ -434,6 +928,16 @@ class DroneDetectionSystem:
         logger.info("\n✓ Système arrêté proprement")
         logger.info("="*70 + "\n")
 
+        self._stop_log_listener()
+
+    def _stop_log_listener(self):
+        """
+        Vide la file de logs et arrête le thread d'écriture
+        """
+        if self._log_listener is not None:
+            self._log_listener.stop()
+            self._log_listener = None
+
 
 def main():
     """
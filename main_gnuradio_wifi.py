@@ -4,25 +4,219 @@ Main GNU Radio WiFi Remote ID
 Système complet avec gr-ieee802-11 pour démodulation WiFi robuste
 """
 
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import time
 import signal
 import sys
 import threading
-from queue import Queue
+from collections import deque
 import argparse
-
+import re
+
+import numpy as np
+
+# Optionnel: recherche multi-motifs Hyperscan (repli sur bytes.find sinon)
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:
+    HAS_HYPERSCAN = False
+
+# pmt est fourni avec GNU Radio; son absence est signalée par _check_dependencies
+try:
+    import pmt
+except ImportError:
+    pmt = None
+
+# Les threads émetteurs ne font que déposer les records dans une file;
+# la console et le fichier sont écrits par le thread du QueueListener.
+# Le message est formaté par le QueueHandler (format de basicConfig), les
+# handlers du listener l'écrivent tel quel.
+_log_queue = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('drone_detection_gnuradio.log')
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
+)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.StreamHandler(),
+    logging.FileHandler('drone_detection_gnuradio.log')
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 logger = logging.getLogger(__name__)
 
+# Niveau DEBUG actif: mis en cache pour les chemins exécutés à chaque PDU
+# (recalculé par _refresh_debug_flag() quand le niveau de log change)
+_DBG = logger.isEnabledFor(logging.DEBUG)
+
+
+def _refresh_debug_flag():
+    """Met à jour le cache _DBG après un changement de niveau de log"""
+    global _DBG
+    _DBG = logger.isEnabledFor(logging.DEBUG)
+
+# Taille max des buffers entre blocs (en items): des buffers courts gardent
+# producteur et consommateur dans le même niveau de cache et réduisent la
+# profondeur du pipeline (latence de détection)
+FRONTEND_MAX_BUFFER = 4096    # échantillons complexes (corrélation, sync)
+OFDM_MAX_BUFFER = 32          # vecteurs de 64 sous-porteuses (après stream_to_vector)
+MAX_NOUTPUT_ITEMS = 4096
+
+# Transport UHD: trames USB3 de 8 ko (taille optimale du endpoint B200) et
+# plus de trames en vol pour absorber la gigue de l'hôte à 20 MS/s.
+# recv_buff_size ne concerne que les transports réseau (sysctl
+# net.core.rmem_max >= 50000000 requis), il est ignoré en USB.
+DEFAULT_UHD_ARGS = ("type=b200,master_clock_rate=32e6,"
+                    "num_recv_frames=512,recv_frame_size=8192,recv_buff_size=50000000")
+
+# Avance (s) avec laquelle le channel hopper programme un retune temporisé
+HOP_SCHEDULE_LEAD = 0.05
+
+# Canaux balayés: 2.4 GHz (1-13) et canaux 5 GHz courants
+FREQS_2G = 2412e6 + 5e6 * np.arange(13)
+CHANNELS_5G_COMMON = np.array([36, 40, 44, 48, 149, 153, 157, 161])
+
+# Index des compteurs de trames 802.11
+FC_BEACON, FC_ACTION, FC_PROBE_RESP, FC_CTRL, FC_DATA, FC_OTHER = range(6)
+FC_NAMES = ('mgmt_beacon', 'mgmt_action', 'mgmt_probe_resp', 'ctrl', 'data', 'other')
+_MGMT_SUBTYPES = {8: FC_BEACON, 13: FC_ACTION, 5: FC_PROBE_RESP}
+
+
+def _fc_index(ft: int, fs: int) -> int:
+    """
+    Index du compteur (FC_*) pour un type/sous-type de trame 802.11
+
+    Args:
+        ft: Type de trame (0 = gestion, 1 = contrôle, 2 = données)
+        fs: Sous-type de trame
+
+    Returns:
+        Index FC_*
+    """
+    if ft == 0:
+        return _MGMT_SUBTYPES.get(fs, FC_OTHER)
+    if ft == 1:
+        return FC_CTRL
+    if ft == 2:
+        return FC_DATA
+    return FC_OTHER
+
+
+# Table 256 entrées: premier octet du Frame Control → index FC_*
+_FC_LUT = bytes(_fc_index((fc0 >> 2) & 0x3, (fc0 >> 4) & 0xF) for fc0 in range(256))
+
+# Capacité de la file des PDU en attente de traitement
+PDU_RING_SIZE = 4096
+
+# Préfixes marquant un Remote ID dans un PDU: OUI OpenDroneID + type (beacon
+# ASTM F3411) et Service ID NAN OpenDroneID (SHA-256("org.opendroneid.remoteid"))
+RID_MAGICS = (
+    bytes([0xFA, 0x0B, 0xBC, 0x0D]),
+    bytes([0x88, 0x69, 0x19, 0x9D, 0x92, 0x09]),
+)
+
+RID_ID_TYPES = frozenset({"serial number", "caa registration id", "utm uuid",
+                          "specific session id"})
+
+# Identifiant plausible: 6 à 32 caractères ASCII imprimables
+_ASCII_RE = re.compile(r'[\x20-\x7e]{6,32}')
+
+# Fonctions pmt du chemin par PDU liées une fois (évite les lookups d'attributs)
+if pmt is not None:
+    _pmt_is_pair = pmt.is_pair
+    _pmt_car = pmt.car
+    _pmt_cdr = pmt.cdr
+    _pmt_is_dict = pmt.is_dict
+    _pmt_dict_ref = pmt.dict_ref
+    _pmt_is_integer = pmt.is_integer
+    _pmt_to_long = pmt.to_long
+    _PMT_NIL = pmt.PMT_NIL
+
+
+def _compile_rid_prefilter(magics):
+    """
+    Compile les préfixes Remote ID en une base Hyperscan (bloc)
+
+    Args:
+        magics: Préfixes (bytes) à rechercher
+
+    Returns:
+        hyperscan.Database, ou None si la compilation échoue
+    """
+    try:
+        db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        db.compile(
+            expressions=[b''.join(b'\\x%02x' % c for c in m) for m in magics],
+            ids=list(range(len(magics))),
+            elements=len(magics),
+        )
+        return db
+    except Exception as e:
+        logger.warning(f"Préfiltre Hyperscan indisponible ({e}), repli sur bytes.find")
+        return None
+
+
+def _collect_match_end(match_id, start, end, flags, context):
+    """Callback Hyperscan: accumule l'offset de fin de chaque préfixe trouvé"""
+    context.append(end)
+    return None
+
+
+def _make_u8vector_converter():
+    """
+    Sélectionne la conversion u8vector PMT → bytes la moins coûteuse
+
+    Utilise pmt.u8vector_to_bytes si la version de pmt le fournit (copie
+    unique depuis le buffer PMT); sinon bytes() sur u8vector_elements, qui
+    est une simple copie mémoire quand les bindings renvoient un objet
+    buffer (tableau numpy) et reste la conversion la plus directe quand ils
+    renvoient une liste d'entiers.
+
+    Returns:
+        Callable(u8vector) -> bytes
+    """
+    to_bytes = getattr(pmt, 'u8vector_to_bytes', None)
+    if to_bytes is not None:
+        return to_bytes
+
+    elements = pmt.u8vector_elements
+
+    def convert(vector):
+        return bytes(elements(vector))
+
+    return convert
+
+
+def _make_pdu_sink(handler):
+    """
+    Crée un bloc GNU Radio qui transmet chaque PDU reçu à un callback
+
+    Remplace blocks.message_debug: les messages ne sont pas conservés dans
+    le bloc (mémoire bornée) et sont remis dès leur arrivée, sans sondage.
+
+    Args:
+        handler: Callable appelé avec chaque message PMT (thread du scheduler GR)
+
+    Returns:
+        Instance du bloc (port d'entrée de messages 'pdus')
+    """
+    from gnuradio import gr
+
+    class PDUSink(gr.basic_block):
+        def __init__(self):
+            gr.basic_block.__init__(self, name="pdu_sink", in_sig=None, out_sig=None)
+            self.message_port_register_in(pmt.intern('pdus'))
+            self.set_msg_handler(pmt.intern('pdus'), handler)
+
+    return PDUSink()
+
 
 class GNURadioWiFiRemoteIDSystem:
     """
@@ -31,8 +225,8 @@ class GNURadioWiFiRemoteIDSystem:
 
     def __init__(self, freq=2.437e9, gain=50, sample_rate=20e6,
                  channels=None, hop_interval=2.0, include_5ghz=False,
-                 uhd_device_args="type=b200,master_clock_rate=32e6,num_recv_frames=256,recv_frame_size=16384",
-                 mqtt_publisher=None):
+                 uhd_device_args=DEFAULT_UHD_ARGS,
+                 mqtt_publisher=None, cpu_dsp=None, cpu_proc=None, realtime=False):
         """
         Initialise le système
 
@@ -40,6 +234,9 @@ class GNURadioWiFiRemoteIDSystem:
             freq: Fréquence centrale (Hz)
             gain: Gain USRP (dB)
             sample_rate: Taux d'échantillonnage (Hz)
+            cpu_dsp: CPU réservé aux blocs DSP lourds du flowgraph (None = libre)
+            cpu_proc: CPU réservé au thread de traitement des paquets (None = libre)
+            realtime: Ordonnancement temps réel des threads du flowgraph
         """
         logger.info("="*70)
         logger.info("Système de Détection Remote ID - GNU Radio WiFi")
@@ -53,6 +250,9 @@ class GNURadioWiFiRemoteIDSystem:
         self.detection_count = 0
         self.uhd_device_args = uhd_device_args
         self.mqtt_publisher = mqtt_publisher
+        self.cpu_dsp = cpu_dsp
+        self.cpu_proc = cpu_proc
+        self.realtime = realtime
 
         # Balayage de canaux
         self.channels = channels if channels is not None else [2412e6, 2437e6, 2462e6]
@@ -61,22 +261,40 @@ class GNURadioWiFiRemoteIDSystem:
         self.hop_interval = hop_interval
         self._hopper_thread = None
 
-        # Compteurs de trames pour valider le format d'émission
-        self.frame_counts = {
-            'mgmt_beacon': 0,
-            'mgmt_action': 0,
-            'mgmt_probe_resp': 0,
-            'ctrl': 0,
-            'data': 0,
-            'other': 0
-        }
+        # Compteurs de trames pour valider le format d'émission, indexés
+        # par FC_* (voir la propriété frame_counts pour la vue par nom)
+        self._fc = [0] * len(FC_NAMES)
+
+        # File SPSC des PDU reçus du flowgraph (handler GR → thread de
+        # traitement): deque bornée (append/popleft atomiques, sans verrou)
+        # + Event de réveil. Les PDU les plus anciens sont écrasés si le
+        # traitement prend du retard.
+        self._ring = deque(maxlen=PDU_RING_SIZE)
+        self._ring_ev = threading.Event()
+
+        # Arrêt: réveille la boucle heartbeat et le channel hopper
+        self._stop_event = threading.Event()
+
+        # Positionné à chaque Remote ID détecté (attente sans polling côté appelant)
+        self.detection_event = threading.Event()
+        self.dropped_pdus = 0
 
-        # File de messages
-        self.packet_queue = Queue()
+        # Préfixes recherchés dans les PDU avant décodage Remote ID
+        self._rid_magics = RID_MAGICS
+        self._hs_db = _compile_rid_prefilter(RID_MAGICS) if HAS_HYPERSCAN else None
 
         # Vérifier dépendances
         self._check_dependencies()
 
+        # Clés de métadonnées PMT (type, sous-type), internées une seule fois
+        self._md_keys = (
+            (pmt.intern('frame_type'), pmt.intern('type')),
+            (pmt.intern('frame_subtype'), pmt.intern('subtype')),
+        )
+
+        # Conversion u8vector → bytes choisie une fois selon la version de pmt
+        self._u8vector_to_bytes = _make_u8vector_converter()
+
         # Initialiser modules
         self._initialize_modules()
 
@@ -92,6 +310,10 @@ class GNURadioWiFiRemoteIDSystem:
             logger.error("  → Lancer: ./INSTALL_GNURADIO.sh")
             sys.exit(1)
 
+        if pmt is None:
+            logger.error("  ✗ pmt (GNU Radio) non importable")
+            sys.exit(1)
+
         try:
             from gnuradio import uhd
             logger.info("  ✓ UHD (USRP)")
@@ -139,10 +361,18 @@ class GNURadioWiFiRemoteIDSystem:
         from gnuradio import gr, blocks, uhd, fft
         from gnuradio.fft import window
         import ieee802_11
-        import pmt
 
         logger.info("\n--- Création du flowgraph GNU Radio ---")
 
+        # Threads DSP (dont le Viterbi de decode_mac) en ordonnancement temps
+        # réel: à faire avant la création des blocs pour que leurs threads
+        # héritent de la politique
+        if self.realtime:
+            if gr.enable_realtime_scheduling() == gr.RT_OK:
+                logger.info("✓ Ordonnancement temps réel activé")
+            else:
+                logger.warning("Ordonnancement temps réel refusé (vérifier rtprio dans limits.conf)")
+
         # Top block
         tb = gr.top_block("WiFi Remote ID Receiver")
 
@@ -164,10 +394,6 @@ class GNURadioWiFiRemoteIDSystem:
         usrp_source.set_center_freq(self.freq, 0)
         usrp_source.set_gain(self.gain, 0)
         usrp_source.set_antenna('RX2', 0)
-        try:
-            usrp_source.set_min_output_buffer(1 << 18)
-        except Exception:
-            pass
 
         # Conserver une référence pour le channel hopping
         self.usrp_source = usrp_source
@@ -187,11 +413,9 @@ class GNURadioWiFiRemoteIDSystem:
         # Delay de 16 échantillons (durée d'une séquence courte WiFi)
         delay_16 = blocks.delay(gr.sizeof_gr_complex, 16)
 
-        # Conjugué du signal retardé
-        conjugate = blocks.conjugate_cc()
-
-        # Multiplication pour autocorrélation
-        multiply = blocks.multiply_vcc(1)
+        # Autocorrélation x[n]·conj(x[n-16]) en un seul bloc (kernel Volk
+        # multiply_conjugate) au lieu de conjugate_cc + multiply_vcc
+        multiply = blocks.multiply_conjugate_cc(1)
 
         # Moyennes mobiles
         moving_avg_corr = blocks.moving_average_cc(window_size, 1, 4000, 1)
@@ -231,20 +455,32 @@ class GNURadioWiFiRemoteIDSystem:
         # Decode MAC - Décodage trame MAC
         decode_mac = ieee802_11.decode_mac(False, False)
 
-        # Message Debug (pour capturer les paquets)
-        msg_debug = blocks.message_debug()
+        # Réception des paquets: déposés dans la file SPSC dès leur arrivée
+        pdu_sink = _make_pdu_sink(self._on_pdu)
+
+        # Blocs DSP lourds épinglés sur un CPU dédié (isolé du thread Python)
+        if self.cpu_dsp is not None:
+            for block in (sync_short, sync_long, fft_block, frame_eq, decode_mac):
+                block.set_processor_affinity([self.cpu_dsp])
+
+        # Buffers courts sur les blocs intermédiaires (à régler avant tb.start)
+        for block in (delay_16, multiply, moving_avg_corr, moving_avg_power,
+                      complex_to_mag, complex_to_mag_sq, divide, sync_short,
+                      delay_sync, sync_long):
+            block.set_max_output_buffer(FRONTEND_MAX_BUFFER)
+        for block in (stream_to_vec, fft_block, frame_eq):
+            block.set_max_output_buffer(OFDM_MAX_BUFFER)
 
         # Connections de la chaîne WiFi
         logger.info("3. Connexion flowgraph...")
 
         # === Branch 1: Signal retardé pour sync_short ===
         tb.connect((usrp_source, 0), (delay_16, 0))
-        tb.connect((delay_16, 0), (conjugate, 0))
         tb.connect((delay_16, 0), (sync_short, 0))  # Input 0: signal retardé
 
         # === Branch 2: Autocorrélation pour sync_short ===
         tb.connect((usrp_source, 0), (multiply, 0))
-        tb.connect((conjugate, 0), (multiply, 1))
+        tb.connect((delay_16, 0), (multiply, 1))
         tb.connect((multiply, 0), (moving_avg_corr, 0))
         tb.connect((moving_avg_corr, 0), (complex_to_mag, 0))
         tb.connect((moving_avg_corr, 0), (sync_short, 1))  # Input 1: autocorrélation
@@ -268,59 +504,57 @@ class GNURadioWiFiRemoteIDSystem:
         tb.connect((frame_eq, 0), (decode_mac, 0))
 
         # Message connection (paquets MAC décodés)
-        tb.msg_connect((decode_mac, 'out'), (msg_debug, 'store'))
+        tb.msg_connect((decode_mac, 'out'), (pdu_sink, 'pdus'))
 
         logger.info("✓ Flowgraph créé")
 
-        return tb, msg_debug
-
-    def _process_packets_thread(self, msg_debug):
-        """Thread qui traite les paquets WiFi reçus"""
-        import pmt
-
-        logger.info("Thread de traitement des paquets démarré")
-
-        last_check = time.time()
-        check_interval = 0.05  # Vérifier toutes les 50ms (plus réactif)
-        last_processed = 0  # index du dernier message traité
+        return tb, pdu_sink
 
-        while self.running:
-            try:
-                # Vérifier périodiquement
-                if time.time() - last_check < check_interval:
-                    time.sleep(0.005)  # Sleep plus court pour réactivité
-                    continue
+    def _on_pdu(self, msg):
+        """
+        Handler de messages du bloc pdu_sink (thread du scheduler GR)
 
-                last_check = time.time()
+        Extrait métadonnées et octets du PDU et les dépose dans la file SPSC;
+        le traitement se fait dans _process_packets_thread.
 
-                # Récupérer nombre de messages
-                num_messages = msg_debug.num_messages()
+        Args:
+            msg: Message PMT (paire métadonnées / u8vector)
+        """
+        if not _pmt_is_pair(msg):
+            return
 
-                if num_messages <= last_processed:
-                    continue
+        try:
+            item = (_pmt_car(msg), self._u8vector_to_bytes(_pmt_cdr(msg)))
+        except Exception as e:
+            if _DBG:
+                logger.debug("PDU invalide: %s", e)
+            return
 
-                # Traiter uniquement les nouveaux messages
-                for i in range(last_processed, num_messages):
-                    msg = msg_debug.get_message(i)
+        if len(self._ring) == PDU_RING_SIZE:
+            self.dropped_pdus += 1
+        self._ring.append(item)
+        self._ring_ev.set()
 
-                    if not pmt.is_pair(msg):
-                        continue
+    def _process_packets_thread(self):
+        """Thread qui traite les paquets WiFi reçus"""
+        logger.info("Thread de traitement des paquets démarré")
 
-                    meta = pmt.car(msg)
-                    data = pmt.cdr(msg)
+        ring = self._ring
+        ring_ev = self._ring_ev
 
-                    try:
-                        packet_bytes = bytes(pmt.u8vector_elements(data))
-                        self._process_wifi_pdu(meta, packet_bytes)
-                    except Exception as e:
-                        logger.debug(f"Erreur traitement paquet: {e}")
-
-                # Marquer jusqu'où on a traité
-                last_processed = num_messages
+        while self.running:
+            ring_ev.wait(0.5)
+            # Effacer avant de vider: un PDU arrivé pendant la vidange
+            # réarme l'Event et sera traité au tour suivant
+            ring_ev.clear()
 
-            except Exception as e:
-                logger.error(f"Erreur dans thread traitement: {e}")
-                time.sleep(0.1)
+            while ring:
+                meta, packet_bytes = ring.popleft()
+                try:
+                    self._process_wifi_pdu(meta, packet_bytes)
+                except Exception as e:
+                    if _DBG:
+                        logger.debug("Erreur traitement paquet: %s", e)
 
         logger.info("Thread de traitement arrêté")
 
@@ -329,67 +563,18 @@ class GNURadioWiFiRemoteIDSystem:
         Traite un paquet WiFi décodé
 
         Args:
+            meta: Métadonnées PMT du PDU
             packet_bytes: Paquet WiFi (bytes)
         """
-        logger.debug(f"Paquet WiFi reçu: {len(packet_bytes)} octets")
+        if _DBG:
+            logger.debug("Paquet WiFi reçu: %d octets", len(packet_bytes))
 
-        try:
-            import pmt as _pmt
-            try:
-                md = _pmt.to_python(meta)
-            except Exception:
-                md = None
-            if isinstance(md, dict):
-                ft = md.get(b'frame_type', md.get('frame_type'))
-                fs = md.get(b'frame_subtype', md.get('frame_subtype'))
-                if ft is None:
-                    ft = md.get(b'type', md.get('type'))
-                if fs is None:
-                    fs = md.get(b'subtype', md.get('subtype'))
-                try:
-                    if ft is not None:
-                        ftv = int(ft)
-                        fsv = int(fs) if fs is not None else -1
-                        if ftv == 0:
-                            if fsv == 8:
-                                self.frame_counts['mgmt_beacon'] += 1
-                            elif fsv == 13:
-                                self.frame_counts['mgmt_action'] += 1
-                            elif fsv == 5:
-                                self.frame_counts['mgmt_probe_resp'] += 1
-                            else:
-                                self.frame_counts['other'] += 1
-                        elif ftv == 1:
-                            self.frame_counts['ctrl'] += 1
-                        elif ftv == 2:
-                            self.frame_counts['data'] += 1
-                        else:
-                            self.frame_counts['other'] += 1
-                except Exception:
-                    pass
-        except Exception:
-            pass
-
-        # Compter le type de trame uniquement si l'en-tête semble présent
-        if len(packet_bytes) >= 24:
-            fc0 = packet_bytes[0]
-            ftype = (fc0 >> 2) & 0x3
-            fsub = (fc0 >> 4) & 0xF
-            if ftype == 0:
-                if fsub == 8:
-                    self.frame_counts['mgmt_beacon'] += 1
-                elif fsub == 13:
-                    self.frame_counts['mgmt_action'] += 1
-                elif fsub == 5:
-                    self.frame_counts['mgmt_probe_resp'] += 1
-                else:
-                    self.frame_counts['other'] += 1
-            elif ftype == 1:
-                self.frame_counts['ctrl'] += 1
-            elif ftype == 2:
-                self.frame_counts['data'] += 1
-            else:
-                self.frame_counts['other'] += 1
+        ft, fs = self._extract_ft_fs(meta)
+        if ft is not None:
+            self._bump_counter(ft, fs)
+        elif len(packet_bytes) >= 24:
+            # Pas de métadonnées: classement par table sur le Frame Control
+            self._fc[_FC_LUT[packet_bytes[0]]] += 1
 
         # Parser trame Beacon
         beacon_info = self.decoder.parse_beacon_frame(packet_bytes)
@@ -401,7 +586,8 @@ class GNURadioWiFiRemoteIDSystem:
             if remote_id and remote_id.uas_id:
                 self._handle_remote_id(remote_id, method='wifi_beacon')
             else:
-                logger.debug("Beacon sans Remote ID")
+                if _DBG:
+                    logger.debug("Beacon sans Remote ID")
             return
 
         beacon_body = self.decoder.parse_beacon_body(packet_bytes)
@@ -416,71 +602,151 @@ class GNURadioWiFiRemoteIDSystem:
         if rid and (rid.uas_id or (rid.latitude is not None and rid.longitude is not None)):
             self._handle_remote_id(rid, method='wifi_action_nan')
 
+    def _extract_ft_fs(self, meta):
+        """
+        Lit type et sous-type de trame 802.11 dans les métadonnées PMT
+
+        Args:
+            meta: Métadonnées PMT du PDU
+
+        Returns:
+            Tuple (type, sous-type), (None, None) si indéterminé
+        """
+        if _pmt_is_dict(meta):
+            dict_ref = _pmt_dict_ref
+            is_integer = _pmt_is_integer
+            nil = _PMT_NIL
+            values = []
+            for keys in self._md_keys:
+                value = None
+                for key in keys:
+                    ref = dict_ref(meta, key, nil)
+                    if is_integer(ref):
+                        value = _pmt_to_long(ref)
+                        break
+                values.append(value)
+            ft, fs = values
+            if ft is not None:
+                return ft, (fs if fs is not None else -1)
+
+        return None, None
+
+    def _bump_counter(self, ft: int, fs: int):
+        """
+        Incrémente le compteur correspondant au type de trame
+
+        Args:
+            ft: Type de trame (0 = gestion, 1 = contrôle, 2 = données)
+            fs: Sous-type de trame
+        """
+        self._fc[_fc_index(ft, fs)] += 1
+
+    @property
+    def frame_counts(self) -> dict:
+        """
+        Compteurs de trames par type
+
+        Returns:
+            Dictionnaire nom → nombre de trames (copie instantanée)
+        """
+        return dict(zip(FC_NAMES, list(self._fc)))
+
     def _try_decode_from_bytes(self, data: bytes):
-        """Essaie d'extraire un Remote ID en scannant des octets arbitraires."""
+        """
+        Essaie d'extraire un Remote ID en scannant des octets arbitraires
+
+        Le buffer entier est d'abord décodé tel quel. Sinon, au lieu de
+        re-décoder à chaque décalage, on localise les préfixes connus
+        (OUI OpenDroneID, Service ID NAN) et on ne décode qu'à partir de
+        ces positions.
+
+        Args:
+            data: Octets du PDU
+
+        Returns:
+            RemoteIDData ou None
+        """
         try:
             rid = self.decoder.decode_from_raw_bytes(data)
-            if rid:
-                has_location = (rid.latitude is not None and rid.longitude is not None)
-                uas_id = rid.uas_id or ""
-                uas_id_type = (rid.uas_id_type or "").lower()
-                
-                # Types valides incluent maintenant les détections par pattern
-                allowed_types = {"serial number", "caa registration id", "utm uuid", 
-                               "specific session id", "pattern detection"}
-                
-                # Pattern detection est toujours accepté
-                is_pattern_detection = "pattern detection" in uas_id_type
-
-                def is_plausible_ascii(s: str) -> bool:
-                    if not s:
-                        return False
-                    if len(s) < 6 or len(s) > 32:
-                        return False
-                    for ch in s:
-                        o = ord(ch)
-                        if not (32 <= o <= 126):
-                            return False
-                    return True
-
-                id_ok = ((uas_id_type in allowed_types) and is_plausible_ascii(uas_id)) or is_pattern_detection
-
-                if id_ok or has_location:
-                    return rid
+            if self._is_acceptable_rid(rid, allow_pattern=True):
+                return rid
         except Exception:
             pass
-        n = len(data)
-        for i in range(max(0, n - 128)):
-            chunk = data[i:]
+
+        for start in self._find_rid_offsets(data):
             try:
-                rid = self.decoder.decode_from_raw_bytes(chunk)
-                if rid:
-                    has_location = (rid.latitude is not None and rid.longitude is not None)
-                    uas_id = rid.uas_id or ""
-                    uas_id_type = (rid.uas_id_type or "").lower()
-                    allowed_types = {"serial number", "caa registration id", "utm uuid", "specific session id"}
-
-                    def is_plausible_ascii(s: str) -> bool:
-                        if not s:
-                            return False
-                        if len(s) < 6 or len(s) > 32:
-                            return False
-                        for ch in s:
-                            o = ord(ch)
-                            if not (32 <= o <= 126):
-                                return False
-                        return True
-
-                    id_ok = (uas_id_type in allowed_types) and is_plausible_ascii(uas_id)
-
-                    if id_ok or has_location:
-                        return rid
+                rid = self.decoder.decode_from_raw_bytes(data[start:])
+                if self._is_acceptable_rid(rid, allow_pattern=False):
+                    return rid
             except Exception:
-                continue
+                pass
         return None
 
+    def _find_rid_offsets(self, data: bytes) -> list:
+        """
+        Positions de décodage candidates (juste après chaque préfixe Remote ID)
+
+        Avec Hyperscan, tous les préfixes sont cherchés en une seule passe;
+        sinon un bytes.find par préfixe.
+
+        Args:
+            data: Octets du PDU
+
+        Returns:
+            Liste d'offsets (ordre croissant avec Hyperscan)
+        """
+        if self._hs_db is not None:
+            ends = []
+            self._hs_db.scan(data, match_event_handler=_collect_match_end, context=ends)
+            return sorted(ends)
+
+        offsets = []
+        for magic in self._rid_magics:
+            idx = data.find(magic)
+            while idx >= 0:
+                offsets.append(idx + len(magic))
+                idx = data.find(magic, idx + 1)
+        return offsets
+
+    @staticmethod
+    def _is_acceptable_rid(rid, allow_pattern: bool) -> bool:
+        """
+        Vérifie qu'un Remote ID décodé est plausible
+
+        Args:
+            rid: RemoteIDData (ou None)
+            allow_pattern: Accepter les détections par pattern
+
+        Returns:
+            True si l'ID est valide ou si une position est présente
+        """
+        if not rid:
+            return False
+        if rid.latitude is not None and rid.longitude is not None:
+            return True
+
+        uas_id_type = (rid.uas_id_type or "").lower()
+        if allow_pattern and "pattern detection" in uas_id_type:
+            return True
+        return (uas_id_type in RID_ID_TYPES
+                and GNURadioWiFiRemoteIDSystem._is_plausible_ascii(rid.uas_id))
+
+    @staticmethod
+    def _is_plausible_ascii(s) -> bool:
+        """
+        Vérifie qu'un identifiant est une chaîne ASCII imprimable de 6 à 32 caractères
+
+        Args:
+            s: Identifiant décodé (ou None)
+
+        Returns:
+            True si plausible
+        """
+        return bool(s) and _ASCII_RE.fullmatch(s) is not None
+
     def _handle_remote_id(self, remote_id, method: str):
         self.detection_count += 1
+        self.detection_event.set()
         self._display_remote_id(remote_id)
         if self.mqtt_publisher and self.mqtt_publisher.connected:
             detection_data = {
@@ -494,57 +760,116 @@ class GNURadioWiFiRemoteIDSystem:
             self.mqtt_publisher.publish_detection(detection_data)
 
     def _channel_hopper(self):
-        """Thread de hopping des canaux Wi‑Fi."""
+        """
+        Thread de hopping des canaux Wi‑Fi
+
+        Les retunes sont programmés par commandes temporisées UHD sur
+        l'horloge de l'USRP (échéances régulières de hop_interval); le thread
+        se réveille HOP_SCHEDULE_LEAD s avant chaque échéance pour envoyer la
+        commande, ce qui rend le timing indépendant de la gigue de Python.
+        Repli sur un retune immédiat si l'USRP refuse les commandes temporisées.
+        """
+        from gnuradio import uhd
+
         if not hasattr(self, 'usrp_source') or not self.channels:
             return
-        idx = 0
+
+        usrp = self.usrp_source
+        tune_reqs = [uhd.tune_request(freq) for freq in self.channels]
+        timed = True
+
+        # Premier canal immédiatement, puis échéances régulières
+        try:
+            usrp.set_center_freq(tune_reqs[0], 0)
+            self.freq = self.channels[0]
+            logger.info(f"↪️  Retune USRP: {self.freq/1e9:.3f} GHz")
+        except Exception as e:
+            logger.warning(f"Erreur hopping canal: {e}")
+        t0_host = time.monotonic()
+        t0_dev = usrp.get_time_now()
+
+        hop = 1
         while self.running:
+            # Réveil juste avant l'échéance du prochain hop
+            wake = t0_host + hop * self.hop_interval - HOP_SCHEDULE_LEAD
+            if self._stop_event.wait(max(0.0, wake - time.monotonic())):
+                break
+
+            idx = hop % len(self.channels)
             try:
-                freq = self.channels[idx % len(self.channels)]
-                self.usrp_source.set_center_freq(freq, 0)
-                self.freq = freq
-                logger.info(f"↪️  Retune USRP: {freq/1e9:.3f} GHz")
-                time.sleep(self.hop_interval)
-                idx += 1
+                if timed:
+                    try:
+                        usrp.set_command_time(t0_dev + uhd.time_spec(hop * self.hop_interval))
+                    except Exception as e:
+                        logger.warning(f"Commandes temporisées indisponibles ({e}), retune immédiat")
+                        timed = False
+                try:
+                    usrp.set_center_freq(tune_reqs[idx], 0)
+                finally:
+                    if timed:
+                        usrp.clear_command_time()
+                self.freq = self.channels[idx]
+                logger.info(f"↪️  Retune USRP: {self.freq/1e9:.3f} GHz")
             except Exception as e:
                 logger.warning(f"Erreur hopping canal: {e}")
-                time.sleep(self.hop_interval)
+            hop += 1
 
     def _display_remote_id(self, remote_id):
-        """Affiche les informations Remote ID"""
-        logger.info("\n" + "="*70)
-        logger.info("🎯 REMOTE ID DÉTECTÉ via GNU Radio + gr-ieee802-11")
-        logger.info("="*70)
+        """
+        Affiche les informations Remote ID
 
-        logger.info(f"\n📡 Informations Radio:")
-        logger.info(f"   Fréquence: {self.freq/1e9:.3f} GHz")
-        logger.info(f"   Gain: {self.gain} dB")
-        logger.info(f"   Méthode: gr-ieee802-11 (Décodage WiFi robuste)")
+        Le bloc est construit puis émis en un seul appel logger.info
+        (un seul passage par le verrou du logger).
 
-        logger.info(f"\n🆔 Identifiant:")
-        logger.info(f"   UAS ID: {remote_id.uas_id}")
-        logger.info(f"   Type: {remote_id.uas_id_type}")
+        Args:
+            remote_id: Objet RemoteIDData
+        """
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
+        rule = "=" * 70
+        lines = [
+            "\n" + rule,
+            "🎯 REMOTE ID DÉTECTÉ via GNU Radio + gr-ieee802-11",
+            rule,
+            "\n📡 Informations Radio:",
+            f"   Fréquence: {self.freq/1e9:.3f} GHz",
+            f"   Gain: {self.gain} dB",
+            "   Méthode: gr-ieee802-11 (Décodage WiFi robuste)",
+            "\n🆔 Identifiant:",
+            f"   UAS ID: {remote_id.uas_id}",
+            f"   Type: {remote_id.uas_id_type}",
+        ]
 
         if remote_id.latitude and remote_id.longitude:
-            logger.info(f"\n📍 Position Drone:")
-            logger.info(f"   Latitude: {remote_id.latitude:.6f}°")
-            logger.info(f"   Longitude: {remote_id.longitude:.6f}°")
-            logger.info(f"   Altitude MSL: {remote_id.altitude_msl:.1f} m")
-            logger.info(f"   Hauteur AGL: {remote_id.height:.1f} m")
+            lines += [
+                "\n📍 Position Drone:",
+                f"   Latitude: {remote_id.latitude:.6f}°",
+                f"   Longitude: {remote_id.longitude:.6f}°",
+                f"   Altitude MSL: {remote_id.altitude_msl:.1f} m",
+                f"   Hauteur AGL: {remote_id.height:.1f} m",
+            ]
 
         if remote_id.speed is not None:
-            logger.info(f"\n🚁 Vélocité:")
-            logger.info(f"   Vitesse: {remote_id.speed:.1f} m/s ({remote_id.speed*3.6:.1f} km/h)")
-            logger.info(f"   Direction: {remote_id.direction}°")
+            lines += [
+                "\n🚁 Vélocité:",
+                f"   Vitesse: {remote_id.speed:.1f} m/s ({remote_id.speed*3.6:.1f} km/h)",
+                f"   Direction: {remote_id.direction}°",
+            ]
 
         if remote_id.operator_latitude and remote_id.operator_longitude:
-            logger.info(f"\n👤 Opérateur:")
-            logger.info(f"   Position: ({remote_id.operator_latitude:.6f}°, "
-                       f"{remote_id.operator_longitude:.6f}°)")
-
-        logger.info(f"\n📊 Détection #{self.detection_count}")
-        logger.info(f"   Statut: {remote_id.status}")
-        logger.info("="*70 + "\n")
+            lines += [
+                "\n👤 Opérateur:",
+                f"   Position: ({remote_id.operator_latitude:.6f}°, "
+                f"{remote_id.operator_longitude:.6f}°)",
+            ]
+
+        lines += [
+            f"\n📊 Détection #{self.detection_count}",
+            f"   Statut: {remote_id.status}",
+            rule + "\n",
+        ]
+        logger.info("\n".join(lines))
 
     def start(self, use_signals: bool = True):
         """Démarre le système"""
@@ -558,7 +883,7 @@ class GNURadioWiFiRemoteIDSystem:
             logger.warning("MQTT non connecté - Mode autonome")
 
         # Créer flowgraph
-        self.tb, msg_debug = self._create_flowgraph()
+        self.tb, self.pdu_sink = self._create_flowgraph()
 
         # Handlers d'arrêt
         if use_signals:
@@ -567,17 +892,22 @@ class GNURadioWiFiRemoteIDSystem:
 
         # Démarrer flowgraph
         logger.info("\nDémarrage du flowgraph GNU Radio...")
-        self.tb.start()
+        self.tb.start(MAX_NOUTPUT_ITEMS)
         logger.info("✓ Flowgraph démarré")
 
         # Démarrer thread de traitement
+        self._stop_event.clear()
         self.running = True
         processing_thread = threading.Thread(
             target=self._process_packets_thread,
-            args=(msg_debug,),
             daemon=True
         )
         processing_thread.start()
+        if self.cpu_proc is not None:
+            try:
+                os.sched_setaffinity(processing_thread.native_id, {self.cpu_proc})
+            except (AttributeError, OSError) as e:
+                logger.warning(f"Affinité CPU du thread de traitement impossible: {e}")
 
         logger.info("\n🚀 Système actif - En attente de Remote ID WiFi")
         logger.info("   Appuyez sur Ctrl+C pour arrêter\n")
@@ -587,25 +917,28 @@ class GNURadioWiFiRemoteIDSystem:
             self._hopper_thread = threading.Thread(target=self._channel_hopper, daemon=True)
             self._hopper_thread.start()
 
-        # Boucle principale (heartbeat)
-        last_heartbeat = time.time()
+        # Boucle principale (heartbeat): attente bloquante sur l'Event
+        # d'arrêt, réveillée immédiatement par stop()
         heartbeat_interval = 60
 
         try:
             while self.running:
-                time.sleep(1)
+                if self._stop_event.wait(heartbeat_interval):
+                    break
 
                 # Heartbeat
-                if time.time() - last_heartbeat > heartbeat_interval:
-                    self.mqtt_publisher.publish_heartbeat()
+                if self.running:
+                    # PDUs évincés du ring plein (les plus anciens)
+                    self.mqtt_publisher.publish_heartbeat({'dropped_pdus': self.dropped_pdus})
+                    fc = list(self._fc)
                     logger.info(
                         f"📊 Remote IDs détectés: {self.detection_count} | "
-                        f"Frames: beacon={self.frame_counts['mgmt_beacon']}, "
-                        f"action={self.frame_counts['mgmt_action']}, "
-                        f"probe_resp={self.frame_counts['mgmt_probe_resp']}, "
-                        f"data={self.frame_counts['data']}, ctrl={self.frame_counts['ctrl']}"
+                        f"Frames: beacon={fc[FC_BEACON]}, "
+                        f"action={fc[FC_ACTION]}, "
+                        f"probe_resp={fc[FC_PROBE_RESP]}, "
+                        f"data={fc[FC_DATA]}, ctrl={fc[FC_CTRL]} | "
+                        f"PDUs perdus: {self.dropped_pdus}"
                     )
-                    last_heartbeat = time.time()
 
         except KeyboardInterrupt:
             logger.info("\nInterruption utilisateur")
@@ -624,6 +957,8 @@ class GNURadioWiFiRemoteIDSystem:
         logger.info("="*70)
 
         self.running = False
+        self._stop_event.set()
+        self._ring_ev.set()
 
         if self.tb:
             logger.info("Arrêt flowgraph GNU Radio...")
@@ -641,6 +976,64 @@ class GNURadioWiFiRemoteIDSystem:
         logger.info("="*70 + "\n")
 
 
+def parse_scan_channels(channels_arg: str) -> list:
+    """
+    Convertit la spécification --scan-channels en liste de fréquences
+
+    Formats: "all", liste de canaux 2.4 GHz ("1,6,11"), ou format avancé
+    ("2g:1-13,5g:36/40,5g:common,5g:36-48").
+
+    Args:
+        channels_arg: Spécification (minuscules, sans espaces superflus)
+
+    Returns:
+        Liste triée de fréquences (Hz), vide si channels_arg est vide
+    """
+    if not channels_arg:
+        return []
+
+    if channels_arg == 'all':
+        return np.concatenate((FREQS_2G, _freqs_5g(CHANNELS_5G_COMMON))).tolist()
+
+    try:
+        chans_2g = []
+        chans_5g = []
+        for p in (p.strip() for p in channels_arg.split(',')):
+            if not p:
+                continue
+            if p.startswith('2g:'):
+                rng = p[3:]
+                if '-' in rng:
+                    a, b = rng.split('-', 1)
+                    chans_2g.append(np.arange(max(int(a), 1), min(int(b), 13) + 1))
+                else:
+                    chans_2g.append([int(tok) for tok in rng.split('/') if tok])
+            elif p.startswith('5g:'):
+                rng = p[3:]
+                if rng == 'common':
+                    chans_5g.append(CHANNELS_5G_COMMON)
+                elif '-' in rng:
+                    a, b = rng.split('-', 1)
+                    chans_5g.append(np.arange(int(a), int(b) + 1, 4))
+                else:
+                    chans_5g.append([int(tok) for tok in rng.split('/') if tok])
+            else:
+                chans_2g.append([int(p)])
+
+        freqs = np.concatenate((
+            2412e6 + 5e6 * (np.concatenate(chans_2g or [[]]) - 1),
+            _freqs_5g(np.concatenate(chans_5g or [[]])),
+        ))
+        return np.unique(freqs).tolist()
+    except Exception:
+        return [2412e6, 2437e6, 2462e6]
+
+
+def _freqs_5g(channels) -> np.ndarray:
+    """Fréquences centrales (Hz) des canaux 5 GHz"""
+    return 5000e6 + 5e6 * np.asarray(channels, dtype=np.float64)
+
+
 def main():
     """Point d'entrée"""
     parser = argparse.ArgumentParser(
@@ -684,7 +1077,7 @@ def main():
     parser.add_argument(
         '--uhd-args',
         type=str,
-        default='type=b200,master_clock_rate=32e6,num_recv_frames=256,recv_frame_size=16384',
+        default=DEFAULT_UHD_ARGS,
         help='Arguments UHD device pour la source USRP'
     )
     parser.add_argument(
@@ -693,6 +1086,23 @@ def main():
         default='',
         help='Numéro de série USRP à cibler (facultatif)'
     )
+    parser.add_argument(
+        '--cpu-dsp',
+        type=int,
+        default=None,
+        help='CPU dédié aux blocs DSP du flowgraph (ex: CPU isolé via isolcpus=)'
+    )
+    parser.add_argument(
+        '--cpu-proc',
+        type=int,
+        default=None,
+        help='CPU dédié au thread de traitement des paquets'
+    )
+    parser.add_argument(
+        '--realtime',
+        action='store_true',
+        help='Ordonnancement temps réel des threads GNU Radio (nécessite rtprio)'
+    )
     parser.add_argument(
         '-v', '--verbose',
         action='store_true',
@@ -703,65 +1113,13 @@ def main():
 
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+        _refresh_debug_flag()
 
     # Lancement
     try:
         # Construire la liste de fréquences à partir des canaux
         channels_arg = (args.scan_channels or '').strip().lower()
-        channels_list = []
-        if channels_arg:
-            try:
-                def ch_to_freq_2g(ch):
-                    return 2412e6 + 5e6 * (ch - 1)
-                def ch_to_freq_5g(ch):
-                    return 5000e6 + 5e6 * ch
-
-                def add_range_2g(start, end):
-                    s = int(start); e = int(end)
-                    for ch in range(s, e + 1):
-                        if 1 <= ch <= 13:
-                            channels_list.append(ch_to_freq_2g(ch))
-
-                def add_list_5g(lst):
-                    for ch in lst:
-                        c = int(ch)
-                        channels_list.append(ch_to_freq_5g(c))
-
-                if channels_arg == 'all':
-                    add_range_2g(1, 13)
-                    add_list_5g([36, 40, 44, 48, 149, 153, 157, 161])
-                else:
-                    parts = [p.strip() for p in channels_arg.split(',') if p.strip()]
-                    for p in parts:
-                        if p.startswith('2g:'):
-                            rng = p[3:]
-                            if '-' in rng:
-                                a, b = rng.split('-', 1)
-                                add_range_2g(int(a), int(b))
-                            else:
-                                for tok in rng.split('/'):
-                                    if tok:
-                                        channels_list.append(ch_to_freq_2g(int(tok)))
-                        elif p.startswith('5g:'):
-                            rng = p[3:]
-                            if rng == 'common':
-                                add_list_5g([36, 40, 44, 48, 149, 153, 157, 161])
-                            elif '-' in rng:
-                                a, b = rng.split('-', 1)
-                                a = int(a); b = int(b)
-                                step = 4
-                                for ch in range(a, b + 1, step):
-                                    add_list_5g([ch])
-                            else:
-                                for tok in rng.split('/'):
-                                    if tok:
-                                        add_list_5g([int(tok)])
-                        else:
-                            channels_list.append(ch_to_freq_2g(int(p)))
-
-                    channels_list = sorted(set(channels_list))
-            except Exception:
-                channels_list = [2412e6, 2437e6, 2462e6]
+        channels_list = parse_scan_channels(channels_arg)
 
         if channels_arg == 'all' and args.hop_interval < 7.0:
             logger.info("Ajustement hop-interval à 7.0s pour scanning étendu")
@@ -781,7 +1139,10 @@ def main():
             channels=channels_list,
             hop_interval=args.hop_interval,
             include_5ghz=args.include_5ghz,
-            uhd_device_args=args.uhd_args
+            uhd_device_args=args.uhd_args,
+            cpu_dsp=args.cpu_dsp,
+            cpu_proc=args.cpu_proc,
+            realtime=args.realtime
         )
         system.start()
     except KeyboardInterrupt:
@@ -10,8 +10,12 @@ import yaml
 import time
 import signal
 import sys
+import queue
+import threading
 from pathlib import Path
 
+import numpy as np
+
 from src.uhd_acquisition import UHDAcquisition
 from src.preprocessing import SignalPreprocessor
 from src.spectrogram import SpectralAnalyzer
@@ -33,6 +37,15 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Nombre de tranches du ring buffer d'acquisition continue
+RING_SLOTS = 8
+
+# File des publications MQTT (au-delà, les détections sont abandonnées)
+MQTT_QUEUE_SIZE = 1024
+
+# Élément de la file MQTT demandant un heartbeat
+_HEARTBEAT = object()
+
 
 class SDRWiFiRemoteIDSystem:
     """
@@ -68,25 +81,48 @@ class SDRWiFiRemoteIDSystem:
         self.running = False
         self.detection_count = 0
 
+        # Classification des détections: champs fixes posés une fois, seuls le
+        # protocole et la confiance changent (DataFusion en copie les valeurs)
+        self._classification = {
+            'brand': 'WiFi Remote ID',
+            'model': 'Unknown',
+            'protocol': None,
+            'confidence': 0.0,
+            'method': 'sdr_wifi_demod',
+            'is_valid': True
+        }
+
+        # Publications MQTT hors de la boucle de détection: un broker lent
+        # ne bloque plus l'acquisition (thread de vidage démarré par start())
+        self._mqtt_q = queue.Queue(maxsize=MQTT_QUEUE_SIZE)
+        self._mqtt_thread = None
+        self._mqtt_dropped = 0
+
         self._initialize_modules()
 
     def _load_config(self, config_path: str) -> dict:
         """Charge la configuration"""
-        try:
-            with open(config_path, 'r') as f:
-                return yaml.safe_load(f)
-        except:
-            logger.warning("Config non trouvée, utilisation par défaut")
-            return {
-                'acquisition': {
-                    'sample_rate': 20e6,  # 20 MS/s pour WiFi 20 MHz
-                    'rx_freq_2g4': 2.437e9,
-                    'rx_gain': 50.0,
-                    'num_samples': 200000  # Plus d'échantillons pour WiFi
-                },
-                'mqtt': {'broker_host': 'localhost', 'broker_port': 1883},
-                'system': {'heartbeat_interval': 60, 'detection_threshold_snr': 15.0}
-            }
+        path = Path(config_path)
+        if path.is_file():
+            try:
+                with path.open('r') as f:
+                    config = yaml.safe_load(f)
+                if config:
+                    return config
+            except (OSError, yaml.YAMLError) as e:
+                logger.warning(f"Config illisible ({e})")
+
+        logger.warning("Config non trouvée, utilisation par défaut")
+        return {
+            'acquisition': {
+                'sample_rate': 20e6,  # 20 MS/s pour WiFi 20 MHz
+                'rx_freq_2g4': 2.437e9,
+                'rx_gain': 50.0,
+                'num_samples': 200000  # Plus d'échantillons pour WiFi
+            },
+            'mqtt': {'broker_host': 'localhost', 'broker_port': 1883},
+            'system': {'heartbeat_interval': 60, 'detection_threshold_snr': 15.0}
+        }
 
     def _initialize_modules(self):
         """Initialise tous les modules"""
@@ -108,11 +144,14 @@ class SDRWiFiRemoteIDSystem:
         self.preprocessor = SignalPreprocessor(
             sample_rate=acq_config['sample_rate']
         )
+        # Buffer de sortie du prétraitement, réutilisé à chaque itération
+        self._proc_buf = np.empty(acq_config['num_samples'], dtype=np.complex64)
 
         # Module 3: Analyse spectrale
         logger.info("3. Initialisation analyse spectrale...")
         self.analyzer = SpectralAnalyzer(
-            sample_rate=acq_config['sample_rate']
+            sample_rate=acq_config['sample_rate'],
+            expected_block_size=acq_config['num_samples']
         )
 
         # Module 4a: Détecteur WiFi
@@ -122,7 +161,8 @@ class SDRWiFiRemoteIDSystem:
         # Module 4b: Démodulateur WiFi SDR
         logger.info("4b. Initialisation démodulateur WiFi SDR...")
         self.wifi_demodulator = WiFiSDRDemodulator(
-            sample_rate=acq_config['sample_rate']
+            sample_rate=acq_config['sample_rate'],
+            expected_num_samples=acq_config['num_samples']
         )
 
         # Module 4c: Décodeur Remote ID
@@ -162,44 +202,72 @@ class SDRWiFiRemoteIDSystem:
             logger.error("Vérifiez la connexion USB 3.0")
             return
 
+        # Acquisition et traitement ne se recouvrent que si la réception UHD relâche le GIL
+        if not self.acquisition.check_gil_release(num_samples=self.config['acquisition']['num_samples']):
+            logger.warning("La réception UHD garde le GIL: acquisition et traitement seront sérialisés")
+
         # Handlers d'arrêt
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
 
+        # Acquisition continue: un thread producteur remplit le ring buffer
+        # de UHDAcquisition pendant que la boucle de détection traite la
+        # tranche précédente (transfert USB et calcul se recouvrent)
+        self.acquisition.start_continuous_acquisition(
+            num_samples_per_buffer=self.config['acquisition']['num_samples'],
+            channel=0,  # RX1: 2.4 GHz
+            num_slots=RING_SLOTS
+        )
+
         # Lancement
         self.running = True
+        self._mqtt_thread = threading.Thread(target=self._mqtt_drain, name='mqtt', daemon=True)
+        self._mqtt_thread.start()
         logger.info("\n🚀 Système actif - Appuyez sur Ctrl+C pour arrêter\n")
 
         self._detection_loop()
 
     def _detection_loop(self):
         """Boucle principale de détection"""
-        last_heartbeat = time.time()
         heartbeat_interval = self.config['system']['heartbeat_interval']
         snr_threshold = self.config['system']['detection_threshold_snr']
+        next_heartbeat = time.monotonic() + heartbeat_interval
 
+        # Paramètres d'acquisition lus une fois (pas d'accès dict par itération)
         acq_config = self.config['acquisition']
+        sample_rate = acq_config['sample_rate']
+        rx_freq_2g4 = acq_config['rx_freq_2g4']
+
+        # Détecteur d'énergie: plancher de bruit suivi par le préprocesseur
+        gate_margin_db = float(self.config['system'].get('energy_gate_margin_db', 3.0))
 
         while self.running:
             try:
                 # Heartbeat
-                if time.time() - last_heartbeat > heartbeat_interval:
-                    self.mqtt_publisher.publish_heartbeat()
+                now = time.monotonic()
+                if now >= next_heartbeat:
+                    self._enqueue_mqtt(_HEARTBEAT)
                     logger.info(f"📊 Remote IDs détectés: {self.detection_count}")
-                    last_heartbeat = time.time()
+                    # Échéance suivante; pas de rattrapage en rafale après une longue attente
+                    next_heartbeat += heartbeat_interval
+                    if next_heartbeat <= now:
+                        next_heartbeat = now + heartbeat_interval
 
                 # ═══════════════════════════════════════════════════════
                 # ÉTAPE 1: ACQUISITION SDR
                 # ═══════════════════════════════════════════════════════
+                # Tranche suivante du ring buffer (vue sans copie, valide
+                # jusqu'au prochain get_samples); l'attente cadence la boucle
                 logger.debug("\n--- Acquisition USRP B210 ---")
-                samples = self.acquisition.acquire_samples(
-                    num_samples=acq_config['num_samples'],
-                    channel=0  # RX1: 2.4 GHz
-                )
+                samples = self.acquisition.get_samples(timeout=1.0)
 
                 if samples is None:
                     logger.warning("Échec acquisition")
-                    time.sleep(0.1)
+                    continue
+
+                # Puissance brute: les blocs de bruit n'entrent pas dans le
+                # prétraitement (filtre passe-bande + normalisation)
+                if not self.preprocessor.passes_energy_gate(samples, gate_margin_db):
                     continue
 
                 # ═══════════════════════════════════════════════════════
@@ -211,7 +279,8 @@ class SDRWiFiRemoteIDSystem:
                     enable_dc_removal=True,
                     enable_iq_correction=True,
                     bandpass_range=(1e6, 9e6),  # Bande WiFi 2.4 GHz (< Nyquist 10 MHz)
-                    normalize_method='rms'
+                    normalize_method='rms',
+                    out=self._proc_buf
                 )
 
                 # ═══════════════════════════════════════════════════════
@@ -221,7 +290,6 @@ class SDRWiFiRemoteIDSystem:
 
                 if snr < snr_threshold:
                     logger.debug(f"SNR trop faible: {snr:.1f} dB")
-                    time.sleep(0.1)
                     continue
 
                 logger.info(f"\n🎯 Signal détecté! SNR: {snr:.1f} dB")
@@ -235,7 +303,7 @@ class SDRWiFiRemoteIDSystem:
                     compute_spectrogram=False
                 )
                 features['snr'] = snr
-                features['sample_rate'] = acq_config['sample_rate']
+                features['sample_rate'] = sample_rate
 
                 # ═══════════════════════════════════════════════════════
                 # ÉTAPE 5: DÉTECTION WiFi
@@ -243,12 +311,11 @@ class SDRWiFiRemoteIDSystem:
                 logger.debug("Vérification si signal WiFi...")
                 is_wifi, wifi_conf, wifi_channel = self.wifi_detector.is_wifi_signal(
                     features,
-                    acq_config['rx_freq_2g4']
+                    rx_freq_2g4
                 )
 
                 if not is_wifi:
                     logger.info(f"❌ Signal non-WiFi (conf: {wifi_conf:.1%})")
-                    time.sleep(0.1)
                     continue
 
                 logger.info(f"✅ Signal WiFi détecté! (Canal: {wifi_channel}, Conf: {wifi_conf:.1%})")
@@ -258,7 +325,6 @@ class SDRWiFiRemoteIDSystem:
 
                 if not has_beacons:
                     logger.info("⚠️  Pas de Beacon frames détectés")
-                    time.sleep(0.1)
                     continue
 
                 logger.info("✅ Beacon frames détectés!")
@@ -271,7 +337,6 @@ class SDRWiFiRemoteIDSystem:
 
                 if wifi_packet is None:
                     logger.warning("❌ Échec démodulation WiFi")
-                    time.sleep(0.5)
                     continue
 
                 logger.info(f"✅ Paquet WiFi démodulé: {len(wifi_packet)} octets")
@@ -281,12 +346,17 @@ class SDRWiFiRemoteIDSystem:
                 # ═══════════════════════════════════════════════════════
                 logger.info("🔍 Recherche Remote ID dans la trame...")
 
+                # Pré-filtre: l'OUI OpenDroneID (FA:0B:BC) doit apparaître dans
+                # le paquet pour qu'un Vendor IE Remote ID puisse s'y trouver
+                if self.remote_id_decoder.ODID_OUI not in wifi_packet:
+                    logger.info("⚠️  Pas de Remote ID dans cette trame")
+                    continue
+
                 # Parser la trame Beacon
                 beacon_info = self.remote_id_decoder.parse_beacon_frame(wifi_packet)
 
                 if beacon_info is None:
                     logger.warning("❌ Trame Beacon invalide")
-                    time.sleep(0.5)
                     continue
 
                 logger.info("✅ Trame Beacon parsée")
@@ -307,33 +377,59 @@ class SDRWiFiRemoteIDSystem:
                 # ÉTAPE 8: FUSION & PUBLICATION
                 # ═══════════════════════════════════════════════════════
                 if remote_id_data:
-                    classification = {
-                        'brand': 'WiFi Remote ID',
-                        'model': 'Unknown',
-                        'protocol': f'WiFi 802.11 CH{wifi_channel}',
-                        'confidence': wifi_conf,
-                        'method': 'sdr_wifi_demod',
-                        'is_valid': True
-                    }
+                    classification = self._classification
+                    classification['protocol'] = f'WiFi 802.11 CH{wifi_channel}'
+                    classification['confidence'] = wifi_conf
 
                     fused_data = self.fusion.fuse_detection_data(
                         features,
                         classification,
                         remote_id_data,
-                        center_freq=acq_config['rx_freq_2g4']
+                        center_freq=rx_freq_2g4
                     )
 
-                    # Publication MQTT
+                    # Publication MQTT (thread de vidage)
                     if self.mqtt_publisher.connected:
-                        self.mqtt_publisher.publish_detection(fused_data)
-
-                # Pause
-                time.sleep(0.5)
+                        self._enqueue_mqtt(fused_data)
 
             except Exception as e:
                 logger.error(f"Erreur dans la boucle: {e}", exc_info=True)
                 time.sleep(1)
 
+    def _enqueue_mqtt(self, item):
+        """
+        Confie une publication au thread MQTT sans jamais bloquer
+
+        Args:
+            item: Détection fusionnée, ou _HEARTBEAT
+        """
+        try:
+            self._mqtt_q.put_nowait(item)
+        except queue.Full:
+            self._mqtt_dropped += 1
+            if self._mqtt_dropped % 100 == 1:
+                logger.warning(f"File MQTT pleine: {self._mqtt_dropped} publications abandonnées")
+
+    def _mqtt_drain(self):
+        """
+        Thread de publication MQTT
+
+        Chaque détection est publiée avec publish_detection (format unitaire
+        sur le topic de détection); None arrête le thread.
+        """
+        while True:
+            item = self._mqtt_q.get()
+            if item is None:
+                return
+
+            try:
+                if item is _HEARTBEAT:
+                    self.mqtt_publisher.publish_heartbeat({'mqtt_dropped': self._mqtt_dropped})
+                else:
+                    self.mqtt_publisher.publish_detection(item)
+            except Exception as e:
+                logger.error(f"Erreur de publication MQTT: {e}", exc_info=True)
+
     def _display_remote_id(self, remote_id, snr: float, wifi_channel: int):
         """Affiche les informations Remote ID"""
         logger.info("\n" + "="*70)
@@ -386,6 +482,15 @@ class SDRWiFiRemoteIDSystem:
             logger.info("Fermeture USRP...")
             self.acquisition.close()
 
+        # Vider la file MQTT avant la déconnexion
+        if self._mqtt_thread is not None:
+            try:
+                self._mqtt_q.put(None, timeout=1.0)
+            except queue.Full:
+                pass
+            self._mqtt_thread.join(timeout=2.0)
+            self._mqtt_thread = None
+
         if self.mqtt_publisher and self.mqtt_publisher.connected:
             logger.info("Déconnexion MQTT...")
             self.mqtt_publisher.disconnect()
@@ -8,10 +8,45 @@ import json
 import logging
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
 
+def _loads(raw: bytes):
+    """
+    Désérialise une charge utile JSON (orjson si disponible)
+
+    Args:
+        raw: Octets JSON reçus
+
+    Returns:
+        Objet Python décodé
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _pretty(payload) -> str:
+    """
+    Formate une charge utile JSON indentée pour l'affichage
+
+    Args:
+        payload: Objet décodé
+
+    Returns:
+        Texte JSON indenté (2 espaces)
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(payload, indent=2, ensure_ascii=False)
+
+
 def on_connect(client, userdata, flags, rc):
     """Callback connexion"""
     if rc == 0:
@@ -28,16 +63,54 @@ def on_connect(client, userdata, flags, rc):
         logger.error(f"❌ Échec connexion MQTT (code: {rc})")
 
 
+def _print_detection(payload, timestamp):
+    """Affichage détaillé d'une détection Remote ID"""
+    logger.info("\n" + "="*70)
+    logger.info(f"🎯 REMOTE ID DÉTECTÉ [{timestamp}]")
+    logger.info("="*70)
+
+    # Extraire infos importantes
+    remote_id = payload.get('remote_id', {})
+    rf_features = payload.get('rf_features', {})
+
+    logger.info(f"\n📡 Radio:")
+    logger.info(f"   Fréquence: {payload.get('center_frequency_mhz', 'N/A')} MHz")
+    logger.info(f"   SNR: {rf_features.get('snr', 'N/A')} dB")
+    logger.info(f"   Bande: {rf_features.get('bandwidth_mhz', 'N/A')} MHz")
+
+    logger.info(f"\n🆔 Remote ID:")
+    logger.info(f"   UAS ID: {remote_id.get('uas_id', 'N/A')}")
+    logger.info(f"   Type: {remote_id.get('uas_id_type', 'N/A')}")
+
+    if remote_id.get('latitude') and remote_id.get('longitude'):
+        logger.info(f"\n📍 Position Drone:")
+        logger.info(f"   Lat/Lon: {remote_id['latitude']:.6f}°, {remote_id['longitude']:.6f}°")
+        logger.info(f"   Altitude: {remote_id.get('altitude_msl', 'N/A')} m MSL")
+        logger.info(f"   Hauteur: {remote_id.get('height', 'N/A')} m AGL")
+
+    if remote_id.get('speed') is not None:
+        logger.info(f"\n🚁 Mouvement:")
+        logger.info(f"   Vitesse: {remote_id['speed']:.1f} m/s ({remote_id['speed']*3.6:.1f} km/h)")
+        logger.info(f"   Direction: {remote_id.get('direction', 'N/A')}°")
+
+    logger.info("\n" + "="*70 + "\n")
+
+
 def on_message(client, userdata, msg):
     """Callback réception message"""
     topic = msg.topic
     timestamp = datetime.now().strftime("%H:%M:%S")
 
     try:
-        payload = json.loads(msg.payload.decode())
-        payload_str = json.dumps(payload, indent=2, ensure_ascii=False)
-    except:
-        payload_str = msg.payload.decode()
+        payload = _loads(msg.payload)
+    except ValueError:
+        payload = None
+
+    if not isinstance(payload, dict):
+        # Charge utile non JSON (ou non objet): affichage brut
+        logger.info(f"\n[{timestamp}] Topic: {topic}")
+        logger.info(msg.payload.decode(errors='replace'))
+        return
 
     # Affichage selon le topic
     if topic == "system/health":
@@ -46,35 +119,13 @@ def on_message(client, userdata, msg):
 
     elif topic == "drone/detection":
         # DÉTECTION REMOTE ID - affichage détaillé
-        logger.info("\n" + "="*70)
-        logger.info(f"🎯 REMOTE ID DÉTECTÉ [{timestamp}]")
-        logger.info("="*70)
-
-        # Extraire infos importantes
-        remote_id = payload.get('remote_id', {})
-        rf_features = payload.get('rf_features', {})
-
-        logger.info(f"\n📡 Radio:")
-        logger.info(f"   Fréquence: {payload.get('center_frequency_mhz', 'N/A')} MHz")
-        logger.info(f"   SNR: {rf_features.get('snr', 'N/A')} dB")
-        logger.info(f"   Bande: {rf_features.get('bandwidth_mhz', 'N/A')} MHz")
-
-        logger.info(f"\n🆔 Remote ID:")
-        logger.info(f"   UAS ID: {remote_id.get('uas_id', 'N/A')}")
-        logger.info(f"   Type: {remote_id.get('uas_id_type', 'N/A')}")
-
-        if remote_id.get('latitude') and remote_id.get('longitude'):
-            logger.info(f"\n📍 Position Drone:")
-            logger.info(f"   Lat/Lon: {remote_id['latitude']:.6f}°, {remote_id['longitude']:.6f}°")
-            logger.info(f"   Altitude: {remote_id.get('altitude_msl', 'N/A')} m MSL")
-            logger.info(f"   Hauteur: {remote_id.get('height', 'N/A')} m AGL")
-
-        if remote_id.get('speed') is not None:
-            logger.info(f"\n🚁 Mouvement:")
-            logger.info(f"   Vitesse: {remote_id['speed']:.1f} m/s ({remote_id['speed']*3.6:.1f} km/h)")
-            logger.info(f"   Direction: {remote_id.get('direction', 'N/A')}°")
+        _print_detection(payload, timestamp)
 
-        logger.info("\n" + "="*70 + "\n")
+    elif topic == "drone/detections":
+        # Lot de détections {"detections": [...]}: affichage de chacune
+        for detection in payload.get('detections', []):
+            if isinstance(detection, dict):
+                _print_detection(detection, timestamp)
 
     elif topic == "drone/position":
         # Position update
@@ -93,8 +144,9 @@ def on_message(client, userdata, msg):
 
     else:
         # Autre topic
+        # Formatage indenté uniquement pour les topics affichés tels quels
         logger.info(f"\n[{timestamp}] Topic: {topic}")
-        logger.info(payload_str)
+        logger.info(_pretty(payload))
 
 
 def main():
@@ -12,6 +12,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from main_gnuradio_wifi import GNURadioWiFiRemoteIDSystem
+from src.wifi_detector import channels_to_freqs
 
 
 def parse_channels(ch_str: str):
@@ -27,9 +28,8 @@ def parse_channels(ch_str: str):
             chans.append(int(x))
         except Exception:
             continue
-    def ch_to_freq_2g(ch):
-        return 2412e6 + 5e6 * (ch - 1)
-    return [ch_to_freq_2g(ch) for ch in chans]
+    # Même conversion que l'orchestrateur auto (2.4 GHz et 5 GHz)
+    return channels_to_freqs(chans).tolist()
 
 
 def main():
@@ -63,30 +63,31 @@ def main():
     t = threading.Thread(target=lambda: system.start(use_signals=False), daemon=True)
     t.start()
 
-    start_ts = time.time()
-    last_stats = 0
+    # Attente sur l'Event de détection: réveil immédiat au premier Remote ID,
+    # sinon au prochain affichage des statistiques (toutes les 5 s) ou au timeout
+    deadline = time.monotonic() + args.timeout
+    next_stats = time.monotonic()
     try:
         while True:
-            time.sleep(0.5)
-            if system.detection_count > 0:
-                print("REMOTE ID: PRESENT")
+            now = time.monotonic()
+            if now >= deadline:
+                print("REMOTE ID: ABSENT")
                 try:
                     system.stop()
                 except Exception:
                     pass
-                sys.exit(0)
+                sys.exit(1)
 
-            now = time.time()
-            if now - start_ts > args.timeout:
-                print("REMOTE ID: ABSENT")
+            if system.detection_event.wait(max(0.0, min(next_stats, deadline) - now)):
+                print("REMOTE ID: PRESENT")
                 try:
                     system.stop()
                 except Exception:
                     pass
-                sys.exit(1)
+                sys.exit(0)
 
-            if now - last_stats > 5:
-                last_stats = now
+            if time.monotonic() >= next_stats:
+                next_stats += 5
                 fc = system.frame_counts
                 print(f"Frames beacon={fc['mgmt_beacon']} action={fc['mgmt_action']} probe_resp={fc['mgmt_probe_resp']} data={fc['data']} ctrl={fc['ctrl']}")
     except KeyboardInterrupt:
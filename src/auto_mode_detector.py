@@ -10,6 +10,7 @@ except Exception:
 
 from src.mqtt_publisher import MQTTPublisher
 from src.ble_scanner import BLERemoteIDScanner
+from src.wifi_detector import channels_to_freqs
 from main_gnuradio_wifi import GNURadioWiFiRemoteIDSystem
 
 
@@ -57,10 +58,8 @@ class AutoModeRIDOrchestrator:
         chans = wifi_cfg.get('channels')
         channels = None
         if isinstance(chans, list) and chans:
-            def ch_to_freq_2g(ch):
-                return 2412e6 + 5e6 * (int(ch) - 1)
             try:
-                channels = [ch_to_freq_2g(int(x)) for x in chans]
+                channels = channels_to_freqs([int(x) for x in chans]).tolist()
             except Exception:
                 channels = None
         acq = self.config.get('acquisition', {}) if self.config else {}
@@ -1,6 +1,8 @@
 import asyncio
+import collections
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, Callable
 
 try:
@@ -11,6 +13,45 @@ except Exception:
 from src.remote_id_decoder import WiFiRemoteIDDecoder, RemoteIDData
 from src.mqtt_publisher import MQTTPublisher
 
+# Types d'identifiant acceptés pour un UAS ID publié sans position
+_ALLOWED_ID_TYPES = frozenset({"serial number", "caa registration id", "utm uuid", "specific session id"})
+
+# Plus grand type de message ASTM F3411 reconnu par le décodeur (Operator ID)
+_MAX_MSG_TYPE = WiFiRemoteIDDecoder.MSG_TYPE_OPERATOR_ID
+
+# Décodage + publication hors de la boucle BLE: nombre de workers et nombre
+# maximal d'annonces en attente (au-delà, les annonces sont abandonnées)
+BLE_DECODE_WORKERS = 4
+BLE_MAX_PENDING = 16
+
+# Une puce BLE répète la même annonce toutes les ~100 ms alors que l'état du
+# drone change ~1 fois/s: une annonce identique (adresse + octets) déjà
+# soumise il y a moins de BLE_DEDUP_TTL_S n'est pas redécodée
+BLE_DEDUP_TTL_S = 2.0
+BLE_DEDUP_MAX_ENTRIES = 4096
+
+
+def _is_plausible_ascii(s: str) -> bool:
+    # ASCII imprimable (0x20-0x7E): isascii() et isprintable() s'exécutent en C
+    return bool(s) and 6 <= len(s) <= 32 and s.isascii() and s.isprintable()
+
+
+def _is_acceptable(rid: RemoteIDData) -> bool:
+    has_location = (rid.latitude is not None and rid.longitude is not None)
+    uas_id_type = (rid.uas_id_type or "").lower()
+    id_ok = (uas_id_type in _ALLOWED_ID_TYPES) and _is_plausible_ascii(rid.uas_id or "")
+    return id_ok or has_location
+
+
+def _parse_entry_points(data: bytes) -> list:
+    # ends[i]: offset du premier octet de type connu lu par le parseur en partant
+    # de i (None si aucun). Le parseur s'arrête à l'avant-dernier octet.
+    n = len(data)
+    ends = [None] * (n + 2)
+    for i in range(n - 2, -1, -1):
+        ends[i] = i if data[i] <= _MAX_MSG_TYPE else ends[i + 2]
+    return ends
+
 
 class BLERemoteIDScanner:
     def __init__(self, mqtt: Optional[MQTTPublisher] = None, scan_interval: float = 5.0,
@@ -21,6 +62,12 @@ class BLERemoteIDScanner:
         self._thread: Optional[threading.Thread] = None
         self._decoder = WiFiRemoteIDDecoder()
         self._on_remote_id = on_remote_id
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = threading.BoundedSemaphore(BLE_MAX_PENDING)
+        self.dropped_adverts = 0
+        self._recent_adverts: "collections.OrderedDict[tuple, float]" = collections.OrderedDict()
 
     def start(self):
         if BleakScanner is None:
@@ -28,37 +75,104 @@ class BLERemoteIDScanner:
         if self._running:
             return
         self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=BLE_DECODE_WORKERS,
+                                            thread_name_prefix="ble-decode")
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
 
     def stop(self):
         self._running = False
+        loop, stop_event = self._loop, self._stop_event
+        if loop is not None and stop_event is not None:
+            try:
+                loop.call_soon_threadsafe(stop_event.set)
+            except RuntimeError:
+                pass
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=2.0)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
     def _run_loop(self):
         asyncio.run(self._scan_loop())
 
     async def _scan_loop(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        # Une seule session de scan longue durée: chaque annonce est traitée dès
+        # réception (pas de fenêtre de redémarrage entre deux discover()).
+        # La session n'est recréée qu'en cas d'erreur de l'adaptateur.
         while self._running:
+            scanner = BleakScanner(detection_callback=self._on_adv_cb)
             try:
-                devices = await BleakScanner.discover(timeout=self.scan_interval, return_adv=True)
-                for dev, adv in devices:
-                    self._handle_adv(dev.address, adv)
+                await scanner.start()
+                await self._stop_event.wait()
             except Exception:
                 await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await scanner.stop()
+                except Exception:
+                    pass
+
+    def _on_adv_cb(self, device: Any, adv: Any):
+        # Exécuté dans la boucle BLE: on ne garde que les octets candidats et on
+        # délègue le décodage (CPU) et la publication MQTT (socket) aux workers
+        try:
+            candidates = self._adv_candidates(adv)
+        except Exception:
+            return
+        executor = self._executor
+        if not candidates or executor is None:
+            return
+        addr = device.address
+        now = time.monotonic()
+        key = (addr, tuple(sorted(candidates)))
+        recent = self._recent_adverts
+        seen = recent.get(key)
+        if seen is not None and now - seen < BLE_DEDUP_TTL_S:
+            return
+        if not self._pending.acquire(blocking=False):
+            self.dropped_adverts += 1
+            return
+        try:
+            future = executor.submit(self._handle_candidates, addr, candidates)
+        except RuntimeError:
+            self._pending.release()
+            return
+        future.add_done_callback(lambda _: self._pending.release())
+
+        # Entrées triées par date de soumission: les expirées sont en tête
+        recent[key] = now
+        recent.move_to_end(key)
+        while recent:
+            oldest_key, oldest_t = next(iter(recent.items()))
+            if now - oldest_t < BLE_DEDUP_TTL_S and len(recent) <= BLE_DEDUP_MAX_ENTRIES:
+                break
+            del recent[oldest_key]
+
+    @staticmethod
+    def _adv_candidates(adv: Any) -> list:
+        sd: Dict[str, bytes] = getattr(adv, "service_data", {}) or {}
+        md: Dict[int, bytes] = getattr(adv, "manufacturer_data", {}) or {}
+        candidates = []
+        for _, v in sd.items():
+            if isinstance(v, (bytes, bytearray)) and len(v) >= 5:
+                candidates.append(bytes(v))
+        for _, v in md.items():
+            if isinstance(v, (bytes, bytearray)) and len(v) >= 5:
+                candidates.append(bytes(v))
+        return candidates
 
     def _handle_adv(self, addr: str, adv: Any):
         try:
-            sd: Dict[str, bytes] = getattr(adv, "service_data", {}) or {}
-            md: Dict[int, bytes] = getattr(adv, "manufacturer_data", {}) or {}
-            candidates = []
-            for _, v in sd.items():
-                if isinstance(v, (bytes, bytearray)) and len(v) >= 5:
-                    candidates.append(bytes(v))
-            for _, v in md.items():
-                if isinstance(v, (bytes, bytearray)) and len(v) >= 5:
-                    candidates.append(bytes(v))
+            self._handle_candidates(addr, self._adv_candidates(adv))
+        except Exception:
+            pass
+
+    def _handle_candidates(self, addr: str, candidates: list):
+        try:
             for payload in candidates:
                 rid = self._try_decode(payload)
                 if rid:
@@ -67,57 +181,36 @@ class BLERemoteIDScanner:
             pass
 
     def _try_decode(self, data: bytes) -> Optional[RemoteIDData]:
+        rid = self._decode_acceptable(data)
+        if rid:
+            return rid
+        n = len(data)
+        limit = n - 64
+        if limit <= 0:
+            return None
+        # Le parseur ASTM saute 2 octets sur un type inconnu (> 5): décoder data[i:]
+        # revient à décoder depuis le premier octet de type connu atteint par pas
+        # de 2. On ne décode qu'une fois par point d'arrivée, dans l'ordre des
+        # offsets, ce qui donne le même résultat que l'essai de tous les offsets.
+        ends = _parse_entry_points(data)
+        tried = {ends[0]}
+        for i in range(limit):
+            e = ends[i]
+            if e is None or e in tried:
+                continue
+            tried.add(e)
+            rid = self._decode_acceptable(data[e:])
+            if rid:
+                return rid
+        return None
+
+    def _decode_acceptable(self, data: bytes) -> Optional[RemoteIDData]:
         try:
             rid = self._decoder.decode_from_raw_bytes(data)
-            if rid:
-                has_location = (rid.latitude is not None and rid.longitude is not None)
-                uas_id = rid.uas_id or ""
-                uas_id_type = (rid.uas_id_type or "").lower()
-                allowed_types = {"serial number", "caa registration id", "utm uuid", "specific session id"}
-
-                def is_plausible_ascii(s: str) -> bool:
-                    if not s:
-                        return False
-                    if len(s) < 6 or len(s) > 32:
-                        return False
-                    for ch in s:
-                        o = ord(ch)
-                        if not (32 <= o <= 126):
-                            return False
-                    return True
-
-                id_ok = (uas_id_type in allowed_types) and is_plausible_ascii(uas_id)
-                if id_ok or has_location:
-                    return rid
         except Exception:
-            pass
-        n = len(data)
-        for i in range(max(0, n - 64)):
-            chunk = data[i:]
-            try:
-                rid = self._decoder.decode_from_raw_bytes(chunk)
-                if rid:
-                    has_location = (rid.latitude is not None and rid.longitude is not None)
-                    uas_id = rid.uas_id or ""
-                    uas_id_type = (rid.uas_id_type or "").lower()
-                    allowed_types = {"serial number", "caa registration id", "utm uuid", "specific session id"}
-
-                    def is_plausible_ascii(s: str) -> bool:
-                        if not s:
-                            return False
-                        if len(s) < 6 or len(s) > 32:
-                            return False
-                        for ch in s:
-                            o = ord(ch)
-                            if not (32 <= o <= 126):
-                                return False
-                        return True
-
-                    id_ok = (uas_id_type in allowed_types) and is_plausible_ascii(uas_id)
-                    if id_ok or has_location:
-                        return rid
-            except Exception:
-                continue
+            return None
+        if rid and _is_acceptable(rid):
+            return rid
         return None
 
     def _publish(self, source: str, rid: RemoteIDData):
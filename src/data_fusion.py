@@ -3,12 +3,14 @@ MODULE 6: Fusion de Données (data_fusion.py)
 Fusion des résultats de détection, classification et Remote ID
 """
 
+import math
+import time
 import numpy as np
 from typing import Dict, Optional, List
 from datetime import datetime
 import logging
 
-logging.basicConfig(level=logging.INFO)
+# Module de bibliothèque: la configuration du logging revient à l'application
 logger = logging.getLogger(__name__)
 
 
@@ -36,6 +38,11 @@ class DataFusion:
         }
     ]
 
+    # Taille (degrés) des cellules de la grille d'index des zones (~11 km), et
+    # nombre de cellules au-delà duquel une zone est testée pour toute position
+    ZONE_GRID_CELL_DEG = 0.1
+    ZONE_GRID_MAX_CELLS = 1024
+
     def __init__(self, config: Optional[Dict] = None):
         """
         Initialise le module de fusion de données
@@ -43,6 +50,15 @@ class DataFusion:
         logger.info("Module de fusion de données initialisé")
         df_cfg = (config or {}).get('data_fusion', {})
         self.restricted_zones = df_cfg.get('restricted_zones', self.RESTRICTED_ZONES)
+
+        # Centres (radians) et rayons au carré (m²) des zones, pour un test vectorisé
+        self._zone_lat_rad = np.radians(np.array([z['center_lat'] for z in self.restricted_zones], dtype=np.float64))
+        self._zone_lon_rad = np.radians(np.array([z['center_lon'] for z in self.restricted_zones], dtype=np.float64))
+        self._zone_radius_sq = np.array([(z['radius_km'] * 1000) ** 2 for z in self.restricted_zones], dtype=np.float64)
+        # Colonnes de la grille: 360° découpés en un nombre entier de cellules,
+        # repliées modulo ce nombre (zones à cheval sur ±180°)
+        self._zone_grid_cols = max(1, round(360.0 / self.ZONE_GRID_CELL_DEG))
+        self._zone_grid, self._zone_large = self._build_zone_grid()
         ta = df_cfg.get('threat_assessment', {})
         # Support both naming schemes from config.yaml
         alt_limit = ta.get('altitude_agl_limit_m', ta.get('high_altitude_m', 120))
@@ -71,29 +87,22 @@ class DataFusion:
         Returns:
             Dictionnaire fusionné avec toutes les informations
         """
-        logger.info("Fusion des données de détection")
-
-        # Structure de base
-        fusion_result = {
-            'timestamp': datetime.now().isoformat(),
-            'timestamp_unix': datetime.now().timestamp(),
-            'detection': {},
-            'classification': {},
-            'remote_id': {},
-            'threat_assessment': {},
-            'metadata': {}
-        }
+        logger.debug("Fusion des données de détection")
 
         # === SECTION DETECTION ===
+        # Chaque section est construite en une seule fois (littéral), les valeurs
+        # d'entrée étant converties une seule fois en float Python
         spectral = detection_features.get('spectral_features', {})
-        temporal = detection_features.get('temporal_features', {})
-
-        fusion_result['detection'] = {
-            'frequency': float(center_freq),
-            'frequency_mhz': float(center_freq / 1e6),
-            'bandwidth': float(spectral.get('bandwidth', 0)),
-            'bandwidth_mhz': float(spectral.get('bandwidth', 0) / 1e6),
-            'snr': float(detection_features.get('snr', 0)),
+        center_freq = float(center_freq)
+        bandwidth = float(spectral.get('bandwidth', 0))
+        snr = float(detection_features.get('snr', 0))
+
+        detection = {
+            'frequency': center_freq,
+            'frequency_mhz': center_freq / 1e6,
+            'bandwidth': bandwidth,
+            'bandwidth_mhz': bandwidth / 1e6,
+            'snr': snr,
             'rssi_dbm': self._estimate_rssi(
                 spectral.get('peak_power_db', -100),
                 detection_features.get('snr', 0)
@@ -113,38 +122,40 @@ class DataFusion:
                     detection_features.get('sample_rate', 25e6)
                 )
 
-                fusion_result['detection']['burst_info'] = {
+                detection['burst_info'] = {
                     'count': bursts['count'],
-                    'avg_period_ms': float(np.mean(intervals) * 1000) if intervals else 0,
-                    'std_period_ms': float(np.std(intervals) * 1000) if len(intervals) > 1 else 0
+                    'avg_period_ms': float(intervals.mean() * 1000) if intervals.size else 0,
+                    'std_period_ms': float(intervals.std() * 1000) if intervals.size > 1 else 0
                 }
 
         # === SECTION CLASSIFICATION ===
-        fusion_result['classification'] = {
+        confidence = float(classification_result.get('confidence', 0))
+        classification = {
             'brand': classification_result.get('brand', 'Unknown'),
             'model': classification_result.get('model', 'Unknown'),
             'protocol': classification_result.get('protocol', 'Unknown'),
-            'confidence': float(classification_result.get('confidence', 0)),
+            'confidence': confidence,
             'method': classification_result.get('method', 'unknown'),
             'is_valid': classification_result.get('is_valid', False)
         }
 
         # Top prédictions si disponibles
         if classification_result.get('top_predictions'):
-            fusion_result['classification']['top_predictions'] = [
+            classification['top_predictions'] = [
                 {'model': m, 'confidence': float(c)}
                 for m, c in classification_result['top_predictions']
             ]
 
         # === SECTION REMOTE ID ===
+        remote_id = {}
         if remote_id_data:
             # Position du drone
             position = remote_id_data.get('position', {})
-            fusion_result['remote_id']['uas_id'] = remote_id_data.get('uas_id')
-            fusion_result['remote_id']['uas_id_type'] = remote_id_data.get('uas_id_type')
+            remote_id['uas_id'] = remote_id_data.get('uas_id')
+            remote_id['uas_id_type'] = remote_id_data.get('uas_id_type')
 
             if position.get('latitude') and position.get('longitude'):
-                fusion_result['remote_id']['position'] = {
+                remote_id['position'] = {
                     'latitude': float(position['latitude']),
                     'longitude': float(position['longitude']),
                     'altitude_msl': float(position.get('altitude_msl', 0)),
@@ -155,9 +166,10 @@ class DataFusion:
             # Vélocité
             velocity = remote_id_data.get('velocity', {})
             if velocity.get('speed') is not None:
-                fusion_result['remote_id']['velocity'] = {
-                    'speed': float(velocity['speed']),
-                    'speed_kmh': float(velocity['speed'] * 3.6),
+                speed = float(velocity['speed'])
+                remote_id['velocity'] = {
+                    'speed': speed,
+                    'speed_kmh': speed * 3.6,
                     'direction': float(velocity.get('direction', 0)),
                     'vertical_speed': float(velocity.get('vertical_speed', 0))
                 }
@@ -165,52 +177,62 @@ class DataFusion:
             # Opérateur
             operator = remote_id_data.get('operator', {})
             if operator.get('latitude') and operator.get('longitude'):
-                fusion_result['remote_id']['operator'] = {
-                    'latitude': float(operator['latitude']),
-                    'longitude': float(operator['longitude']),
-                    'altitude': float(operator.get('altitude', 0)),
-                    'id': operator.get('id')
-                }
+                op_lat = float(operator['latitude'])
+                op_lon = float(operator['longitude'])
 
                 # Calcul de la distance drone-opérateur
-                drone_pos = fusion_result['remote_id']['position']
-                op_pos = fusion_result['remote_id']['operator']
-
+                drone_pos = remote_id['position']
                 distance = self._calculate_distance(
                     drone_pos['latitude'], drone_pos['longitude'],
-                    op_pos['latitude'], op_pos['longitude']
+                    op_lat, op_lon
                 )
 
-                fusion_result['remote_id']['operator']['distance_to_uas_m'] = float(distance)
+                remote_id['operator'] = {
+                    'latitude': op_lat,
+                    'longitude': op_lon,
+                    'altitude': float(operator.get('altitude', 0)),
+                    'id': operator.get('id'),
+                    'distance_to_uas_m': float(distance)
+                }
 
-            fusion_result['remote_id']['status'] = remote_id_data.get('status')
+            remote_id['status'] = remote_id_data.get('status')
 
         # === SECTION THREAT ASSESSMENT ===
-        threat_level, threat_reasons = self._assess_threat(
-            fusion_result['remote_id'],
-            fusion_result['classification']
-        )
-
-        fusion_result['threat_assessment'] = {
-            'level': threat_level,
-            'reasons': threat_reasons,
-            'in_restricted_zone': self._check_restricted_zone(
-                fusion_result['remote_id'].get('position')
-            )
-        }
+        # Test de zone effectué une seule fois (score de menace + sortie)
+        position = remote_id.get('position')
+        in_restricted_zone = self._check_restricted_zone(position)
+        threat_level, threat_reasons = self._assess_threat(remote_id, classification,
+                                                           in_restricted_zone)
 
         # === METADATA ===
-        fusion_result['metadata'] = {
+        metadata = {
             'has_remote_id': bool(remote_id_data),
-            'has_position': bool(fusion_result['remote_id'].get('position')),
-            'has_operator_info': bool(fusion_result['remote_id'].get('operator')),
-            'detection_confidence': float(classification_result.get('confidence', 0)),
-            'overall_quality': self._compute_overall_quality(fusion_result)
+            'has_position': bool(position),
+            'has_operator_info': bool(remote_id.get('operator')),
+            'detection_confidence': confidence
+        }
+
+        # Une seule lecture d'horloge: les deux horodatages désignent le même instant
+        now = time.time()
+        fusion_result = {
+            'timestamp': datetime.fromtimestamp(now).isoformat(),
+            'timestamp_unix': now,
+            'detection': detection,
+            'classification': classification,
+            'remote_id': remote_id,
+            'threat_assessment': {
+                'level': threat_level,
+                'reasons': threat_reasons,
+                'in_restricted_zone': in_restricted_zone
+            },
+            'metadata': metadata
         }
+        # La qualité globale lit les sections déjà assemblées (dont metadata)
+        metadata['overall_quality'] = self._compute_overall_quality(fusion_result)
 
-        logger.info(f"Fusion complète: {fusion_result['classification']['brand']} "
-                   f"{fusion_result['classification']['model']}, "
-                   f"Menace: {threat_level}")
+        # Formatage différé: rien n'est construit si le niveau INFO est filtré
+        logger.info("Fusion complète: %s %s, Menace: %s",
+                    classification['brand'], classification['model'], threat_level)
 
         return fusion_result
 
@@ -253,7 +275,7 @@ class DataFusion:
         else:
             return 'poor'
 
-    def _compute_burst_intervals(self, bursts_list: list, sample_rate: float) -> list:
+    def _compute_burst_intervals(self, bursts_list: list, sample_rate: float) -> np.ndarray:
         """
         Calcule les intervalles entre rafales
 
@@ -262,17 +284,14 @@ class DataFusion:
             sample_rate: Taux d'échantillonnage
 
         Returns:
-            Liste des intervalles (secondes)
+            Tableau des intervalles (secondes)
         """
-        intervals = []
-
-        for i in range(1, len(bursts_list)):
-            prev_end = bursts_list[i-1][1]
-            curr_start = bursts_list[i][0]
-            interval = (curr_start - prev_end) / sample_rate
-            intervals.append(interval)
+        if len(bursts_list) < 2:
+            return np.empty(0)
 
-        return intervals
+        # Début de chaque rafale moins fin de la précédente, en une opération
+        bursts = np.asarray(bursts_list, dtype=np.float64)
+        return (bursts[1:, 0] - bursts[:-1, 1]) / sample_rate
 
     def _calculate_distance(self, lat1: float, lon1: float,
                           lat2: float, lon2: float) -> float:
@@ -303,13 +322,108 @@ class DataFusion:
 
         return distance
 
-    def _assess_threat(self, remote_id: Dict, classification: Dict) -> tuple:
+    def _build_zone_grid(self) -> tuple:
+        """
+        Construit l'index spatial des zones restreintes (grille lat/lon)
+
+        Chaque zone est inscrite dans toutes les cellules couvertes par sa
+        boîte englobante. Un test de position ne calcule ensuite les distances
+        qu'aux zones de sa cellule, au lieu de parcourir toutes les zones.
+        Les zones couvrant plus de ZONE_GRID_MAX_CELLS cellules ne sont pas
+        inscrites: elles sont ajoutées aux candidates de toutes les cellules.
+        Les colonnes sont repliées modulo 360°: une boîte qui franchit
+        l'antiméridien est inscrite des deux côtés.
+
+        Returns:
+            Tuple (grille, grandes zones): dictionnaire (ligne, colonne) ->
+            candidates de la cellule, et candidates hors grille (grandes zones).
+            Candidates = tuple (indices croissants, latitudes et longitudes des
+            centres en radians, rayons au carré), extrait une fois ici.
+        """
+        R = 6371000  # Rayon de la Terre en mètres
+        cell = self.ZONE_GRID_CELL_DEG
+
+        grid: Dict[tuple, List[int]] = {}
+        large: List[int] = []
+        for idx, zone in enumerate(self.restricted_zones):
+            lat, lon = zone['center_lat'], zone['center_lon']
+            dlat = math.degrees(zone['radius_km'] * 1000 / R)
+            # Demi-largeur en longitude prise à la latitude la plus proche du
+            # pôle (la plus large): la boîte contient tout le disque
+            cos_max = math.cos(math.radians(min(90.0, abs(lat) + dlat)))
+            dlon = 180.0 if cos_max < 1e-6 else min(180.0, dlat / cos_max)
+
+            rows = range(math.floor((lat - dlat) / cell), math.floor((lat + dlat) / cell) + 1)
+            ncols = self._zone_grid_cols
+            cols = sorted({j % ncols for j in range(self._zone_grid_col(lon - dlon),
+                                                    self._zone_grid_col(lon + dlon) + 1)})
+            if len(rows) * len(cols) > self.ZONE_GRID_MAX_CELLS:
+                large.append(idx)
+                continue
+            for i in rows:
+                for j in cols:
+                    grid.setdefault((i, j), []).append(idx)
+
+        def candidates(indices):
+            indices = np.array(sorted(indices), dtype=np.intp)
+            return (indices, self._zone_lat_rad[indices], self._zone_lon_rad[indices],
+                    self._zone_radius_sq[indices])
+
+        return ({key: candidates(indices + large) for key, indices in grid.items()},
+                candidates(large))
+
+    def _zone_grid_col(self, lon: float) -> int:
+        """
+        Colonne de la grille des zones pour une longitude (non repliée)
+
+        Args:
+            lon: Longitude (degrés)
+
+        Returns:
+            Indice de colonne, à replier modulo _zone_grid_cols
+        """
+        return math.floor((lon + 180.0) * self._zone_grid_cols / 360.0)
+
+    def _zone_distances_sq(self, lat: float, lon: float,
+                           zone_lat_rad: Optional[np.ndarray] = None,
+                           zone_lon_rad: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Carrés des distances d'un point aux centres des zones restreintes
+
+        Approximation équirectangulaire (Terre localement plane): pour des
+        zones de quelques km, l'écart avec la haversine reste sous le mètre,
+        pour un seul cosinus et sans racine carrée.
+
+        Args:
+            lat, lon: Coordonnées du point (degrés)
+            zone_lat_rad, zone_lon_rad: Centres (radians) des zones à évaluer
+                (toutes les zones si None)
+
+        Returns:
+            Distances au carré en m² (une par zone évaluée)
+        """
+        R = 6371000  # Rayon de la Terre en mètres
+
+        if zone_lat_rad is None:
+            zone_lat_rad, zone_lon_rad = self._zone_lat_rad, self._zone_lon_rad
+
+        lat_rad = math.radians(lat)
+        # Écart de longitude ramené dans [-π, π[ (zones à cheval sur ±180°)
+        dlon = (zone_lon_rad - math.radians(lon) + math.pi) % (2 * math.pi) - math.pi
+        dx = dlon * (R * math.cos(lat_rad))
+        dy = (zone_lat_rad - lat_rad) * R
+        return dx * dx + dy * dy
+
+    def _assess_threat(self, remote_id: Dict, classification: Dict,
+                       in_restricted_zone: Optional[bool] = None) -> tuple:
         """
         Évalue le niveau de menace
 
         Args:
             remote_id: Données Remote ID
             classification: Résultat de classification
+            in_restricted_zone: Résultat de _check_restricted_zone s'il est déjà
+                connu (sinon calculé ici)
 
         Returns:
             Tuple (level, reasons) où level = 'LOW'|'MEDIUM'|'HIGH'
@@ -329,7 +443,9 @@ class DataFusion:
 
         # Position dans zone restreinte
         position = remote_id.get('position')
-        if position and self._check_restricted_zone(position):
+        if in_restricted_zone is None:
+            in_restricted_zone = bool(position) and self._check_restricted_zone(position)
+        if in_restricted_zone:
             score += 50
             reasons.append("Drone dans zone restreinte")
 
@@ -381,20 +497,24 @@ class DataFusion:
         if not position or not position.get('latitude') or not position.get('longitude'):
             return False
 
-        lat = position['latitude']
-        lon = position['longitude']
+        lat, lon = position['latitude'], position['longitude']
 
-        for zone in self.restricted_zones:
-            distance = self._calculate_distance(
-                lat, lon,
-                zone['center_lat'], zone['center_lon']
-            )
+        # Zones candidates: celles inscrites dans la cellule de la position
+        cell = self.ZONE_GRID_CELL_DEG
+        indices, zone_lat_rad, zone_lon_rad, radius_sq = self._zone_grid.get(
+            (math.floor(lat / cell), self._zone_grid_col(lon) % self._zone_grid_cols),
+            self._zone_large)
+        if len(indices) == 0:
+            return False
 
-            if distance <= zone['radius_km'] * 1000:
-                logger.warning(f"Drone dans zone restreinte: {zone['name']}")
-                return True
+        # Test exact vectorisé sur les seules candidates (comparaison des carrés)
+        inside = indices[self._zone_distances_sq(lat, lon, zone_lat_rad, zone_lon_rad)
+                         <= radius_sq]
+        if len(inside) == 0:
+            return False
 
-        return False
+        logger.warning("Drone dans zone restreinte: %s", self.restricted_zones[inside[0]]['name'])
+        return True
 
     def _compute_overall_quality(self, fusion_result: Dict) -> float:
         """
@@ -521,8 +641,61 @@ def test_data_fusion():
     print(json.dumps(result, indent=2, ensure_ascii=False))
     print("="*70)
 
+    # Zone à cheval sur l'antiméridien: la distance équirectangulaire doit
+    # suivre la haversine (à 0.1 % près) de part et d'autre de ±180°
+    logger.info("\n--- Zone proche de l'antiméridien ---")
+    antimeridian = DataFusion({'data_fusion': {'restricted_zones': [
+        {'name': 'Antiméridien', 'center_lat': 10.0, 'center_lon': 179.9, 'radius_km': 30.0}
+    ]}})
+    for lat, lon in ((10.087, -179.979), (10.05, 179.95), (9.95, -179.99)):
+        approx = math.sqrt(antimeridian._zone_distances_sq(lat, lon)[0])
+        exact = antimeridian._calculate_distance(10.0, 179.9, lat, lon)
+        logger.info(f"({lat}, {lon}): équirectangulaire {approx:.1f} m, haversine {exact:.1f} m")
+        assert abs(approx - exact) < 1e-3 * exact, "Écart équirectangulaire/haversine > 0.1 %"
+
+    # Index en grille contre le test exhaustif (mêmes distances, toutes les
+    # zones) et contre la haversine, avec des zones aléatoires dont certaines
+    # franchissent l'antiméridien
+    logger.info("\n--- Index des zones contre haversine ---")
+    rng = np.random.default_rng(0)
+    zones = [{'name': f'Zone {i}',
+              'center_lat': float(rng.uniform(-60, 60)),
+              'center_lon': float(rng.choice([rng.uniform(-180, 180), rng.uniform(179, 180), rng.uniform(-180, -179)])),
+              'radius_km': float(rng.choice([0.5, 5.0, 30.0, 300.0]))}
+             for i in range(200)]
+    indexed = DataFusion({'data_fusion': {'restricted_zones': zones}})
+    mismatches = haversine_mismatches = checked = 0
+    logger.disabled = True  # un avertissement par position dans une zone
+    try:
+        for _ in range(6000):
+            zone = zones[rng.integers(len(zones))]
+            # Point à une distance aléatoire (0-1.5 rayon) du centre de la zone
+            r = zone['radius_km'] * 1000 * rng.uniform(0, 1.5) / 6371000
+            t = rng.uniform(0, 2 * np.pi)
+            lat = zone['center_lat'] + math.degrees(r * math.cos(t))
+            lon = zone['center_lon'] + math.degrees(r * math.sin(t)) / math.cos(math.radians(lat))
+            lon = (lon + 180.0) % 360.0 - 180.0
+
+            inside = indexed._check_restricted_zone({'latitude': lat, 'longitude': lon})
+            mismatches += inside != bool(np.any(indexed._zone_distances_sq(lat, lon)
+                                                <= indexed._zone_radius_sq))
+
+            ratios = [indexed._calculate_distance(z['center_lat'], z['center_lon'], lat, lon)
+                      / (z['radius_km'] * 1000) for z in zones]
+            if any(0.98 < q < 1.02 for q in ratios):
+                continue  # bord de zone: écart d'approximation (zones de 300 km) toléré
+            checked += 1
+            haversine_mismatches += inside != any(q <= 1.0 for q in ratios)
+    finally:
+        logger.disabled = False
+    logger.info(f"Écarts: {mismatches} contre le test exhaustif, "
+                f"{haversine_mismatches}/{checked} contre la haversine")
+    assert mismatches == 0, "Index des zones en désaccord avec le test exhaustif"
+    assert haversine_mismatches == 0, "Index des zones en désaccord avec la haversine"
+
     logger.info("\nTest terminé")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     test_data_fusion()
@@ -6,14 +6,36 @@ Publication des détections vers un broker MQTT
 import paho.mqtt.client as mqtt
 import json
 import logging
-from typing import Dict, Optional, Callable
+import math
+from typing import Dict, List, Optional, Callable
 import time
+import threading
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _dumps(obj) -> bytes:
+    """
+    Sérialise une charge utile JSON en UTF-8 (orjson si disponible)
+
+    Args:
+        obj: Objet à sérialiser (dict, listes, scalaires et tableaux NumPy acceptés par orjson)
+
+    Returns:
+        Octets JSON encodés en UTF-8
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
 class MQTTPublisher:
     """
     Classe pour publier les détections de drones vers un broker MQTT
@@ -22,6 +44,7 @@ class MQTTPublisher:
     # Topics MQTT par défaut
     TOPICS = {
         'detection': 'drone/detection',
+        'detections': 'drone/detections',
         'position': 'drone/position',
         'classification': 'drone/classification',
         'alert': 'drone/alert',
@@ -34,6 +57,16 @@ class MQTTPublisher:
     QOS_ALERT = 2      # Exactly once
     QOS_HEALTH = 0     # At most once
 
+    # Champs de la section 'detection' quantifiés en int16 (quantize=True):
+    # valeur = round(champ / échelle), perte < 0.01 dB / 0.01 MHz
+    QUANTIZED_FIELDS = (
+        ('snr', 0.01),            # dB, ±327 dB
+        ('bandwidth_mhz', 0.01),  # MHz, ±327 MHz
+        ('rssi_dbm', 0.01),       # dBm
+        ('peak_power_db', 0.01),  # dB
+        ('duration_ms', 0.01),    # ms, ±327 ms
+    )
+
     def __init__(self,
                  broker_host: str = "localhost",
                  broker_port: int = 1883,
@@ -43,7 +76,8 @@ class MQTTPublisher:
                  use_tls: bool = False,
                  topics: Optional[Dict] = None,
                  qos: Optional[Dict] = None,
-                 retain: bool = False):
+                 retain: bool = False,
+                 quantize: bool = False):
         """
         Initialise le publisher MQTT
 
@@ -54,6 +88,8 @@ class MQTTPublisher:
             username: Nom d'utilisateur (optionnel)
             password: Mot de passe (optionnel)
             use_tls: Utiliser TLS/SSL
+            quantize: Publier les mesures de détection en int16 (QUANTIZED_FIELDS),
+                      les échelles étant publiées (retenues) sur <detection>/scales
         """
         self.broker_host = broker_host
         self.broker_port = broker_port
@@ -69,6 +105,7 @@ class MQTTPublisher:
             'health': 0
         }
         self.retain = retain
+        self.quantize = quantize
 
         # Création du client MQTT
         self.client = mqtt.Client(client_id=client_id, protocol=mqtt.MQTTv311)
@@ -78,8 +115,16 @@ class MQTTPublisher:
         self.client.on_disconnect = self._on_disconnect
         self.client.on_publish = self._on_publish
 
-        # État de connexion
+        # Une seule connexion pour toute la durée du processus: les messages sont
+        # mis en file côté client et écrits par le thread réseau (loop_start),
+        # la reconnexion est automatique
+        self.client.max_inflight_messages_set(100)
+        self.client.max_queued_messages_set(1000)
+        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+
+        # État de connexion (l'Event permet d'attendre la connexion sans sondage)
         self.connected = False
+        self._connected_event = threading.Event()
         self.last_publish_time = None
 
         logger.info(f"MQTT Publisher initialisé: {broker_host}:{broker_port}")
@@ -90,10 +135,15 @@ class MQTTPublisher:
         """
         if rc == 0:
             self.connected = True
+            self._connected_event.set()
             logger.info(f"Connecté au broker MQTT: {self.broker_host}:{self.broker_port}")
 
             # Publication d'un message de statut
             self._publish_health_status("connected")
+
+            # En-tête de quantification (retenu: disponible pour tout nouvel abonné)
+            if self.quantize:
+                self._publish_quantization_header()
         else:
             self.connected = False
             logger.error(f"Échec de connexion au broker MQTT, code: {rc}")
@@ -103,6 +153,7 @@ class MQTTPublisher:
         Callback appelé lors de la déconnexion du broker
         """
         self.connected = False
+        self._connected_event.clear()
         if rc != 0:
             logger.warning(f"Déconnexion inattendue du broker MQTT, code: {rc}")
         else:
@@ -112,15 +163,23 @@ class MQTTPublisher:
         """
         Callback appelé après publication d'un message
         """
-        logger.debug(f"Message publié, ID: {mid}")
+        logger.debug("Message publié, ID: %d", mid)
         self.last_publish_time = time.time()
 
-    def connect(self) -> bool:
+    def connect(self, wait: bool = True) -> bool:
         """
         Connecte au broker MQTT
 
+        La connexion est établie par le thread réseau (loop_start): avec
+        wait=False, l'appelant poursuit immédiatement (acquisition, DSP) pendant
+        la poignée de main TCP/MQTT; `connected` passe à True dans on_connect.
+
+        Args:
+            wait: Attendre la connexion (5 secondes au plus)
+
         Returns:
-            True si la connexion réussit
+            True si la connexion est établie (toujours False avec wait=False
+            tant que le broker n'a pas répondu)
         """
         try:
             # Configuration de l'authentification
@@ -133,16 +192,14 @@ class MQTTPublisher:
 
             # Connexion
             logger.info(f"Connexion au broker MQTT {self.broker_host}:{self.broker_port}...")
-            self.client.connect(self.broker_host, self.broker_port, keepalive=60)
+            self.client.connect_async(self.broker_host, self.broker_port, keepalive=60)
 
             # Démarrage de la boucle réseau (non-bloquante)
             self.client.loop_start()
 
             # Attente de la connexion (max 5 secondes)
-            timeout = 5
-            start_time = time.time()
-            while not self.connected and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
+            if wait:
+                self._connected_event.wait(timeout=5)
 
             return self.connected
 
@@ -181,7 +238,8 @@ class MQTTPublisher:
         try:
             # Publication de la détection complète
             topic = self.topics['detection']
-            payload = json.dumps(detection_data, ensure_ascii=False)
+            payload = _dumps(self._quantize_detection(detection_data) if self.quantize
+                             else detection_data)
 
             result = self.client.publish(topic, payload, qos=self.qos.get('detection', 1), retain=self.retain)
 
@@ -206,6 +264,98 @@ class MQTTPublisher:
             logger.error(f"Erreur lors de la publication: {e}")
             return False
 
+    def publish_detection_batch(self, detections: List[Dict]) -> bool:
+        """
+        Publie plusieurs détections en un seul message
+
+        Les détections sont regroupées dans {"detections": [...]} sur le topic
+        dédié 'detections' (drone/detections par défaut, un seul aller-retour
+        PUBACK); le topic 'detection' garde le format unitaire. Position,
+        classification et alertes restent publiées par détection sur leurs topics.
+
+        Args:
+            detections: Liste de données de détection fusionnées
+
+        Returns:
+            True si la publication réussit
+        """
+        if not detections:
+            return True
+
+        if not self.connected:
+            logger.warning("Non connecté au broker MQTT")
+            return False
+
+        try:
+            topic = self.topics.get('detections', self.TOPICS['detections'])
+            if self.quantize:
+                payload = _dumps({'detections': [self._quantize_detection(d) for d in detections]})
+            else:
+                payload = _dumps({'detections': detections})
+
+            result = self.client.publish(topic, payload, qos=self.qos.get('detection', 1), retain=self.retain)
+
+            if result.rc != mqtt.MQTT_ERR_SUCCESS:
+                logger.error(f"Échec de publication, code: {result.rc}")
+                return False
+
+            logger.info(f"{len(detections)} détections publiées sur {topic}")
+
+            for detection_data in detections:
+                self._publish_position(detection_data)
+                self._publish_classification(detection_data)
+
+                threat_level = detection_data.get('threat_assessment', {}).get('level')
+                if threat_level in ['HIGH', 'MEDIUM']:
+                    self._publish_alert(detection_data)
+
+            return True
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la publication: {e}")
+            return False
+
+    def _publish_quantization_header(self):
+        """
+        Publie les champs et échelles de quantification (message retenu)
+        """
+        header = {
+            'fields': [name for name, _ in self.QUANTIZED_FIELDS],
+            'scales': [scale for _, scale in self.QUANTIZED_FIELDS],
+            'dtype': 'int16'
+        }
+        self.client.publish(self.topics['detection'] + '/scales', _dumps(header),
+                            qos=1, retain=True)
+
+    def _quantize_detection(self, detection_data: Dict) -> Dict:
+        """
+        Remplace les mesures de la section 'detection' par leurs valeurs int16
+
+        Les valeurs sont regroupées dans detection['quantized'], alignées sur
+        QUANTIZED_FIELDS (null si absent ou NaN, saturées à ±32767 au-delà de
+        la plage, SNR infini compris); le dictionnaire d'origine n'est pas modifié.
+
+        Args:
+            detection_data: Données de détection fusionnées
+
+        Returns:
+            Copie de detection_data avec la section 'detection' quantifiée
+        """
+        detection = dict(detection_data.get('detection', {}))
+        quantized = []
+        for name, scale in self.QUANTIZED_FIELDS:
+            value = detection.pop(name, None)
+            if value is None or math.isnan(value):
+                quantized.append(None)
+            else:
+                # Saturation avant l'arrondi: round() échoue sur ±inf
+                quantized.append(int(round(min(32767.0, max(-32768.0, value / scale)))))
+        detection['quantized'] = quantized
+
+        result = dict(detection_data)
+        result['detection'] = detection
+        return result
+
     def _publish_position(self, detection_data: Dict):
         """
         Publie les données de position
@@ -231,7 +381,7 @@ class MQTTPublisher:
         }
 
         topic = self.topics['position']
-        payload = json.dumps(position_data, ensure_ascii=False)
+        payload = _dumps(position_data)
 
         self.client.publish(topic, payload, qos=self.qos.get('position', 1), retain=self.retain)
         logger.debug(f"Position publiée sur {topic}")
@@ -256,7 +406,7 @@ class MQTTPublisher:
         }
 
         topic = self.topics['classification']
-        payload = json.dumps(classification_data, ensure_ascii=False)
+        payload = _dumps(classification_data)
 
         self.client.publish(topic, payload, qos=self.qos.get('detection', 1), retain=self.retain)
         logger.debug(f"Classification publiée sur {topic}")
@@ -287,17 +437,18 @@ class MQTTPublisher:
         }
 
         topic = self.topics['alert']
-        payload = json.dumps(alert_data, ensure_ascii=False)
+        payload = _dumps(alert_data)
 
         self.client.publish(topic, payload, qos=self.qos.get('alert', 2), retain=self.retain)
         logger.warning(f"ALERTE publiée: {threat.get('level')} - {', '.join(threat.get('reasons', []))}")
 
-    def _publish_health_status(self, status: str):
+    def _publish_health_status(self, status: str, stats: Optional[Dict] = None):
         """
         Publie le statut de santé du système
 
         Args:
             status: Statut ('connected', 'disconnected', 'running', etc.)
+            stats: Statistiques supplémentaires à inclure (optionnel)
         """
         health_data = {
             'timestamp': datetime.now().isoformat(),
@@ -306,24 +457,29 @@ class MQTTPublisher:
             'connected': self.connected,
             'last_publish': self.last_publish_time
         }
+        if stats:
+            health_data.update(stats)
 
         topic = self.topics['health']
-        payload = json.dumps(health_data)
+        payload = _dumps(health_data)
 
         self.client.publish(topic, payload, qos=self.qos.get('health', 0), retain=self.retain)
         logger.debug(f"Health status publié: {status}")
 
-    def publish_heartbeat(self):
+    def publish_heartbeat(self, stats: Optional[Dict] = None):
         """
         Publie un heartbeat pour indiquer que le système fonctionne
+
+        Args:
+            stats: Statistiques du système à joindre (optionnel)
         """
-        self._publish_health_status("running")
+        self._publish_health_status("running", stats)
 
     def set_will(self):
         """
         Configure le Last Will and Testament (message en cas de déconnexion inattendue)
         """
-        will_payload = json.dumps({
+        will_payload = _dumps({
             'timestamp': datetime.now().isoformat(),
             'status': 'disconnected_unexpectedly',
             'client_id': self.client_id
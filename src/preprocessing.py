@@ -5,26 +5,231 @@ Nettoyage et normalisation des signaux I/Q
 
 import numpy as np
 from scipy import signal
+from collections import deque
 from typing import Tuple, Optional
 import logging
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _compute_snr_kernel(re: np.ndarray, im: np.ndarray) -> Tuple[float, float]:
+    """
+    Puissances moyennes signal (moitié centrale) / bruit (quarts extrêmes)
+    en une seule passe, sans tableau temporaire
+
+    Args:
+        re: Composante I
+        im: Composante Q
+
+    Returns:
+        Tuple (signal_power, noise_power)
+    """
+    n = re.shape[0]
+    mid = n // 2
+    quarter = n // 4
+
+    signal_sum = 0.0
+    noise_sum = 0.0
+    for i in prange(n):
+        p = re[i] * re[i] + im[i] * im[i]
+        if mid - quarter <= i < mid + quarter:
+            signal_sum += p
+        elif i < quarter or i >= n - quarter:
+            noise_sum += p
+
+    return signal_sum / (2 * quarter), noise_sum / (2 * quarter)
+
+
+def _compute_snr_kernel_c64(iq: np.ndarray) -> Tuple[float, float]:
+    """
+    Variante de _compute_snr_kernel pour un tableau complex64 contigu
+
+    Lit directement les échantillons complexes (pas de vues real/imag à pas
+    de 8 octets), ce qui permet la vectorisation de l'accumulateur.
+
+    Args:
+        iq: Échantillons I/Q complex64 contigus
+
+    Returns:
+        Tuple (signal_power, noise_power)
+    """
+    n = iq.shape[0]
+    mid = n // 2
+    quarter = n // 4
+
+    signal_sum = 0.0
+    noise_sum = 0.0
+    for i in prange(n):
+        p = iq[i].real * iq[i].real + iq[i].imag * iq[i].imag
+        if mid - quarter <= i < mid + quarter:
+            signal_sum += p
+        elif i < quarter or i >= n - quarter:
+            noise_sum += p
+
+    return signal_sum / (2 * quarter), noise_sum / (2 * quarter)
+
+
+def _iq_moments_kernel(iq: np.ndarray) -> Tuple[float, float, float, float, float]:
+    """
+    Moments d'ordre 1 et 2 de I et Q en une seule passe
+
+    Suffisent à estimer le DC offset et la correction I/Q (gain et phase)
+    sans relire le bloc ni créer de tableau intermédiaire.
+
+    Args:
+        iq: Échantillons I/Q complex64 contigus
+
+    Returns:
+        Tuple (E[I], E[Q], E[I²], E[Q²], E[IQ])
+    """
+    n = iq.shape[0]
+    sum_i = 0.0
+    sum_q = 0.0
+    sum_ii = 0.0
+    sum_qq = 0.0
+    sum_iq = 0.0
+    for k in prange(n):
+        i = np.float64(iq[k].real)
+        q = np.float64(iq[k].imag)
+        sum_i += i
+        sum_q += q
+        sum_ii += i * i
+        sum_qq += q * q
+        sum_iq += i * q
+
+    return sum_i / n, sum_q / n, sum_ii / n, sum_qq / n, sum_iq / n
+
+
+def _dc_iq_apply_kernel(iq: np.ndarray,
+                        dc_i: float,
+                        dc_q: float,
+                        gain: float,
+                        phase: float) -> None:
+    """
+    Applique en place, en une seule passe, DC offset et correction I/Q
+
+    I' = I - dc_i ; Q' = gain * (Q - dc_q) - phase * I'
+
+    Args:
+        iq: Échantillons I/Q complex64 contigus (modifiés)
+        dc_i: DC offset de la voie I
+        dc_q: DC offset de la voie Q
+        gain: Correction d'amplitude de la voie Q
+        phase: Correction de phase (Gram-Schmidt)
+    """
+    for k in prange(iq.shape[0]):
+        i = iq[k].real - dc_i
+        q = gain * (iq[k].imag - dc_q) - phase * i
+        iq[k] = complex(i, q)
+
+
+def _mean_power_kernel(iq: np.ndarray) -> float:
+    """
+    Puissance moyenne E[|x|²] (accumulateur float64, sans temporaire)
+
+    Args:
+        iq: Échantillons I/Q complex64 contigus
+
+    Returns:
+        Puissance moyenne
+    """
+    n = iq.shape[0]
+    acc = 0.0
+    for k in prange(n):
+        acc += iq[k].real * iq[k].real + iq[k].imag * iq[k].imag
+
+    return acc / n
+
+
+def _sosfilt_inplace_kernel(sos: np.ndarray, iq: np.ndarray, zi: np.ndarray) -> None:
+    """
+    Cascade de biquads (forme directe II transposée) appliquée en place
+
+    Boucle externe sur les échantillons: les états de toutes les sections
+    restent en registres et le bloc n'est parcouru qu'une fois. Les
+    coefficients étant réels, I et Q sont filtrés ensemble.
+
+    Args:
+        sos: Coefficients SOS float32 (sections x 6)
+        iq: Échantillons I/Q complex64 contigus (modifiés)
+        zi: État complex64 (sections x 2), mis à jour en place
+    """
+    num_sections = sos.shape[0]
+    for k in range(iq.shape[0]):
+        y = iq[k]
+        for s in range(num_sections):
+            x = y
+            y = sos[s, 0] * x + zi[s, 0]
+            zi[s, 0] = sos[s, 1] * x - sos[s, 4] * y + zi[s, 1]
+            zi[s, 1] = sos[s, 2] * x - sos[s, 5] * y
+        iq[k] = y
+
+
+# nogil: les noyaux relâchent le GIL, le thread producteur d'acquisition et
+# la publication MQTT continuent pendant le prétraitement
+if njit is not None:
+    _compute_snr_kernel = njit(cache=True, fastmath=True, parallel=True, nogil=True)(_compute_snr_kernel)
+    # Signature explicite: compilée une fois (et mise en cache) pour le format des
+    # échantillons UHD (fc32 -> complex64 contigu)
+    _compute_snr_kernel_c64 = njit('UniTuple(float64, 2)(complex64[::1])', cache=True,
+                                   fastmath=True, parallel=True, nogil=True,
+                                   boundscheck=False)(_compute_snr_kernel_c64)
+    # Passes fusionnées de process() (DC + I/Q, puis normalisation RMS)
+    _iq_moments_kernel = njit('UniTuple(float64, 5)(complex64[::1])', cache=True,
+                              fastmath=True, parallel=True, nogil=True)(_iq_moments_kernel)
+    _dc_iq_apply_kernel = njit('void(complex64[::1], float64, float64, float64, float64)',
+                               cache=True, fastmath=True, parallel=True,
+                               nogil=True)(_dc_iq_apply_kernel)
+    _mean_power_kernel = njit('float64(complex64[::1])', cache=True,
+                              fastmath=True, parallel=True, nogil=True)(_mean_power_kernel)
+    # Récurrence IIR séquentielle: pas de parallel/prange
+    _sosfilt_inplace_kernel = njit('void(float32[:, ::1], complex64[::1], complex64[:, ::1])',
+                                   cache=True, fastmath=True, nogil=True,
+                                   boundscheck=False)(_sosfilt_inplace_kernel)
+
+
 class SignalPreprocessor:
     """
     Classe pour le prétraitement des signaux I/Q
     """
 
-    def __init__(self, sample_rate: float = 25e6):
+    # Détecteur d'énergie: blocs de calibration initiale, historique glissant
+    # du plancher de bruit et percentile retenu comme plancher
+    NOISE_FLOOR_CALIBRATION_BLOCKS = 10
+    NOISE_FLOOR_HISTORY_BLOCKS = 200
+    NOISE_FLOOR_PERCENTILE = 10
+
+    def __init__(self,
+                 sample_rate: float = 25e6,
+                 bandpass_range: Optional[Tuple[float, float]] = None):
         """
         Initialise le préprocesseur
 
         Args:
             sample_rate: Taux d'échantillonnage en Hz
+            bandpass_range: Tuple (freq_low, freq_high) du filtre passe-bande par
+                            défaut de process(), conçu une seule fois ici
         """
         self.sample_rate = sample_rate
+
+        # Cache des filtres conçus: (low, high, order) -> SOS (ou None si invalide)
+        self._sos_cache = {}
+
+        # Filtre passe-bande par défaut (None: pas de filtrage par défaut)
+        self._sos = self.design_bandpass(*bandpass_range) if bandpass_range is not None else None
+
+        # Détecteur d'énergie: puissances récentes des blocs bruts (dB)
+        self._gate_powers = deque(maxlen=self.NOISE_FLOOR_HISTORY_BLOCKS)
+        self.noise_floor_db = None
+        self.gated_blocks = 0
+
         logger.info(f"Préprocesseur initialisé avec fs={sample_rate/1e6:.2f} MS/s")
 
     def remove_dc_offset(self, iq_samples: np.ndarray) -> np.ndarray:
@@ -37,15 +242,27 @@ class SignalPreprocessor:
         Returns:
             Signal corrigé
         """
+        return self._remove_dc_offset_inplace(iq_samples.copy())
+
+    def _remove_dc_offset_inplace(self, iq_samples: np.ndarray) -> np.ndarray:
+        """
+        Supprime le DC offset en place
+
+        Args:
+            iq_samples: Échantillons I/Q complexes (modifiés)
+
+        Returns:
+            iq_samples
+        """
         # Calcul de la moyenne (DC offset)
         dc_offset = np.mean(iq_samples)
 
         # Soustraction du DC offset
-        corrected = iq_samples - dc_offset
+        iq_samples -= dc_offset
 
         logger.debug(f"DC offset supprimé: {np.abs(dc_offset):.6f}")
 
-        return corrected
+        return iq_samples
 
     def correct_iq_imbalance(self, iq_samples: np.ndarray) -> np.ndarray:
         """
@@ -57,9 +274,21 @@ class SignalPreprocessor:
         Returns:
             Signal corrigé
         """
-        # Extraction des composantes I et Q
-        i_component = np.real(iq_samples)
-        q_component = np.imag(iq_samples)
+        return self._correct_iq_imbalance_inplace(iq_samples.copy())
+
+    def _correct_iq_imbalance_inplace(self, iq_samples: np.ndarray) -> np.ndarray:
+        """
+        Corrige les déséquilibres I/Q en place (la voie Q est modifiée)
+
+        Args:
+            iq_samples: Échantillons I/Q complexes (modifiés)
+
+        Returns:
+            iq_samples
+        """
+        # Vues sur les composantes I et Q (pas de copie)
+        i_component = iq_samples.real
+        q_component = iq_samples.imag
 
         # Correction d'amplitude: normalisation des variances
         i_std = np.std(i_component)
@@ -67,7 +296,7 @@ class SignalPreprocessor:
 
         if q_std > 0:
             gain_correction = i_std / q_std
-            q_component = q_component * gain_correction
+            q_component *= gain_correction
         else:
             gain_correction = 1.0
 
@@ -77,33 +306,76 @@ class SignalPreprocessor:
 
         if i_variance > 0:
             phase_correction = correlation / i_variance
-            q_component = q_component - phase_correction * i_component
+            q_component -= phase_correction * i_component
         else:
             phase_correction = 0
 
-        corrected = i_component + 1j * q_component
-
         logger.debug(f"IQ correction - Gain: {gain_correction:.4f}, Phase: {phase_correction:.6f}")
 
-        return corrected
+        return iq_samples
 
-    def bandpass_filter(self,
-                       iq_samples: np.ndarray,
-                       low_freq: float,
-                       high_freq: float,
-                       order: int = 6) -> np.ndarray:
+    def _dc_iq_fused_inplace(self,
+                             iq_samples: np.ndarray,
+                             enable_dc_removal: bool,
+                             enable_iq_correction: bool) -> np.ndarray:
         """
-        Applique un filtre passe-bande Butterworth
+        DC offset et correction I/Q en place, en deux passes compilées (Numba)
+
+        Mêmes corrections que _remove_dc_offset_inplace suivi de
+        _correct_iq_imbalance_inplace, déduites des moments de I et Q.
+
+        Args:
+            iq_samples: Échantillons I/Q complex64 contigus (modifiés)
+            enable_dc_removal: Activer la suppression du DC offset
+            enable_iq_correction: Activer la correction I/Q
+
+        Returns:
+            iq_samples
+        """
+        mean_i, mean_q, mean_ii, mean_qq, mean_iq = _iq_moments_kernel(iq_samples)
+
+        dc_i, dc_q = (mean_i, mean_q) if enable_dc_removal else (0.0, 0.0)
+        gain = 1.0
+        phase = 0.0
+
+        if enable_iq_correction:
+            var_i = max(mean_ii - mean_i * mean_i, 0.0)
+            var_q = max(mean_qq - mean_q * mean_q, 0.0)
+
+            if var_q > 0:
+                gain = np.sqrt(var_i / var_q)
+
+            # E[I' * gain*(Q - dc_q)], I' = I - dc_i
+            correlation = gain * (mean_iq - dc_i * mean_q - dc_q * mean_i + dc_i * dc_q)
+            if var_i > 0:
+                phase = correlation / var_i
+
+            logger.debug(f"IQ correction - Gain: {gain:.4f}, Phase: {phase:.6f}")
+
+        _dc_iq_apply_kernel(iq_samples, dc_i, dc_q, gain, phase)
+
+        return iq_samples
+
+    def design_bandpass(self,
+                        low_freq: float,
+                        high_freq: float,
+                        order: int = 6) -> Optional[np.ndarray]:
+        """
+        Conçoit un filtre passe-bande Butterworth (une seule fois par jeu de paramètres)
 
         Args:
-            iq_samples: Échantillons I/Q complexes
             low_freq: Fréquence basse de coupure (Hz)
             high_freq: Fréquence haute de coupure (Hz)
             order: Ordre du filtre
 
         Returns:
-            Signal filtré
+            Coefficients SOS (float32, pour garder un signal complex64 en
+            complex64), ou None si les fréquences sont invalides
         """
+        key = (float(low_freq), float(high_freq), int(order))
+        if key in self._sos_cache:
+            return self._sos_cache[key]
+
         # Normalisation des fréquences par rapport à la fréquence de Nyquist
         nyquist = self.sample_rate / 2.0
         low = low_freq / nyquist
@@ -112,16 +384,98 @@ class SignalPreprocessor:
         # Vérification des bornes
         if low <= 0 or high >= 1:
             logger.warning(f"Fréquences de coupure invalides: {low_freq/1e6:.2f}-{high_freq/1e6:.2f} MHz")
-            return iq_samples
+            sos = None
+        else:
+            sos = signal.butter(order, [low, high], btype='band', output='sos').astype(np.float32)
 
-        # Création du filtre Butterworth
-        sos = signal.butter(order, [low, high], btype='band', output='sos')
+        self._sos_cache[key] = sos
+        return sos
 
-        # Application du filtre (traitement séparé de I et Q)
-        i_filtered = signal.sosfilt(sos, np.real(iq_samples))
-        q_filtered = signal.sosfilt(sos, np.imag(iq_samples))
+    def init_filter_state(self, sos: np.ndarray) -> np.ndarray:
+        """
+        Crée un état initial (nul) pour un filtrage continu entre acquisitions
+
+        Args:
+            sos: Coefficients SOS du filtre
 
-        filtered = i_filtered + 1j * q_filtered
+        Returns:
+            État zi complexe, mis à jour en place par apply_sos
+        """
+        return np.zeros((sos.shape[0], 2), dtype=np.complex64)
+
+    def apply_sos(self,
+                  iq_samples: np.ndarray,
+                  sos: np.ndarray,
+                  zi: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Applique un filtre SOS précalculé
+
+        Les coefficients étant réels, le signal complexe est filtré directement
+        (équivalent au filtrage séparé de I et Q).
+
+        Args:
+            iq_samples: Échantillons I/Q complexes
+            sos: Coefficients SOS du filtre
+            zi: État du filtre (optionnel), mis à jour en place
+
+        Returns:
+            Signal filtré
+        """
+        if zi is None:
+            return signal.sosfilt(sos, iq_samples)
+
+        filtered, zf = signal.sosfilt(sos, iq_samples, zi=zi)
+        zi[...] = zf
+        return filtered
+
+    def _apply_sos_inplace(self,
+                           iq_samples: np.ndarray,
+                           sos: np.ndarray,
+                           zi: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Applique un filtre SOS float32 en place via le noyau Numba
+
+        Même résultat que apply_sos (aux arrondis float32 près), sans
+        allocation de la sortie.
+
+        Args:
+            iq_samples: Échantillons I/Q complex64 contigus (modifiés)
+            sos: Coefficients SOS float32 (design_bandpass)
+            zi: État complex64 du filtre (optionnel), mis à jour en place
+
+        Returns:
+            iq_samples
+        """
+        if zi is None:
+            zi = self.init_filter_state(sos)
+
+        _sosfilt_inplace_kernel(np.ascontiguousarray(sos), iq_samples, zi)
+
+        return iq_samples
+
+    def bandpass_filter(self,
+                       iq_samples: np.ndarray,
+                       low_freq: float,
+                       high_freq: float,
+                       order: int = 6) -> np.ndarray:
+        """
+        Applique un filtre passe-bande Butterworth
+
+        Args:
+            iq_samples: Échantillons I/Q complexes
+            low_freq: Fréquence basse de coupure (Hz)
+            high_freq: Fréquence haute de coupure (Hz)
+            order: Ordre du filtre
+
+        Returns:
+            Signal filtré
+        """
+        # Création du filtre Butterworth (mis en cache)
+        sos = self.design_bandpass(low_freq, high_freq, order)
+        if sos is None:
+            return iq_samples
+
+        filtered = self.apply_sos(iq_samples, sos)
 
         logger.debug(f"Filtre passe-bande appliqué: {low_freq/1e6:.2f}-{high_freq/1e6:.2f} MHz, ordre {order}")
 
@@ -150,14 +504,11 @@ class SignalPreprocessor:
             logger.warning(f"Fréquence de coupure invalide: {cutoff_freq/1e6:.2f} MHz")
             return iq_samples
 
-        # Création du filtre
-        sos = signal.butter(order, normalized_cutoff, btype='low', output='sos')
+        # Création du filtre (simple précision, comme design_bandpass)
+        sos = signal.butter(order, normalized_cutoff, btype='low', output='sos').astype(np.float32)
 
-        # Application
-        i_filtered = signal.sosfilt(sos, np.real(iq_samples))
-        q_filtered = signal.sosfilt(sos, np.imag(iq_samples))
-
-        filtered = i_filtered + 1j * q_filtered
+        # Application directe sur le signal complexe: pas de passage par complex128
+        filtered = signal.sosfilt(sos, iq_samples)
 
         logger.debug(f"Filtre passe-bas appliqué: {cutoff_freq/1e6:.2f} MHz, ordre {order}")
 
@@ -178,7 +529,7 @@ class SignalPreprocessor:
         """
         if method == 'rms':
             # Normalisation RMS (Root Mean Square)
-            rms_value = np.sqrt(np.mean(np.abs(iq_samples)**2))
+            rms_value = np.sqrt(np.mean(iq_samples.real**2 + iq_samples.imag**2))
             if rms_value > 0:
                 normalized = iq_samples / rms_value
             else:
@@ -211,6 +562,39 @@ class SignalPreprocessor:
 
         return normalized
 
+    def _normalize_inplace(self,
+                           iq_samples: np.ndarray,
+                           method: str = 'rms') -> np.ndarray:
+        """
+        Normalise le signal en place (mêmes méthodes que normalize_signal)
+
+        Args:
+            iq_samples: Échantillons I/Q complexes (modifiés)
+            method: Méthode de normalisation ('rms', 'peak', 'minmax')
+
+        Returns:
+            iq_samples
+        """
+        if method == 'rms':
+            if njit is not None and iq_samples.dtype == np.complex64 and iq_samples.flags.c_contiguous:
+                scale = np.sqrt(_mean_power_kernel(iq_samples))
+            else:
+                scale = np.sqrt(np.mean(iq_samples.real**2 + iq_samples.imag**2))
+        elif method in ('peak', 'minmax'):
+            scale = np.max(np.abs(iq_samples))
+        else:
+            logger.warning(f"Méthode de normalisation inconnue: {method}")
+            return iq_samples
+
+        if scale > 0:
+            iq_samples /= scale
+        else:
+            logger.warning(f"Normalisation '{method}' ignorée: valeur nulle")
+
+        logger.debug(f"Signal normalisé avec méthode '{method}'")
+
+        return iq_samples
+
     def decimate(self,
                 iq_samples: np.ndarray,
                 decimation_factor: int) -> np.ndarray:
@@ -229,6 +613,7 @@ class SignalPreprocessor:
 
         # Décimation avec filtre anti-repliement
         decimated = signal.decimate(iq_samples, decimation_factor, ftype='iir', zero_phase=True)
+        decimated = decimated.astype(iq_samples.dtype, copy=False)
 
         new_rate = self.sample_rate / decimation_factor
         logger.debug(f"Signal décimé par {decimation_factor}: "
@@ -241,43 +626,164 @@ class SignalPreprocessor:
                enable_dc_removal: bool = True,
                enable_iq_correction: bool = True,
                bandpass_range: Optional[Tuple[float, float]] = None,
-               normalize_method: str = 'rms') -> np.ndarray:
+               normalize_method: str = 'rms',
+               sos: Optional[np.ndarray] = None,
+               zi: Optional[np.ndarray] = None,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Pipeline complet de prétraitement
 
+        DC, correction I/Q et normalisation sont appliqués en place dans un
+        seul buffer de travail complex64 (out s'il est fourni): les
+        échantillons d'entrée ne sont jamais modifiés.
+
         Args:
             iq_samples: Échantillons I/Q bruts
             enable_dc_removal: Activer la suppression du DC offset
             enable_iq_correction: Activer la correction I/Q
             bandpass_range: Tuple (freq_low, freq_high) pour le filtre passe-bande
             normalize_method: Méthode de normalisation
+            sos: Filtre précalculé (design_bandpass), prioritaire sur bandpass_range.
+                 Sans sos ni bandpass_range, le filtre du constructeur est utilisé.
+            zi: État du filtre sos conservé d'un appel à l'autre (mis à jour en place)
+            out: Buffer complex64 de même taille que iq_samples, réutilisé
+                 d'un appel à l'autre (alloué si None)
 
         Returns:
-            Signal prétraité
+            Signal prétraité (out s'il est fourni)
         """
         logger.info(f"Démarrage du prétraitement ({len(iq_samples)} échantillons)")
 
-        processed = iq_samples.copy()
+        # Copie en complex64 dans le buffer de travail: tout le pipeline
+        # reste en simple précision
+        if out is None:
+            out = np.empty(len(iq_samples), dtype=np.complex64)
+        out[...] = iq_samples
+        processed = out
+
+        # Bloc vide: rien à estimer (les moments diviseraient par zéro)
+        if len(out) == 0:
+            return out
+
+        # 1-2. Suppression DC offset et correction I/Q
+        if njit is not None and (enable_dc_removal or enable_iq_correction):
+            # Noyaux Numba: une passe de moments + une passe d'application
+            self._dc_iq_fused_inplace(processed, enable_dc_removal, enable_iq_correction)
+        else:
+            if enable_dc_removal:
+                self._remove_dc_offset_inplace(processed)
+            if enable_iq_correction:
+                self._correct_iq_imbalance_inplace(processed)
 
-        # 1. Suppression DC offset
-        if enable_dc_removal:
-            processed = self.remove_dc_offset(processed)
+        # 3. Filtrage passe-bande
+        if sos is None:
+            # L'état zi n'accompagne qu'un filtre sos explicite
+            zi = None
+            if bandpass_range is not None:
+                sos = self.design_bandpass(*bandpass_range)
+            else:
+                sos = self._sos
 
-        # 2. Correction I/Q
-        if enable_iq_correction:
-            processed = self.correct_iq_imbalance(processed)
+        if sos is not None:
+            if njit is not None and sos.dtype == np.float32 and (zi is None or zi.dtype == np.complex64):
+                # Cascade compilée, directement dans le buffer de travail
+                self._apply_sos_inplace(out, sos, zi)
+            else:
+                processed = self.apply_sos(processed, sos, zi)
 
-        # 3. Filtrage passe-bande
-        if bandpass_range is not None:
-            low_freq, high_freq = bandpass_range
-            processed = self.bandpass_filter(processed, low_freq, high_freq)
+        # sosfilt alloue sa sortie: la recopier dans le buffer de travail
+        if processed is not out:
+            out[...] = processed
 
         # 4. Normalisation
-        processed = self.normalize_signal(processed, method=normalize_method)
+        self._normalize_inplace(out, method=normalize_method)
 
         logger.info("Prétraitement terminé")
 
-        return processed
+        return out
+
+    def process_batch(self,
+                      iq_batch: np.ndarray,
+                      out: Optional[np.ndarray] = None,
+                      **kwargs) -> np.ndarray:
+        """
+        Prétraite un lot de blocs de même taille (une ligne par bloc)
+
+        Chaque ligne passe par process() (DC, I/Q et normalisation sont
+        estimés bloc par bloc); le résultat est écrit dans un tableau 2D.
+
+        Args:
+            iq_batch: Tableau (B, N) d'échantillons I/Q bruts
+            out: Tableau (B, N) complex64 de sortie (alloué si None)
+            **kwargs: Paramètres transmis à process()
+
+        Returns:
+            Tableau (B, N) complex64 des signaux prétraités
+        """
+        if out is None:
+            out = np.empty(iq_batch.shape, dtype=np.complex64)
+
+        if out.size == 0:
+            return out
+
+        for i in range(iq_batch.shape[0]):
+            self.process(iq_batch[i], out=out[i], **kwargs)
+
+        return out
+
+    def quick_power_db(self, iq_samples: np.ndarray) -> float:
+        """
+        Puissance moyenne d'un bloc brut (dB), sans prétraitement
+
+        Estimation grossière pour écarter les blocs de bruit avant le
+        pipeline complet: un seul produit scalaire (BLAS), sans tableau
+        intermédiaire.
+
+        Args:
+            iq_samples: Échantillons I/Q complexes
+
+        Returns:
+            Puissance moyenne en dB
+        """
+        power = np.vdot(iq_samples, iq_samples).real / max(iq_samples.size, 1)
+        return float(10 * np.log10(power + 1e-20))
+
+    def passes_energy_gate(self, iq_samples: np.ndarray, margin_db: float = 3.0) -> bool:
+        """
+        Détecteur d'énergie: indique si un bloc brut mérite le traitement DSP
+
+        Le plancher de bruit est le 10e percentile de la puissance des
+        NOISE_FLOOR_HISTORY_BLOCKS derniers blocs: il suit les dérives du
+        gain et du bruit ambiant. Les NOISE_FLOOR_CALIBRATION_BLOCKS
+        premiers blocs servent à la calibration et sont toujours transmis.
+
+        Args:
+            iq_samples: Bloc d'échantillons brut
+            margin_db: Marge au-dessus du plancher de bruit (dB)
+
+        Returns:
+            True si le bloc doit être transmis au DSP
+        """
+        power_db = self.quick_power_db(iq_samples)
+        noise_floor_db = self.noise_floor_db
+
+        self._gate_powers.append(power_db)
+        if len(self._gate_powers) >= self.NOISE_FLOOR_CALIBRATION_BLOCKS:
+            self.noise_floor_db = float(np.percentile(self._gate_powers, self.NOISE_FLOOR_PERCENTILE))
+            if noise_floor_db is None:
+                logger.info(f"Plancher de bruit calibré: {self.noise_floor_db:.1f} dB "
+                            f"(marge {margin_db:.1f} dB)")
+
+        # Décision sur le plancher connu avant ce bloc
+        if noise_floor_db is None:
+            return True
+
+        if power_db < noise_floor_db + margin_db:
+            self.gated_blocks += 1
+            logger.debug(f"Énergie {power_db:.1f} dB sous le plancher de bruit, bloc ignoré")
+            return False
+
+        return True
 
     def compute_snr(self,
                    iq_samples: np.ndarray,
@@ -299,6 +805,14 @@ class SignalPreprocessor:
             # Bruit = tout sauf le signal
             noise_samples = np.concatenate([iq_samples[:start], iq_samples[end:]])
             noise_power = np.mean(np.abs(noise_samples)**2)
+        elif (njit is not None and len(iq_samples) >= 4 and iq_samples.dtype == np.complex64
+              and iq_samples.flags.c_contiguous):
+            # Cas courant (sortie de process()): noyau spécialisé complex64
+            signal_power, noise_power = _compute_snr_kernel_c64(iq_samples)
+        elif njit is not None and len(iq_samples) >= 4:
+            # Estimation simple (moitié centrale) via le noyau compilé Numba
+            signal_power, noise_power = _compute_snr_kernel(np.real(iq_samples),
+                                                            np.imag(iq_samples))
         else:
             # Estimation simple: on considère que le signal est dans la moitié centrale
             mid = len(iq_samples) // 2
@@ -310,6 +824,78 @@ class SignalPreprocessor:
                 iq_samples[-quarter:]
             ]))**2)
 
+        return self._snr_db(signal_power, noise_power)
+
+    def compute_power_and_snr(self, iq_samples: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Calcule la puissance instantanée et le SNR en une seule passe
+
+        La puissance |x|² est calculée une fois et réutilisée par l'analyse
+        spectrale (SpectralAnalyzer.analyze_signal(..., power=power)).
+
+        Args:
+            iq_samples: Échantillons I/Q
+
+        Returns:
+            Tuple (puissance instantanée, SNR en dB)
+        """
+        power = iq_samples.real * iq_samples.real + iq_samples.imag * iq_samples.imag
+
+        # Même estimation que compute_snr: signal = moitié centrale, bruit = quarts extrêmes
+        mid = len(power) // 2
+        quarter = len(power) // 4
+        if quarter == 0:
+            return power, self.compute_snr(iq_samples)
+
+        signal_power = np.mean(power[mid-quarter:mid+quarter])
+        noise_power = (np.sum(power[:quarter]) + np.sum(power[-quarter:])) / (2 * quarter)
+
+        return power, self._snr_db(signal_power, noise_power)
+
+    def compute_snr_batch(self, iq_batch: np.ndarray) -> np.ndarray:
+        """
+        Calcule le SNR de chaque ligne d'un lot en une seule opération vectorisée
+
+        Même estimation que compute_snr: signal = moitié centrale, bruit = quarts extrêmes.
+
+        Args:
+            iq_batch: Tableau (B, N) d'échantillons I/Q
+
+        Returns:
+            Array (B,) des SNR en dB
+        """
+        n = iq_batch.shape[1]
+        mid = n // 2
+        quarter = n // 4
+        if quarter == 0:
+            return np.array([self.compute_snr(row) for row in iq_batch])
+
+        power = iq_batch.real * iq_batch.real + iq_batch.imag * iq_batch.imag
+
+        signal_power = power[:, mid-quarter:mid+quarter].mean(axis=1, dtype=np.float64)
+        noise_power = (power[:, :quarter].sum(axis=1, dtype=np.float64)
+                       + power[:, -quarter:].sum(axis=1, dtype=np.float64)) / (2 * quarter)
+
+        with np.errstate(divide='ignore'):
+            snr_db = np.where(noise_power > 0,
+                              10 * np.log10(signal_power / np.maximum(noise_power, 1e-300)),
+                              np.inf)
+
+        logger.debug(f"SNR estimés: {len(snr_db)} blocs")
+
+        return snr_db
+
+    def _snr_db(self, signal_power: float, noise_power: float) -> float:
+        """
+        Convertit les puissances signal/bruit en SNR (dB)
+
+        Args:
+            signal_power: Puissance moyenne du signal
+            noise_power: Puissance moyenne du bruit
+
+        Returns:
+            SNR en dB
+        """
         if noise_power > 0:
             snr_db = 10 * np.log10(signal_power / noise_power)
         else:
@@ -367,6 +953,40 @@ def test_preprocessing():
     snr = preprocessor.compute_snr(processed)
     logger.info(f"SNR: {snr:.2f} dB")
 
+    # Équivalence des noyaux Numba avec le pipeline NumPy/scipy de référence
+    sos = preprocessor.design_bandpass(4e6, 6e6)
+    reference = preprocessor.correct_iq_imbalance(preprocessor.remove_dc_offset(signal_test))
+    reference = preprocessor.normalize_signal(preprocessor.apply_sos(reference, sos.astype(np.float64)))
+    processed = preprocessor.process(signal_test, sos=sos)
+    error = np.linalg.norm(processed - reference) / np.linalg.norm(reference)
+    assert error < 1e-3, f"process() s'écarte de la référence: {error:.2e}"
+
+    mid, quarter = num_samples // 2, num_samples // 4
+    power = np.abs(processed.astype(np.complex128))**2
+    expected_snr = 10 * np.log10(power[mid-quarter:mid+quarter].mean()
+                                 / np.concatenate([power[:quarter], power[-quarter:]]).mean())
+    assert abs(preprocessor.compute_snr(processed) - expected_snr) < 1e-3
+    assert abs(preprocessor.compute_snr(processed.astype(np.complex128)) - expected_snr) < 1e-3
+    logger.info(f"Pipeline et SNR conformes à la référence (écart relatif {error:.2e})")
+
+    # Détecteur d'énergie: le plancher suit une remontée du bruit ambiant
+    gate = SignalPreprocessor(sample_rate=fs)
+    rng = np.random.default_rng(0)
+
+    def noise_block(level):
+        return (level * (rng.standard_normal(4096) + 1j * rng.standard_normal(4096))).astype(np.complex64)
+
+    passed = [gate.passes_energy_gate(noise_block(0.01)) for _ in range(50)]
+    assert all(passed[:SignalPreprocessor.NOISE_FLOOR_CALIBRATION_BLOCKS]) and gate.gated_blocks > 30
+    assert gate.passes_energy_gate(noise_block(0.1))
+    passed = [gate.passes_energy_gate(noise_block(0.1)) for _ in range(300)]
+    assert not any(passed[-100:]), "le plancher de bruit n'a pas suivi le nouveau niveau"
+    logger.info(f"Plancher de bruit suivi: {gate.noise_floor_db:.1f} dB")
+
+    # Blocs vides: renvoyés vides, sans erreur
+    assert len(preprocessor.process(np.zeros(0, dtype=np.complex64))) == 0
+    assert preprocessor.process_batch(np.zeros((3, 0), dtype=np.complex64)).shape == (3, 0)
+
     logger.info("Test terminé")
 
 
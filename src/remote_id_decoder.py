@@ -10,12 +10,25 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime
 import string
+import sys
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# __slots__ sur les dataclasses (Python >= 3.10): pas de __dict__ par instance
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+# Formats binaires précompilés (évite de re-parser la chaîne de format à chaque trame)
+# En-tête beacon: Frame Control (0-1), [Duration/adresses/seq ignorés], Timestamp (24-31),
+# Beacon interval (32-33), Capability info (34-35)
+_BEACON_HEADER = struct.Struct('<H22xQHH')
+# Champs fixes du corps beacon: Timestamp, Beacon interval, Capability info
+_BEACON_FIXED = struct.Struct('<QHH')
+# Location/Vector (à partir de l'octet 3): vitesse verticale, lat, lon, altitude, hauteur
+_LOCATION_FIELDS = struct.Struct('<biihh')
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class RemoteIDData:
     """
     Structure pour les données Remote ID
@@ -212,18 +225,15 @@ class WiFiRemoteIDDecoder:
             # 16-21: BSSID
             # 22-23: Sequence Control
 
-            frame_control = struct.unpack('<H', frame_bytes[0:2])[0]
-            src_addr = ':'.join([f'{b:02x}' for b in frame_bytes[10:16]])
-            bssid = ':'.join([f'{b:02x}' for b in frame_bytes[16:22]])
-
             # Beacon frame body commence à l'offset 24
             # 24-31: Timestamp
             # 32-33: Beacon interval
             # 34-35: Capability info
 
-            timestamp = struct.unpack('<Q', frame_bytes[24:32])[0]
-            beacon_interval = struct.unpack('<H', frame_bytes[32:34])[0]
-            capability = struct.unpack('<H', frame_bytes[34:36])[0]
+            frame_control, timestamp, beacon_interval, capability = \
+                _BEACON_HEADER.unpack_from(frame_bytes)
+            src_addr = frame_bytes[10:16].hex(':')
+            bssid = frame_bytes[16:22].hex(':')
 
             result = {
                 'frame_control': frame_control,
@@ -248,9 +258,7 @@ class WiFiRemoteIDDecoder:
         if len(body_bytes) < 12:
             return None
         try:
-            timestamp = struct.unpack('<Q', body_bytes[0:8])[0]
-            beacon_interval = struct.unpack('<H', body_bytes[8:10])[0]
-            capability = struct.unpack('<H', body_bytes[10:12])[0]
+            timestamp, beacon_interval, capability = _BEACON_FIXED.unpack_from(body_bytes)
             ies = self._parse_information_elements(body_bytes[12:])
             return {
                 'timestamp': timestamp,
@@ -261,6 +269,100 @@ class WiFiRemoteIDDecoder:
         except Exception:
             return None
 
+    def find_odid_frames(self, buf: bytes, offsets: np.ndarray) -> np.ndarray:
+        """
+        Repère les trames contenant l'OUI OpenDroneID (FA:0B:BC)
+
+        Recherche vectorisée du motif de 3 octets sur tout le buffer, puis
+        rattachement de chaque occurrence à sa trame par searchsorted.
+
+        Args:
+            buf: Octets de toutes les trames, bout à bout
+            offsets: Offsets de début de chaque trame, plus la longueur totale
+
+        Returns:
+            Masque booléen (une entrée par trame)
+        """
+        raw = np.frombuffer(buf, dtype=np.uint8)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        mask = np.zeros(max(len(offsets) - 1, 0), dtype=bool)
+        if len(raw) < 3 or len(mask) == 0:
+            return mask
+
+        oui = self.ODID_OUI
+        hits = np.nonzero((raw[:-2] == oui[0]) & (raw[1:-1] == oui[1]) & (raw[2:] == oui[2]))[0]
+        if len(hits) == 0:
+            return mask
+
+        frame_idx = np.searchsorted(offsets, hits, side='right') - 1
+        # Écarter les occurrences à cheval sur deux trames
+        inside = hits + 3 <= offsets[frame_idx + 1]
+        mask[frame_idx[inside]] = True
+        return mask
+
+    def parse_beacons_batch(self, buf: bytes, offsets: np.ndarray,
+                            odid_only: bool = False) -> List[Optional[Dict]]:
+        """
+        Parse un lot de trames Beacon 802.11 concaténées dans un seul buffer
+
+        Les champs fixes de l'en-tête (frame control, adresses, timestamp,
+        intervalle, capability) sont extraits en une passe NumPy pour toutes
+        les trames; seuls les Information Elements (longueur variable) sont
+        parsés trame par trame.
+
+        Args:
+            buf: Octets de toutes les trames, bout à bout
+            offsets: Offsets de début de chaque trame, plus la longueur totale
+                     en dernier élément (len(offsets) == nombre de trames + 1)
+            odid_only: Ne parser que les trames contenant l'OUI OpenDroneID
+
+        Returns:
+            Liste (une entrée par trame) de dictionnaires au format de
+            parse_beacon_frame, ou None si la trame est trop courte (ou
+            sans OUI OpenDroneID quand odid_only=True)
+        """
+        raw = np.frombuffer(buf, dtype=np.uint8)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        num_frames = len(offsets) - 1
+
+        results: List[Optional[Dict]] = [None] * max(num_frames, 0)
+        if num_frames <= 0:
+            return results
+
+        starts = offsets[:-1]
+        lengths = np.diff(offsets)
+        candidates = lengths >= 36  # Taille minimale d'un beacon
+        if odid_only:
+            candidates &= self.find_odid_frames(buf, offsets)
+        valid_idx = np.nonzero(candidates)[0]
+        if len(valid_idx) == 0:
+            return results
+
+        # Matrice [trames × 36 octets] de l'en-tête fixe (gather unique)
+        header = raw[starts[valid_idx, None] + np.arange(36)]
+
+        frame_control = header[:, 0:2].copy().view('<u2').ravel().tolist()
+        timestamp = header[:, 24:32].copy().view('<u8').ravel().tolist()
+        beacon_interval = header[:, 32:34].copy().view('<u2').ravel().tolist()
+        capability = header[:, 34:36].copy().view('<u2').ravel().tolist()
+        src_addr = header[:, 10:16]
+        bssid = header[:, 16:22]
+
+        for k, i in enumerate(valid_idx.tolist()):
+            start = int(starts[i])
+            end = start + int(lengths[i])
+            results[i] = {
+                'frame_control': frame_control[k],
+                'src_addr': src_addr[k].tobytes().hex(':'),
+                'bssid': bssid[k].tobytes().hex(':'),
+                'timestamp': timestamp[k],
+                'beacon_interval': beacon_interval[k],
+                'capability': capability[k],
+                'information_elements': self._parse_information_elements(buf[start + 36:end])
+            }
+
+        return results
+
     def _parse_information_elements(self, ie_data: bytes) -> List[Dict]:
         """
         Parse les Information Elements d'une trame beacon
@@ -344,6 +446,27 @@ class WiFiRemoteIDDecoder:
 
         return None
 
+    def parse_and_extract(self, frame_bytes: bytes) -> Optional[RemoteIDData]:
+        """
+        Parse une trame beacon et en extrait le Remote ID
+
+        Args:
+            frame_bytes: Octets de la trame
+
+        Returns:
+            Objet RemoteIDData ou None
+        """
+        # Sans l'OUI OpenDroneID nulle part dans la trame, aucun Vendor IE
+        # Remote ID possible: recherche en C (bytes), sans parser les IEs
+        if self.ODID_OUI not in frame_bytes:
+            return None
+
+        beacon_info = self.parse_beacon_frame(frame_bytes)
+        if beacon_info is None:
+            return None
+
+        return self.extract_remote_id(beacon_info)
+
     def _parse_remote_id_messages(self, data: bytes, remote_id: RemoteIDData):
         """
         Parse les messages Remote ID contenus dans le Vendor IE
@@ -387,19 +510,10 @@ class WiFiRemoteIDDecoder:
                     speed_encoded = data[offset + 2]
 
                     # Vertical speed (1 byte, 0.5 m/s resolution, signed)
-                    vspeed_encoded = struct.unpack('b', bytes([data[offset + 3]]))[0]
-
-                    # Latitude (4 bytes, 1e-7 degrés)
-                    lat_encoded = struct.unpack('<i', data[offset + 4:offset + 8])[0]
-
-                    # Longitude (4 bytes, 1e-7 degrés)
-                    lon_encoded = struct.unpack('<i', data[offset + 8:offset + 12])[0]
-
-                    # Altitude (2 bytes, 0.5m resolution)
-                    alt_encoded = struct.unpack('<h', data[offset + 12:offset + 14])[0]
-
-                    # Height (2 bytes, 0.5m resolution)
-                    height_encoded = struct.unpack('<h', data[offset + 14:offset + 16])[0]
+                    # Latitude / Longitude (4 bytes chacune, 1e-7 degrés)
+                    # Altitude / Height (2 bytes chacune, 0.5m resolution)
+                    (vspeed_encoded, lat_encoded, lon_encoded,
+                     alt_encoded, height_encoded) = _LOCATION_FIELDS.unpack_from(data, offset + 3)
 
                     # Décodage
                     remote_id.status = "Airborne" if status & 0x0F else "Ground"
@@ -663,12 +777,14 @@ def test_remote_id_decoder():
     if remote_id:
         logger.info("\nInformations Remote ID décodées:")
         logger.info(f"  UAS ID: {remote_id.uas_id} (Type: {remote_id.uas_id_type})")
-        logger.info(f"  Position: ({remote_id.latitude:.6f}°, {remote_id.longitude:.6f}°)")
-        logger.info(f"  Altitude MSL: {remote_id.altitude_msl:.1f} m")
-        logger.info(f"  Hauteur AGL: {remote_id.height:.1f} m")
-        logger.info(f"  Vitesse: {remote_id.speed:.1f} m/s")
-        logger.info(f"  Direction: {remote_id.direction}°")
-        logger.info(f"  Vitesse verticale: {remote_id.vertical_speed:.1f} m/s")
+        if remote_id.latitude is not None and remote_id.longitude is not None:
+            logger.info(f"  Position: ({remote_id.latitude:.6f}°, {remote_id.longitude:.6f}°)")
+            logger.info(f"  Altitude MSL: {remote_id.altitude_msl:.1f} m")
+            logger.info(f"  Hauteur AGL: {remote_id.height:.1f} m")
+        if remote_id.speed is not None:
+            logger.info(f"  Vitesse: {remote_id.speed:.1f} m/s")
+            logger.info(f"  Direction: {remote_id.direction}°")
+            logger.info(f"  Vitesse verticale: {remote_id.vertical_speed:.1f} m/s")
         logger.info(f"  Status: {remote_id.status}")
 
         # Conversion en dictionnaire
@@ -679,6 +795,36 @@ def test_remote_id_decoder():
     else:
         logger.warning("Échec du décodage")
 
+    # Test 2: parsing en lot (NumPy) contre parsing trame par trame
+    logger.info("\n--- Test 2: Parsing en lot ---")
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(400):
+        frame = bytearray(rng.integers(0, 256, rng.integers(0, 160), dtype=np.uint8).tobytes())
+        if len(frame) >= 36 and rng.random() < 0.5:
+            # Vendor IE OpenDroneID (OUI FA:0B:BC) portant le paquet de test
+            content = bytes(decoder.ODID_OUI) + b'\x0d\x00' + test_packet[:200]
+            frame[36:36] = bytes([221, len(content)]) + content
+        frames.append(bytes(frame))
+    # Occurrence de l'OUI à cheval sur deux trames (ne doit pas compter)
+    frames[-2] += bytes(decoder.ODID_OUI[:2])
+    frames[-1] = bytes(decoder.ODID_OUI[2:]) + frames[-1]
+
+    offsets = np.zeros(len(frames) + 1, dtype=np.int64)
+    np.cumsum([len(f) for f in frames], out=offsets[1:])
+    buf = b''.join(frames)
+
+    expected = [decoder.parse_beacon_frame(f) for f in frames]
+    has_oui = [bytes(decoder.ODID_OUI) in f for f in frames]
+    batch = decoder.parse_beacons_batch(buf, offsets)
+    batch_odid = decoder.parse_beacons_batch(buf, offsets, odid_only=True)
+
+    mismatches = sum(b != e for b, e in zip(batch, expected))
+    mismatches += sum(b != (e if oui else None) for b, e, oui in zip(batch_odid, expected, has_oui))
+    mismatches += int(np.count_nonzero(decoder.find_odid_frames(buf, offsets) != np.array(has_oui)))
+    logger.info(f"{len(frames)} trames ({sum(has_oui)} avec OUI), {mismatches} écarts")
+    assert mismatches == 0, "parse_beacons_batch en désaccord avec parse_beacon_frame"
+
     logger.info("\nTest terminé")
 
 
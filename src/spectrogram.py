@@ -5,27 +5,177 @@ Génération de spectrogrammes et extraction de features temporelles/fréquentie
 
 import numpy as np
 from scipy import signal
+import scipy.fft
 from typing import Tuple, Dict, Optional
 import logging
+import os
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+try:
+    import pyfftw
+    import pyfftw.interfaces.scipy_fft
+except ImportError:
+    pyfftw = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _envelope_moments_kernel(re: np.ndarray, im: np.ndarray) -> Tuple[float, float, float, float, float, float]:
+    """
+    Moments bruts de l'enveloppe |x| en une seule passe
+
+    Args:
+        re: Composante I
+        im: Composante Q
+
+    Returns:
+        Tuple (E[e], E[e²], E[e³], E[e⁴], max(e), min(e))
+    """
+    n = re.shape[0]
+    s1 = 0.0
+    s2 = 0.0
+    s3 = 0.0
+    s4 = 0.0
+    e_max = 0.0
+    e_min = np.inf
+    for i in prange(n):
+        p = re[i] * re[i] + im[i] * im[i]
+        e = np.sqrt(p)
+        s1 += e
+        s2 += p
+        s3 += p * e
+        s4 += p * p
+        e_max = max(e_max, e)
+        e_min = min(e_min, e)
+
+    return s1 / n, s2 / n, s3 / n, s4 / n, e_max, e_min
+
+
+if njit is not None:
+    _envelope_moments_kernel = njit(cache=True, fastmath=True, parallel=True,
+                                    nogil=True)(_envelope_moments_kernel)
+
+
 class SpectralAnalyzer:
     """
     Classe pour l'analyse spectrale des signaux I/Q
     """
 
-    def __init__(self, sample_rate: float = 25e6):
+    # Longueur de segment de la PSD (Welch)
+    PSD_NPERSEG = 2048
+
+    def __init__(self,
+                 sample_rate: float = 25e6,
+                 expected_block_size: Optional[int] = None,
+                 threads: Optional[int] = None):
         """
         Initialise l'analyseur spectral
 
         Args:
             sample_rate: Taux d'échantillonnage en Hz
+            expected_block_size: Taille des blocs analysés (num_samples), si connue.
+                                 Permet de préparer une seule fois le plan FFT de la PSD.
+            threads: Nombre de threads des FFT (FFTW ou scipy.fft), tous les coeurs par défaut.
+                     Les FFT relâchent le GIL pendant le calcul.
         """
         self.sample_rate = sample_rate
-        logger.info(f"Analyseur spectral initialisé avec fs={sample_rate/1e6:.2f} MS/s")
+        self.threads = threads or os.cpu_count() or 1
+
+        # Backend FFTW (optionnel): plans mis en cache et réutilisés d'un appel à l'autre
+        self._fft_backend = None
+        if pyfftw is not None:
+            pyfftw.config.NUM_THREADS = self.threads
+            pyfftw.config.PLANNER_EFFORT = 'FFTW_MEASURE'
+            pyfftw.interfaces.cache.enable()
+            pyfftw.interfaces.cache.set_keepalive_time(60)
+            self._fft_backend = pyfftw.interfaces.scipy_fft
+
+        # Plan FFTW dédié à la PSD des blocs de taille connue (buffer aligné réutilisé)
+        # (sans expected_block_size, préparé au premier bloc complex64 reçu)
+        self._fft_in = None
+        self._plan = None
+        self._psd_block_size = None
+        if pyfftw is not None and expected_block_size:
+            self._build_psd_plan(expected_block_size)
+
+        logger.info(f"Analyseur spectral initialisé avec fs={sample_rate/1e6:.2f} MS/s"
+                    f"{' (FFTW)' if self._fft_backend else ''}")
+
+    def _fft_context(self):
+        """
+        Contexte scipy.fft utilisant le backend FFTW s'il est disponible
+        (sinon pocketfft, multi-thread)
+        """
+        if self._fft_backend is None:
+            return scipy.fft.set_workers(self.threads)
+        return scipy.fft.set_backend(self._fft_backend)
+
+    def _build_psd_plan(self, block_size: int):
+        """
+        Prépare le plan FFT de la PSD (Welch) pour des blocs de taille fixe
+
+        Args:
+            block_size: Nombre d'échantillons par bloc
+        """
+        # Taille mémorisée même sans plan: pas de nouvelle tentative à chaque bloc
+        self._psd_block_size = block_size
+
+        nperseg = self.PSD_NPERSEG
+        step = nperseg // 2
+        num_segments = (block_size - step) // step
+        if num_segments < 1:
+            return
+
+        self._psd_window = signal.get_window('hann', nperseg).astype(np.float32)
+        self._psd_scale = 1.0 / (self.sample_rate * float(np.sum(self._psd_window.astype(np.float64) ** 2)))
+
+        self._fft_in = pyfftw.empty_aligned((num_segments, nperseg), dtype='complex64')
+        self._plan = pyfftw.builders.fft(self._fft_in, axis=-1,
+                                         threads=self.threads,
+                                         planner_effort='FFTW_MEASURE',
+                                         avoid_copy=True)
+        self._psd_freqs = np.fft.fftshift(np.fft.fftfreq(nperseg, 1.0 / self.sample_rate))
+
+        logger.info(f"Plan FFT de la PSD préparé: {num_segments} segments de {nperseg} points")
+
+    def _planned_psd(self, iq_samples: np.ndarray) -> np.ndarray:
+        """
+        PSD de Welch (fenêtre de Hann, recouvrement 50%) via le plan FFTW préparé
+
+        Équivalent à signal.welch(..., return_onesided=False, scaling='density')
+        sans allocation des segments ni recherche de plan à chaque appel.
+
+        Args:
+            iq_samples: Bloc de self._psd_block_size échantillons
+
+        Returns:
+            PSD (non recentrée)
+        """
+        num_segments, nperseg = self._fft_in.shape
+        step = nperseg // 2
+
+        # Segments à 50% de recouvrement (vue, sans copie)
+        segments = np.lib.stride_tricks.as_strided(
+            iq_samples,
+            shape=(num_segments, nperseg),
+            strides=(step * iq_samples.strides[0], iq_samples.strides[0]),
+            writeable=False
+        )
+
+        # Retrait de la moyenne (detrend='constant') puis fenêtrage, dans le buffer aligné
+        np.subtract(segments, segments.mean(axis=1, keepdims=True), out=self._fft_in)
+        self._fft_in *= self._psd_window
+
+        spectrum = self._plan()
+        psd = (spectrum.real ** 2 + spectrum.imag ** 2).mean(axis=0, dtype=np.float64)
+
+        return (psd * self._psd_scale).astype(np.float32)
 
     def compute_spectrogram(self,
                           iq_samples: np.ndarray,
@@ -51,15 +201,16 @@ class SpectralAnalyzer:
             noverlap = nperseg // 2
 
         # Calcul de la STFT (Short-Time Fourier Transform)
-        f, t, Zxx = signal.stft(
-            iq_samples,
-            fs=self.sample_rate,
-            window=window,
-            nperseg=nperseg,
-            noverlap=noverlap,
-            return_onesided=False,
-            boundary=None
-        )
+        with self._fft_context():
+            f, t, Zxx = signal.stft(
+                iq_samples,
+                fs=self.sample_rate,
+                window=window,
+                nperseg=nperseg,
+                noverlap=noverlap,
+                return_onesided=False,
+                boundary=None
+            )
 
         # Réorganisation des fréquences pour centrer à 0
         f = np.fft.fftshift(f)
@@ -86,18 +237,32 @@ class SpectralAnalyzer:
                 - fréquences: array des fréquences (Hz)
                 - psd: densité spectrale de puissance (en échelle linéaire)
         """
-        f, psd = signal.welch(
-            iq_samples,
-            fs=self.sample_rate,
-            window=window,
-            nperseg=nperseg,
-            return_onesided=False,
-            scaling='density'
-        )
-
-        # Réorganisation pour centrer à 0
-        f = np.fft.fftshift(f)
-        psd = np.fft.fftshift(psd)
+        planned = (nperseg == self.PSD_NPERSEG and window == 'hann'
+                   and iq_samples.dtype == np.complex64)
+
+        if planned and pyfftw is not None and self._psd_block_size is None:
+            # Premier bloc: le plan est préparé une fois puis réutilisé
+            # pour tous les blocs de même taille
+            self._build_psd_plan(len(iq_samples))
+
+        if planned and self._plan is not None and len(iq_samples) == self._psd_block_size:
+            # Bloc de taille attendue: plan FFTW préparé à l'initialisation
+            f = self._psd_freqs
+            psd = np.fft.fftshift(self._planned_psd(iq_samples))
+        else:
+            with self._fft_context():
+                f, psd = signal.welch(
+                    iq_samples,
+                    fs=self.sample_rate,
+                    window=window,
+                    nperseg=nperseg,
+                    return_onesided=False,
+                    scaling='density'
+                )
+
+            # Réorganisation pour centrer à 0
+            f = np.fft.fftshift(f)
+            psd = np.fft.fftshift(psd)
 
         logger.debug(f"PSD calculée: {len(f)} points fréquentiels")
 
@@ -105,22 +270,32 @@ class SpectralAnalyzer:
 
     def estimate_bandwidth(self,
                          iq_samples: np.ndarray,
-                         threshold_db: float = -10.0) -> Tuple[float, float, float]:
+                         threshold_db: float = -10.0,
+                         psd: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                         psd_db: Optional[np.ndarray] = None) -> Tuple[float, float, float]:
         """
         Estime la bande passante du signal
 
         Args:
             iq_samples: Échantillons I/Q complexes
             threshold_db: Seuil en dB par rapport au pic pour définir la bande
+            psd: Tuple (fréquences, psd) déjà calculé par compute_psd (optionnel),
+                 évite une seconde série de FFT sur le même bloc
+            psd_db: PSD correspondante en dB (optionnel)
 
         Returns:
             Tuple (bandwidth, center_freq, peak_power_db)
         """
         # Calcul de la PSD
-        f, psd = self.compute_psd(iq_samples)
+        if psd is None:
+            f, psd = self.compute_psd(iq_samples)
+            psd_db = None
+        else:
+            f, psd = psd
 
         # Conversion en dB
-        psd_db = 10 * np.log10(psd + 1e-12)
+        if psd_db is None:
+            psd_db = 10 * np.log10(psd + 1e-12)
 
         # Recherche du pic
         peak_idx = np.argmax(psd_db)
@@ -150,7 +325,8 @@ class SpectralAnalyzer:
     def detect_bursts(self,
                      iq_samples: np.ndarray,
                      threshold_factor: float = 3.0,
-                     min_burst_duration: float = 1e-3) -> list:
+                     min_burst_duration: float = 1e-3,
+                     power: Optional[np.ndarray] = None) -> list:
         """
         Détecte les rafales (bursts) dans le signal
 
@@ -158,12 +334,14 @@ class SpectralAnalyzer:
             iq_samples: Échantillons I/Q complexes
             threshold_factor: Facteur multiplicatif du bruit pour le seuil
             min_burst_duration: Durée minimale d'une rafale (secondes)
+            power: Puissance instantanée déjà calculée (optionnel)
 
         Returns:
             Liste de tuples (start_idx, end_idx, duration, power) pour chaque rafale
         """
-        # Calcul de l'enveloppe (puissance instantanée)
-        power = np.abs(iq_samples)**2
+        # Calcul de l'enveloppe (puissance instantanée): |z|² = re² + im², sans sqrt
+        if power is None:
+            power = iq_samples.real * iq_samples.real + iq_samples.imag * iq_samples.imag
 
         # Estimation du niveau de bruit (percentile 25%)
         noise_level = np.percentile(power, 25)
@@ -221,9 +399,24 @@ class SpectralAnalyzer:
         Returns:
             Dictionnaire de features
         """
-        # Calcul de l'enveloppe
-        envelope = np.abs(iq_samples)
-        power = envelope**2
+        # Moments de l'enveloppe (une passe compilée si Numba est disponible)
+        if njit is not None and len(iq_samples) > 0:
+            m1, m2, m3, m4, e_max, e_min = _envelope_moments_kernel(np.real(iq_samples),
+                                                                     np.imag(iq_samples))
+        else:
+            power = iq_samples.real * iq_samples.real + iq_samples.imag * iq_samples.imag
+            envelope = np.sqrt(power)
+            m1 = np.mean(envelope)
+            m2 = np.mean(power)
+            m3 = np.mean(power * envelope)
+            m4 = np.mean(power**2)
+            e_max = np.max(envelope)
+            e_min = np.min(envelope)
+
+        # Statistiques dérivées des moments bruts
+        env_var = max(m2 - m1**2, 0.0)
+        power_var = max(m4 - m2**2, 0.0)
+        central_m4 = m4 - 4 * m1 * m3 + 6 * m1**2 * m2 - 3 * m1**4
 
         # Calcul de la phase instantanée
         phase = np.angle(iq_samples)
@@ -231,26 +424,25 @@ class SpectralAnalyzer:
 
         features = {
             # Statistiques d'amplitude
-            'mean_amplitude': float(np.mean(envelope)),
-            'std_amplitude': float(np.std(envelope)),
-            'max_amplitude': float(np.max(envelope)),
-            'min_amplitude': float(np.min(envelope)),
+            'mean_amplitude': float(m1),
+            'std_amplitude': float(np.sqrt(env_var)),
+            'max_amplitude': float(e_max),
+            'min_amplitude': float(e_min),
 
             # Statistiques de puissance
-            'mean_power': float(np.mean(power)),
-            'std_power': float(np.std(power)),
-            'peak_to_average_ratio': float(np.max(power) / (np.mean(power) + 1e-12)),
+            'mean_power': float(m2),
+            'std_power': float(np.sqrt(power_var)),
+            'peak_to_average_ratio': float(e_max**2 / (m2 + 1e-12)),
 
             # Statistiques de phase
             'mean_phase_derivative': float(np.mean(phase_diff)),
             'std_phase_derivative': float(np.std(phase_diff)),
 
             # Facteur de crête
-            'crest_factor': float(np.max(envelope) / (np.sqrt(np.mean(power)) + 1e-12)),
+            'crest_factor': float(e_max / (np.sqrt(m2) + 1e-12)),
 
             # Kurtosis (indicateur de non-gaussianité)
-            'kurtosis': float(np.mean((envelope - np.mean(envelope))**4) /
-                            (np.std(envelope)**4 + 1e-12))
+            'kurtosis': float(central_m4 / (env_var**2 + 1e-12))
         }
 
         logger.debug(f"Features temporelles extraites: {len(features)} valeurs")
@@ -274,8 +466,9 @@ class SpectralAnalyzer:
         f, psd = self.compute_psd(iq_samples, nperseg=nperseg)
         psd_db = 10 * np.log10(psd + 1e-12)
 
-        # Estimation de la bande passante
-        bandwidth, center_freq, peak_power = self.estimate_bandwidth(iq_samples)
+        # Estimation de la bande passante (sur la même PSD: un seul passage FFT par bloc)
+        bandwidth, center_freq, peak_power = self.estimate_bandwidth(iq_samples, psd=(f, psd),
+                                                                     psd_db=psd_db)
 
         # Calcul du centroïde spectral
         spectral_centroid = np.sum(f * psd) / (np.sum(psd) + 1e-12)
@@ -307,13 +500,16 @@ class SpectralAnalyzer:
 
     def analyze_signal(self,
                       iq_samples: np.ndarray,
-                      compute_spectrogram: bool = True) -> Dict:
+                      compute_spectrogram: bool = True,
+                      power: Optional[np.ndarray] = None) -> Dict:
         """
         Analyse complète du signal
 
         Args:
             iq_samples: Échantillons I/Q complexes
             compute_spectrogram: Si True, calcule également le spectrogramme
+            power: Puissance instantanée déjà calculée (ex: compute_power_and_snr),
+                   évite de la recalculer pour la détection de rafales
 
         Returns:
             Dictionnaire contenant toutes les analyses
@@ -332,7 +528,7 @@ class SpectralAnalyzer:
         results['spectral_features'] = self.extract_spectral_features(iq_samples)
 
         # Détection de rafales
-        bursts = self.detect_bursts(iq_samples)
+        bursts = self.detect_bursts(iq_samples, power=power)
         results['bursts'] = {
             'count': len(bursts),
             'bursts_list': bursts
@@ -352,6 +548,22 @@ class SpectralAnalyzer:
 
         return results
 
+    def analyze_batch(self,
+                      iq_batch: np.ndarray,
+                      compute_spectrogram: bool = False) -> list:
+        """
+        Analyse chaque ligne d'un lot de blocs
+
+        Args:
+            iq_batch: Tableau (B, N) d'échantillons I/Q complexes
+            compute_spectrogram: Si True, calcule également les spectrogrammes
+
+        Returns:
+            Liste (alignée sur les lignes) des dictionnaires de analyze_signal
+        """
+        return [self.analyze_signal(row, compute_spectrogram=compute_spectrogram)
+                for row in iq_batch]
+
 
 def test_spectral_analysis():
     """
@@ -413,6 +625,24 @@ def test_spectral_analysis():
     if 'spectrogram' in results:
         logger.info(f"\nSpectrogramme: {results['spectrogram']['shape']}")
 
+    # Équivalence des chemins optimisés avec les calculs de référence
+    f_ref, psd_ref = signal.welch(signal_test, fs=fs, window='hann',
+                                  nperseg=SpectralAnalyzer.PSD_NPERSEG,
+                                  return_onesided=False, scaling='density')
+    f, psd = analyzer.compute_psd(signal_test)
+    assert np.allclose(f, np.fft.fftshift(f_ref))
+    assert np.allclose(psd, np.fft.fftshift(psd_ref), rtol=1e-3, atol=1e-6 * psd_ref.max())
+    logger.info(f"PSD {'planifiée (FFTW)' if analyzer._plan is not None else 'scipy'} "
+                f"conforme à signal.welch")
+
+    if njit is not None:
+        envelope = np.abs(signal_test.astype(np.complex128))
+        moments = _envelope_moments_kernel(np.real(signal_test), np.imag(signal_test))
+        expected = (envelope.mean(), (envelope**2).mean(), (envelope**3).mean(),
+                    (envelope**4).mean(), envelope.max(), envelope.min())
+        assert np.allclose(moments, expected, rtol=1e-4)
+        logger.info("Moments de l'enveloppe (Numba) conformes à NumPy")
+
     logger.info("\nTest terminé")
 
 
@@ -8,7 +8,7 @@ import numpy as np
 import logging
 from typing import Optional, Tuple
 import threading
-import queue
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -42,7 +42,13 @@ class UHDAcquisition:
         self.rx_gain = rx_gain
         self.usrp: Optional[uhd.usrp.MultiUSRP] = None
         self.is_running = False
-        self.data_queue = queue.Queue(maxsize=10)
+
+        # Ring buffer de l'acquisition continue (alloué au démarrage)
+        # head/tail sont des compteurs monotones, slot = compteur % num_slots
+        self._ring: Optional[np.ndarray] = None
+        self._ring_head = 0
+        self._ring_tail = 0
+        self._ring_cond = threading.Condition()
 
     def initialize(self) -> bool:
         """
@@ -92,16 +98,20 @@ class UHDAcquisition:
 
     def acquire_samples(self,
                        num_samples: int = 100000,
-                       channel: int = 0) -> Optional[np.ndarray]:
+                       channel: int = 0,
+                       out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
         """
         Acquiert un nombre spécifique d'échantillons I/Q
 
         Args:
             num_samples: Nombre d'échantillons à acquérir
             channel: Canal à utiliser (0 pour 2.4GHz, 1 pour 5.8GHz)
+            out: Buffer complex64 fourni par l'appelant (au moins num_samples
+                 éléments), rempli en place et réutilisable d'un appel à l'autre
 
         Returns:
-            Array numpy de samples complexes (complex64) ou None si erreur
+            Array numpy de samples complexes (complex64) ou None si erreur.
+            Vue sur out s'il est fourni, sinon nouvel array appartenant à l'appelant.
         """
         if self.usrp is None:
             logger.error("USRP non initialisé")
@@ -113,8 +123,12 @@ class UHDAcquisition:
             st_args.channels = [channel]
             rx_streamer = self.usrp.get_rx_stream(st_args)
 
-            # Buffer pour recevoir les échantillons
-            recv_buffer = np.zeros(num_samples, dtype=np.complex64)
+            # Buffer de réception: celui de l'appelant, sinon un nouvel array
+            # (rempli par recv, pas besoin de l'initialiser)
+            if out is not None:
+                recv_buffer = out[:num_samples]
+            else:
+                recv_buffer = np.empty(num_samples, dtype=np.complex64)
 
             # Metadata pour les informations de streaming
             metadata = uhd.types.RXMetadata()
@@ -146,31 +160,138 @@ class UHDAcquisition:
             logger.error(f"Erreur lors de l'acquisition: {e}")
             return None
 
+    # Durée minimale de la réception de test de check_gil_release (s)
+    GIL_PROBE_MIN_DURATION_S = 0.05
+
+    # Pas d'échantillonnage du thread appelant pendant le test GIL (s)
+    GIL_PROBE_TICK_S = 0.0005
+
+    def check_gil_release(self, num_samples: int = 100000, channel: int = 0) -> bool:
+        """
+        Vérifie que la réception UHD relâche le GIL (test de démarrage)
+
+        Une acquisition est lancée dans un thread pendant que le thread appelant
+        se réveille tous les GIL_PROBE_TICK_S et cumule le temps pendant lequel
+        ses réveils ont été retardés. Si ce temps couvre la majeure partie de la
+        réception, le binding garde le GIL pendant recv et les étages du
+        pipeline ne s'exécutent pas en parallèle. La réception dure au moins
+        GIL_PROBE_MIN_DURATION_S pour que le test reste concluant devant
+        l'intervalle de bascule des threads.
+
+        Args:
+            num_samples: Nombre d'échantillons de l'acquisition de test
+                         (augmenté si nécessaire selon le taux d'échantillonnage)
+            channel: Canal à utiliser
+
+        Returns:
+            True si le GIL est relâché (ou si l'acquisition de test échoue)
+        """
+        num_samples = max(num_samples, int(np.ceil(self.sample_rate * self.GIL_PROBE_MIN_DURATION_S)))
+        done = threading.Event()
+        results = []
+
+        def probe():
+            t0 = time.perf_counter()
+            samples = None
+            try:
+                samples = self.acquire_samples(num_samples=num_samples, channel=channel)
+            finally:
+                results.append((time.perf_counter() - t0, samples))
+                done.set()
+
+        worker = threading.Thread(target=probe, name="gil_probe", daemon=True)
+        last = time.perf_counter()
+        blocked = 0.0
+        worker.start()
+        while not done.is_set():
+            # Le sommeil relâche le GIL: pas de boucle active à 100% CPU
+            time.sleep(self.GIL_PROBE_TICK_S)
+            now = time.perf_counter()
+            # Réveil en retard de plusieurs pas: le GIL était détenu par la réception
+            if now - last > 4 * self.GIL_PROBE_TICK_S:
+                blocked += now - last
+            last = now
+        worker.join()
+
+        duration, samples = results[0]
+        if samples is None or len(samples) < num_samples:
+            logger.warning("Test GIL non concluant: acquisition de test incomplète")
+            return True
+
+        released = blocked < 0.5 * duration
+        logger.debug(f"Test GIL: réception {duration*1e3:.1f} ms, "
+                     f"thread appelant bloqué {blocked*1e3:.1f} ms")
+        return released
+
     def start_continuous_acquisition(self,
                                     num_samples_per_buffer: int = 100000,
-                                    channel: int = 0):
+                                    channel: int = 0,
+                                    num_slots: int = 8):
         """
         Démarre l'acquisition continue en arrière-plan
 
+        Le thread producteur garde un seul stream UHD ouvert (start_cont) et
+        écrit directement dans un ring buffer complex64 préalloué de
+        num_slots tranches; get_samples() consomme ces tranches sans copie.
+
         Args:
             num_samples_per_buffer: Taille des buffers à acquérir
             channel: Canal à utiliser
+            num_slots: Nombre de tranches du ring buffer (>= 4)
         """
         if self.is_running:
             logger.warning("L'acquisition est déjà en cours")
             return
 
+        if self.usrp is None:
+            logger.error("USRP non initialisé")
+            return
+
+        num_slots = max(4, num_slots)
+        self._ring = np.empty((num_slots, num_samples_per_buffer), dtype=np.complex64)
+        self._ring_head = 0
+        self._ring_tail = 0
         self.is_running = True
 
         def acquisition_thread():
-            logger.info(f"Démarrage de l'acquisition continue sur le canal {channel}")
-            while self.is_running:
-                samples = self.acquire_samples(num_samples_per_buffer, channel)
-                if samples is not None:
-                    try:
-                        self.data_queue.put(samples, timeout=1.0)
-                    except queue.Full:
-                        logger.warning("Queue pleine, échantillons perdus")
+            logger.info(f"Démarrage de l'acquisition continue sur le canal {channel} "
+                       f"({num_slots} tranches de {num_samples_per_buffer} échantillons)")
+
+            st_args = uhd.usrp.StreamArgs("fc32", "sc16")
+            st_args.channels = [channel]
+            rx_streamer = self.usrp.get_rx_stream(st_args)
+            metadata = uhd.types.RXMetadata()
+
+            stream_cmd = uhd.types.StreamCMD(uhd.types.StreamMode.start_cont)
+            stream_cmd.stream_now = True
+            rx_streamer.issue_stream_cmd(stream_cmd)
+
+            try:
+                while self.is_running:
+                    slot = self._ring[self._ring_head % num_slots]
+                    filled = 0
+
+                    while filled < num_samples_per_buffer and self.is_running:
+                        filled += rx_streamer.recv(slot[filled:], metadata, 1.0)
+
+                        if metadata.error_code == uhd.types.RXMetadataErrorCode.overflow:
+                            logger.debug("Overflow UHD pendant l'acquisition continue")
+                        elif metadata.error_code != uhd.types.RXMetadataErrorCode.none:
+                            logger.warning(f"Erreur de réception: {metadata.error_code}")
+                            break
+
+                    if filled < num_samples_per_buffer:
+                        continue
+
+                    with self._ring_cond:
+                        # La tranche suivante ne doit pas être celle en cours de lecture
+                        if self._ring_head + 1 - self._ring_tail <= num_slots - 2:
+                            self._ring_head += 1
+                            self._ring_cond.notify_all()
+                        else:
+                            logger.warning("Ring buffer plein, échantillons perdus")
+            finally:
+                rx_streamer.issue_stream_cmd(uhd.types.StreamCMD(uhd.types.StreamMode.stop_cont))
 
         self.acquisition_thread = threading.Thread(target=acquisition_thread, daemon=True)
         self.acquisition_thread.start()
@@ -178,7 +299,10 @@ class UHDAcquisition:
 
     def get_samples(self, timeout: float = 1.0) -> Optional[np.ndarray]:
         """
-        Récupère les échantillons de la queue (mode continu)
+        Récupère la prochaine tranche du ring buffer (mode continu)
+
+        La tranche retournée est une vue sans copie, valide jusqu'au prochain
+        appel à get_samples().
 
         Args:
             timeout: Timeout en secondes
@@ -186,10 +310,13 @@ class UHDAcquisition:
         Returns:
             Array d'échantillons ou None
         """
-        try:
-            return self.data_queue.get(timeout=timeout)
-        except queue.Empty:
-            return None
+        with self._ring_cond:
+            if not self._ring_cond.wait_for(lambda: self._ring_tail < self._ring_head, timeout):
+                return None
+            slot = self._ring_tail % len(self._ring)
+            self._ring_tail += 1
+
+        return self._ring[slot]
 
     def stop_continuous_acquisition(self):
         """
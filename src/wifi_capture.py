@@ -4,10 +4,22 @@ Utilise un adaptateur WiFi en mode monitor pour capturer directement les trames
 """
 
 import logging
-from typing import Optional, List
-from dataclasses import dataclass
+from typing import Optional, List, Tuple
+from dataclasses import dataclass, field
 import subprocess
+import socket
 import struct
+import numpy as np
+
+from src.wifi_detector import CHAN_FREQ_MHZ
+
+# Changement de canal via nl80211 (netlink) sans fork de `iw` (optionnel)
+try:
+    from pyroute2 import IW
+    from pyroute2.netlink import NLM_F_REQUEST, NLM_F_ACK
+    from pyroute2.netlink.nl80211 import nl80211cmd, NL80211_NAMES
+except ImportError:
+    IW = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,6 +39,53 @@ class WiFiFrame:
     frame_data: bytes
 
 
+@dataclass
+class FrameBatch:
+    """
+    Lot de trames WiFi capturées, stocké par colonnes (SoA)
+
+    Chaque champ est un tableau indexé par le numéro de trame, ce qui permet
+    de filtrer tout le lot en une opération NumPy (ex: seuil RSSI).
+    """
+    frame_data: List[bytes] = field(default_factory=list)
+    src_mac: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint64))
+    signal_strength: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int8))  # dBm
+    frequency: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint32))  # MHz
+
+    def __len__(self) -> int:
+        return len(self.frame_data)
+
+    def mac_str(self, index: int) -> str:
+        """
+        Adresse MAC source d'une trame au format texte
+
+        Args:
+            index: Indice de la trame dans le lot
+
+        Returns:
+            Adresse MAC 'aa:bb:cc:dd:ee:ff'
+        """
+        return int(self.src_mac[index]).to_bytes(6, 'big').hex(':')
+
+    def concat(self, indices: Optional[np.ndarray] = None) -> Tuple[bytes, np.ndarray]:
+        """
+        Concatène les trames sélectionnées en un buffer unique + offsets
+
+        Args:
+            indices: Indices des trames à garder (toutes si None)
+
+        Returns:
+            Tuple (buffer, offsets) au format attendu par parse_beacons_batch
+        """
+        if indices is None:
+            indices = range(len(self.frame_data))
+        data = [self.frame_data[i] for i in indices]
+
+        offsets = np.zeros(len(data) + 1, dtype=np.int64)
+        np.cumsum([len(d) for d in data], out=offsets[1:])
+        return b''.join(data), offsets
+
+
 class WiFiMonitorCapture:
     """
     Capture de trames WiFi en mode monitor
@@ -51,6 +110,11 @@ class WiFiMonitorCapture:
         """
         self.interface = interface
         self.monitor_interface = f"{interface}mon"
+
+        # Socket netlink nl80211 persistant (ouvert au premier changement de canal)
+        self._iw = None
+        self._ifindex = None
+
         logger.info(f"WiFi Monitor Capture initialisé sur {interface}")
 
     def enable_monitor_mode(self) -> bool:
@@ -82,8 +146,8 @@ class WiFiMonitorCapture:
                          check=True, capture_output=True)
 
             # Définir le canal (exemple: canal 6)
-            subprocess.run(['sudo', 'iw', self.monitor_interface, 'set', 'channel', '6'],
-                         check=True, capture_output=True)
+            if not self.set_channel(6):
+                return False
 
             logger.info(f"✓ Mode monitor activé sur {self.monitor_interface}")
             return True
@@ -103,6 +167,54 @@ class WiFiMonitorCapture:
         except Exception as e:
             logger.error(f"Erreur lors de la désactivation: {e}")
 
+        # L'interface monitor n'existe plus: fermer le socket netlink
+        if self._iw is not None:
+            self._iw.close()
+        self._iw = None
+        self._ifindex = None
+
+    def set_channel(self, channel: int) -> bool:
+        """
+        Change le canal de l'interface monitor
+
+        Utilise un socket nl80211 persistant (pyroute2) si disponible,
+        sinon `iw ... set channel`.
+
+        Args:
+            channel: Numéro de canal WiFi 2.4 GHz (1-14)
+
+        Returns:
+            True si succès
+        """
+        if IW is not None:
+            try:
+                if self._iw is None:
+                    self._ifindex = socket.if_nametoindex(self.monitor_interface)
+                    self._iw = IW()
+
+                msg = nl80211cmd()
+                msg['cmd'] = NL80211_NAMES['NL80211_CMD_SET_WIPHY']
+                msg['attrs'] = [
+                    ['NL80211_ATTR_IFINDEX', self._ifindex],
+                    ['NL80211_ATTR_WIPHY_FREQ', int(CHAN_FREQ_MHZ[channel])],
+                ]
+                self._iw.nlm_request(msg, msg_type=self._iw.prid,
+                                     msg_flags=NLM_F_REQUEST | NLM_F_ACK)
+
+                logger.debug(f"Canal {channel} réglé via nl80211")
+                return True
+
+            except Exception as e:
+                logger.warning(f"Changement de canal nl80211 impossible ({e}), repli sur iw")
+
+        try:
+            subprocess.run(['sudo', 'iw', self.monitor_interface, 'set', 'channel', str(channel)],
+                         check=True, capture_output=True)
+            return True
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            logger.error(f"Erreur lors du changement de canal: {e}")
+            return False
+
     def capture_with_tcpdump(self, duration: int = 10) -> List[str]:
         """
         Capture des trames avec tcpdump
@@ -136,40 +248,32 @@ class WiFiMonitorCapture:
             logger.error(f"Erreur lors de la capture: {e}")
             return []
 
-    def capture_with_scapy(self, count: int = 100) -> List[WiFiFrame]:
+    def _sniff_beacons(self, count: int) -> Optional[dict]:
         """
-        Capture des trames avec Scapy (Python)
+        Capture des trames beacon avec Scapy (chemin commun à tous les formats)
 
         Args:
             count: Nombre de trames à capturer
 
         Returns:
-            Liste de WiFiFrame
+            Colonnes alignées par trame: 'timestamp', 'src_mac', 'dst_mac',
+            'signal' (dBm, None si absent) et 'frame_data'; None en cas d'erreur
         """
         try:
             from scapy.all import sniff, Dot11, Dot11Beacon
 
             logger.info(f"Capture de {count} trames beacon avec Scapy...")
 
-            frames = []
+            columns = {'timestamp': [], 'src_mac': [], 'dst_mac': [], 'signal': [], 'frame_data': []}
 
             def packet_handler(pkt):
                 if pkt.haslayer(Dot11Beacon):
                     # Extraction des informations
-                    src_mac = pkt[Dot11].addr2
-                    dst_mac = pkt[Dot11].addr1
-                    signal = pkt.dBm_AntSignal if hasattr(pkt, 'dBm_AntSignal') else -100
-
-                    frame = WiFiFrame(
-                        timestamp=pkt.time,
-                        frequency=2437,  # Canal 6 par défaut
-                        signal_strength=signal,
-                        src_mac=src_mac,
-                        dst_mac=dst_mac,
-                        frame_type='Beacon',
-                        frame_data=bytes(pkt)
-                    )
-                    frames.append(frame)
+                    columns['timestamp'].append(pkt.time)
+                    columns['src_mac'].append(pkt[Dot11].addr2)
+                    columns['dst_mac'].append(pkt[Dot11].addr1)
+                    columns['signal'].append(pkt.dBm_AntSignal if hasattr(pkt, 'dBm_AntSignal') else -100)
+                    columns['frame_data'].append(bytes(pkt))
 
             # Capture
             sniff(iface=self.monitor_interface,
@@ -178,16 +282,69 @@ class WiFiMonitorCapture:
                   timeout=30,
                   filter="type mgt subtype beacon")
 
-            logger.info(f"✓ {len(frames)} trames beacon capturées")
-            return frames
+            logger.info(f"✓ {len(columns['frame_data'])} trames beacon capturées")
+            return columns
 
         except ImportError:
             logger.error("Scapy n'est pas installé. Installez avec: pip install scapy")
-            return []
+            return None
         except Exception as e:
             logger.error(f"Erreur lors de la capture Scapy: {e}")
+            return None
+
+    def capture_with_scapy(self, count: int = 100) -> List[WiFiFrame]:
+        """
+        Capture des trames avec Scapy (Python)
+
+        Args:
+            count: Nombre de trames à capturer
+
+        Returns:
+            Liste de WiFiFrame
+        """
+        columns = self._sniff_beacons(count)
+        if columns is None:
             return []
 
+        return [
+            WiFiFrame(
+                timestamp=timestamp,
+                frequency=2437,  # Canal 6 par défaut
+                signal_strength=signal,
+                src_mac=src_mac,
+                dst_mac=dst_mac,
+                frame_type='Beacon',
+                frame_data=frame_data
+            )
+            for timestamp, src_mac, dst_mac, signal, frame_data in zip(
+                columns['timestamp'], columns['src_mac'], columns['dst_mac'],
+                columns['signal'], columns['frame_data'])
+        ]
+
+    def capture_batch_with_scapy(self, count: int = 100) -> FrameBatch:
+        """
+        Capture des trames avec Scapy, résultat stocké par colonnes
+
+        Args:
+            count: Nombre de trames à capturer
+
+        Returns:
+            FrameBatch (vide en cas d'erreur)
+        """
+        columns = self._sniff_beacons(count)
+        if columns is None:
+            return FrameBatch()
+
+        n = len(columns['frame_data'])
+        signal_strength = [s if s is not None else -100 for s in columns['signal']]
+        return FrameBatch(
+            frame_data=columns['frame_data'],
+            src_mac=np.array([int(mac.replace(':', ''), 16) if mac else 0
+                              for mac in columns['src_mac']], dtype=np.uint64),
+            signal_strength=np.clip(signal_strength, -128, 127).astype(np.int8),
+            frequency=np.full(n, 2437, dtype=np.uint32)  # Canal 6 par défaut
+        )
+
 
 def test_wifi_capture():
     """
@@ -10,6 +10,29 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fréquence centrale (MHz) des canaux WiFi 2.4 GHz, indexée par numéro de canal
+# (index 0 inutilisé, canal 14 = 2484 MHz)
+CHAN_FREQ_MHZ = np.array([0, 2412, 2417, 2422, 2427, 2432, 2437, 2442,
+                          2447, 2452, 2457, 2462, 2467, 2472, 2484], dtype=np.uint16)
+
+
+def channels_to_freqs(channels) -> np.ndarray:
+    """
+    Convertit des numéros de canaux WiFi en fréquences centrales
+
+    Canaux 1-14: bande 2.4 GHz (table CHAN_FREQ_MHZ, canal 14 = 2484 MHz);
+    canaux > 14: bande 5 GHz (5000 + 5 × canal MHz).
+
+    Args:
+        channels: Séquence de numéros de canaux
+
+    Returns:
+        Tableau des fréquences centrales en Hz
+    """
+    arr = np.asarray(channels, dtype=np.int32)
+    freqs_2g = CHAN_FREQ_MHZ[np.clip(arr, 0, 14)].astype(np.float64)
+    return np.where(arr <= 14, freqs_2g, 5000.0 + 5.0 * arr) * 1e6
+
 
 class WiFiDetector:
     """
@@ -31,6 +54,14 @@ class WiFiDetector:
         11: 2.462e9,
     }
 
+    # Mêmes canaux sous forme de tableaux triés (recherche vectorisée)
+    _CHANNEL_NUMBERS = np.arange(1, 12)
+    _CHANNEL_FREQS_HZ = CHAN_FREQ_MHZ[1:12].astype(np.float64) * 1e6
+
+    # Périodes Beacon attendues (s): 100 ms, 1 TU = 102.4 ms, et leurs doubles
+    # (Remote ID: peut être 100ms, 200ms, etc.)
+    _BEACON_INTERVALS_S = np.array([0.1, 0.102, 0.2, 0.204])
+
     # Caractéristiques WiFi 802.11
     WIFI_BANDWIDTH_20MHZ = 20e6
     WIFI_BANDWIDTH_40MHZ = 40e6
@@ -61,13 +92,16 @@ class WiFiDetector:
             confidence += freq_confidence * 0.4
             wifi_channel = channel
 
+        # Scalaires dérivés de la PSD par SpectralAnalyzer (calculés une fois par bloc)
+        spectral = features.get('spectral_features', {})
+
         # 2. Vérification de la bande passante
-        bandwidth = features.get('spectral_features', {}).get('bandwidth', 0)
+        bandwidth = spectral.get('bandwidth', 0)
         bw_confidence = self._check_wifi_bandwidth(bandwidth)
         confidence += bw_confidence * 0.3
 
         # 3. Vérification de la structure OFDM
-        ofdm_confidence = self._check_ofdm_structure(features)
+        ofdm_confidence = self._check_ofdm_structure(features, spectral)
         confidence += ofdm_confidence * 0.3
 
         is_wifi = confidence >= 0.6
@@ -91,12 +125,14 @@ class WiFiDetector:
         """
         tolerance = 5e6  # ±5 MHz
 
-        for channel, channel_freq in self.WIFI_2G4_CHANNELS.items():
-            if abs(freq - channel_freq) < tolerance:
+        # Premier canal (le plus bas) à moins de la tolérance
+        idx = int(np.searchsorted(self._CHANNEL_FREQS_HZ, freq - tolerance, side='right'))
+        if idx < len(self._CHANNEL_FREQS_HZ):
+            distance = abs(freq - self._CHANNEL_FREQS_HZ[idx])
+            if distance < tolerance:
                 # Plus on est proche, plus la confiance est élevée
-                distance = abs(freq - channel_freq)
                 confidence = 1.0 - (distance / tolerance)
-                return channel, confidence
+                return int(self._CHANNEL_NUMBERS[idx]), float(confidence)
 
         return None, 0.0
 
@@ -124,17 +160,19 @@ class WiFiDetector:
 
         return 0.0
 
-    def _check_ofdm_structure(self, features: Dict) -> float:
+    def _check_ofdm_structure(self, features: Dict, spectral: Optional[Dict] = None) -> float:
         """
         Vérifie la structure OFDM typique du WiFi
 
         Args:
             features: Features du signal
+            spectral: features['spectral_features'] déjà extrait (optionnel)
 
         Returns:
             Confiance (0-1)
         """
-        spectral = features.get('spectral_features', {})
+        if spectral is None:
+            spectral = features.get('spectral_features', {})
 
         # WiFi OFDM a une structure plate caractéristique
         flatness = spectral.get('spectral_flatness', 0)
@@ -164,29 +202,15 @@ class WiFiDetector:
         if len(burst_list) < 2:
             return False
 
-        # Calcul de la période entre bursts
+        # Calcul de la période entre bursts: (début[i] - fin[i-1]) en une opération
         sample_rate = features.get('sample_rate', 25e6)
-        intervals = []
-
-        for i in range(1, len(burst_list)):
-            prev_end = burst_list[i-1][1]
-            curr_start = burst_list[i][0]
-            interval = (curr_start - prev_end) / sample_rate
-            intervals.append(interval)
-
-        if not intervals:
-            return False
-
-        avg_interval = np.mean(intervals)
-
-        # Beacon interval typique: 100ms (TU = 102.4ms)
-        # Remote ID: peut être 100ms, 200ms, etc.
-        beacon_intervals = [0.1, 0.102, 0.2, 0.204]
+        bounds = np.array([burst[:2] for burst in burst_list], dtype=np.float64)
+        avg_interval = float(np.mean(bounds[1:, 0] - bounds[:-1, 1])) / sample_rate
 
-        for expected in beacon_intervals:
-            if abs(avg_interval - expected) < 0.02:  # ±20ms
-                logger.info(f"Beacon frames détectés (période: {avg_interval*1000:.1f}ms)")
-                return True
+        # Beacon interval typique: 100ms (TU = 102.4ms), tolérance ±20ms
+        if np.any(np.abs(avg_interval - self._BEACON_INTERVALS_S) < 0.02):
+            logger.info(f"Beacon frames détectés (période: {avg_interval*1000:.1f}ms)")
+            return True
 
         return False
 
@@ -4,6 +4,7 @@ Implémentation de la démodulation WiFi 802.11 OFDM via USRP B210
 """
 
 import numpy as np
+import scipy.fft
 from scipy import signal as sp_signal
 from typing import Optional, Tuple, List
 import logging
@@ -39,19 +40,28 @@ class WiFiSDRDemodulator:
         1+1j, 0, 0, 0, 1+1j, 0, 0, 0, 1+1j, 0, 0, 0
     ])
 
-    def __init__(self, sample_rate: float = 20e6):
+    def __init__(self, sample_rate: float = 20e6, expected_num_samples: Optional[int] = None):
         """
         Initialise le démodulateur WiFi
 
         Args:
             sample_rate: Taux d'échantillonnage (20 MS/s pour WiFi 20 MHz)
+            expected_num_samples: Taille des blocs démodulés (num_samples), si connue.
+                                  Le filtre adapté du préambule est alors préparé ici.
         """
         self.sample_rate = sample_rate
 
-        # Générer le préambule court en temps
-        self.short_preamble = np.fft.ifft(self.SHORT_PREAMBLE_FREQ, n=64)
+        # Générer le préambule court en temps (complex64 comme les échantillons:
+        # la corrélation ne promeut pas le bloc en complex128)
+        self.short_preamble = np.fft.ifft(self.SHORT_PREAMBLE_FREQ, n=64).astype(np.complex64)
         self.short_preamble = np.tile(self.short_preamble, 10)  # 10 répétitions
 
+        # Filtre adapté du préambule dans le domaine fréquentiel, par taille de bloc
+        # (la taille est fixe pendant toute l'exécution: une seule entrée en pratique)
+        self._preamble_spectra = {}
+        if expected_num_samples:
+            self._preamble_spectrum(expected_num_samples)
+
         logger.info(f"Démodulateur WiFi SDR initialisé (fs={sample_rate/1e6:.1f} MS/s)")
 
     def detect_preamble(self, iq_samples: np.ndarray) -> Optional[int]:
@@ -65,7 +75,9 @@ class WiFiSDRDemodulator:
             Index de début du paquet ou None
         """
         # Corrélation avec préambule court
-        correlation = np.correlate(iq_samples, self.short_preamble, mode='valid')
+        correlation = self._correlate_preamble(iq_samples)
+        if correlation is None:
+            return None
 
         # Détection de pic de corrélation
         correlation_power = np.abs(correlation)**2
@@ -81,6 +93,51 @@ class WiFiSDRDemodulator:
 
         return None
 
+    def _preamble_spectrum(self, num_samples: int) -> Tuple[int, np.ndarray]:
+        """
+        Spectre conjugué du préambule court pour des blocs de taille donnée
+
+        Args:
+            num_samples: Nombre d'échantillons des blocs
+
+        Returns:
+            Tuple (taille FFT, conj(FFT(préambule)) en complex64)
+        """
+        entry = self._preamble_spectra.get(num_samples)
+        if entry is None:
+            nfft = scipy.fft.next_fast_len(num_samples)
+            spectrum = np.conj(scipy.fft.fft(self.short_preamble, nfft)).astype(np.complex64)
+            entry = (nfft, spectrum)
+            self._preamble_spectra[num_samples] = entry
+        return entry
+
+    def _correlate_preamble(self, iq_samples: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Corrélation du signal avec le préambule court par FFT
+
+        Même résultat que np.correlate(iq_samples, short_preamble, mode='valid'),
+        en O(N log N) au lieu de O(N × 640).
+
+        Args:
+            iq_samples: Échantillons I/Q complexes
+
+        Returns:
+            Corrélation (len(iq_samples) - 639 points), ou None si le bloc
+            est plus court que le préambule
+        """
+        n = len(iq_samples)
+        num_valid = n - len(self.short_preamble) + 1
+        if num_valid <= 0:
+            return None
+
+        nfft, spectrum = self._preamble_spectrum(n)
+
+        # Corrélation circulaire de taille nfft >= n: les retards 0..num_valid-1
+        # ne se replient pas
+        product = scipy.fft.fft(iq_samples, nfft, workers=-1)
+        product *= spectrum
+        return scipy.fft.ifft(product, workers=-1, overwrite_x=True)[:num_valid]
+
     def estimate_cfo(self, iq_samples: np.ndarray, preamble_idx: int) -> float:
         """
         Estime le décalage de fréquence porteuse (CFO)
@@ -121,8 +178,12 @@ class WiFiSDRDemodulator:
         Returns:
             Signal corrigé
         """
-        t = np.arange(len(iq_samples)) / self.sample_rate
-        correction = np.exp(-1j * 2 * np.pi * cfo * t)
+        # Phase calculée en float64 (précision sur tout le bloc), puis
+        # porteuse de correction en complex64 pour ne pas promouvoir le signal
+        phase = (-2 * np.pi * cfo / self.sample_rate) * np.arange(len(iq_samples))
+        correction = np.empty(len(iq_samples), dtype=np.complex64)
+        np.cos(phase, out=correction.real, casting='same_kind')
+        np.sin(phase, out=correction.imag, casting='same_kind')
 
         return iq_samples * correction
 
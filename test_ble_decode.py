@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test Décodage BLE - Vérifie le décodage Remote ID des annonces BLE sans adaptateur
+Compare le parcours par points d'entrée du scanner à l'essai de tous les offsets
+"""
+
+import logging
+import random
+import sys
+
+from src.ble_scanner import BLERemoteIDScanner, _is_plausible_ascii
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def reference_try_decode(scanner, data: bytes):
+    """
+    Décodage de référence: essai de chaque offset, dans l'ordre
+    (comportement du scanner avant l'index des points d'entrée)
+    """
+    for i in [0] + list(range(max(0, len(data) - 64))):
+        rid = scanner._decode_acceptable(data[i:])
+        if rid:
+            return rid
+    return None
+
+
+def same_remote_id(a, b) -> bool:
+    """Compare deux RemoteIDData (hors horodatage de décodage)"""
+    if a is None or b is None:
+        return a is b
+    da, db = a.to_dict(), b.to_dict()
+    da.pop('timestamp', None)
+    db.pop('timestamp', None)
+    return da == db
+
+
+def random_payload(rng: random.Random) -> bytes:
+    """Annonce aléatoire, avec un message Basic ID ou Location inséré une fois sur deux"""
+    basic = bytes([0, 1]) + b'SN-ABCDEF12345678901'
+    location = (bytes([1, 1, 90, 8, 0]) + int(48.1e7).to_bytes(4, 'little', signed=True)
+                + int(2.3e7).to_bytes(4, 'little', signed=True) + bytes(8))
+
+    n = rng.randint(5, 255)
+    # Octets quelconques ou types de message connus (0-8) en majorité
+    data = bytearray(rng.choice([rng.randint(0, 255), rng.randint(0, 8)]) for _ in range(n))
+    if rng.random() < 0.5:
+        msg = rng.choice([basic, location])
+        pos = rng.randint(0, max(0, n - len(msg)))
+        data[pos:pos + len(msg)] = msg[:n - pos]
+    return bytes(data)
+
+
+def test_ble_decode(num_payloads: int = 1500) -> bool:
+    """
+    Vérifie l'équivalence du décodage BLE avec la référence
+
+    Args:
+        num_payloads: Nombre d'annonces aléatoires
+
+    Returns:
+        True si aucun écart
+    """
+    logger.info("="*70)
+    logger.info("TEST DÉCODAGE BLE REMOTE ID")
+    logger.info("="*70)
+
+    scanner = BLERemoteIDScanner()
+    rng = random.Random(0)
+    # Un message INFO par Remote ID décodé: seuls les avertissements sont gardés
+    logging.getLogger('src.remote_id_decoder').setLevel(logging.WARNING)
+
+    # 1. Points d'entrée contre essai de tous les offsets
+    mismatches = hits = 0
+    for _ in range(num_payloads):
+        data = random_payload(rng)
+        rid = scanner._try_decode(data)
+        hits += rid is not None
+        mismatches += not same_remote_id(rid, reference_try_decode(scanner, data))
+    logger.info(f"{num_payloads} annonces, {hits} Remote ID, {mismatches} écarts")
+
+    # 2. Filtre ASCII imprimable contre la plage 0x20-0x7E
+    ascii_mismatches = 0
+    for _ in range(20000):
+        s = ''.join(chr(rng.choice([rng.randint(32, 126), rng.randint(0, 300)]))
+                    for _ in range(rng.randint(0, 40)))
+        expected = 6 <= len(s) <= 32 and all(32 <= ord(ch) <= 126 for ch in s)
+        ascii_mismatches += _is_plausible_ascii(s) != expected
+    logger.info(f"Filtre ASCII: {ascii_mismatches} écarts")
+
+    success = mismatches == 0 and ascii_mismatches == 0
+    if success:
+        logger.info("✅ Décodage BLE conforme à la référence")
+    else:
+        logger.error("❌ Écarts avec la référence")
+    return success
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if test_ble_decode() else 1)
+    except Exception as e:
+        logger.error(f"Erreur: {e}", exc_info=True)
+        sys.exit(1)